@@ -3,9 +3,9 @@ import tempfile
 
 import pandas as pd
 import streamlit as st
-import plotly.express as px
 
-from core.agent import Agent
+from core.agent import shared_agent
+from core.jobs import IngestQueue
 
 
 st.set_page_config(page_title="Personal Finance", layout="wide")
@@ -16,10 +16,24 @@ st.sidebar.header("Upload / Ingest")
 
 
 # ---------- init ----------
-agent = Agent(data_dir="agent_data", filename="transactions.csv")
+# One Agent per process, shared with the other pages; loads go through the data-versioned cache
+agent = shared_agent(data_dir="agent_data", filename="transactions.csv")
+
+
+@st.cache_resource
+def get_ingest_queue():
+    # Background parse + serialized commits, shared by every session of this process
+    return IngestQueue(agent.ingestion, workers=2)
+
+
+ingest_queue = get_ingest_queue()
 
 if "tx_df" not in st.session_state:
     st.session_state["tx_df"] = None
+if "ingest_jobs" not in st.session_state:
+    # Job ids submitted from this session, and the finished ones already reported
+    st.session_state["ingest_jobs"] = []
+    st.session_state["ingest_jobs_seen"] = set()
 
 
 def _load_into_session() -> pd.DataFrame:
@@ -29,29 +43,19 @@ def _load_into_session() -> pd.DataFrame:
 
 
 
-def _compute_amount_metrics(amount: pd.Series) -> tuple[float, float, float]:
-    """Compute gross spend, credits/refunds, and net using a consistent convention.
-
-    Convention used throughout the app:
-      - Amount > 0  => spend (charges)
-      - Amount < 0  => credits/refunds/payments
-
-    This avoids auto-inferring sign from the dataset, which breaks when you mix
-    sources or have many payments/refunds.
-    """
-    s = amount.dropna()
-    gross_spend = float(s[s > 0].sum())
-    credits = float(s[s < 0].abs().sum())
-    net = float(s.sum())
-    return gross_spend, credits, net
-
-
 firm = st.sidebar.selectbox("Statement type", ["DISCOVER", "AMEX"])
 allowed = ["csv"] if firm == "DISCOVER" else ["xlsx"]
 
 uploaded = st.sidebar.file_uploader(
-    f"Upload {firm} statement ({', '.join(allowed)})",
+    f"Upload {firm} statements ({', '.join(allowed)})",
     type=allowed,
+    accept_multiple_files=True,
+)
+
+profile_ingest = st.sidebar.checkbox(
+    "Profile pipeline",
+    value=False,
+    help="Record per-stage timings and row counts (also appended to agent_data/pipeline_profile.jsonl).",
 )
 
 col_a, col_b = st.sidebar.columns(2)
@@ -69,134 +73,180 @@ if load_clicked:
         st.sidebar.error(f"Load failed: {e}")
 
 if ingest_clicked:
-    if uploaded is None:
+    if not uploaded:
         st.sidebar.error("Upload a file first.")
     else:
+        profile_log = os.path.join(agent.storage.data_dir, "pipeline_profile.jsonl") if profile_ingest else None
         suffix = ".csv" if firm == "DISCOVER" else ".xlsx"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(uploaded.getbuffer())
-            tmp_path = tmp.name
-
-        try:
-            stats = agent.add_data(tmp_path, firm)
-            st.sidebar.success(
-                f"Ingested. +{stats.get('inserted_estimate', 0)} rows "
-                f"(skipped ~{stats.get('skipped_estimate', 0)})"
-            )
-            _load_into_session()
-        except Exception as e:
-            st.sidebar.error(f"Ingest failed: {e}")
-        finally:
+        for f in uploaded:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+                tmp.write(f.getbuffer())
+                tmp_path = tmp.name
             try:
+                # The job owns the temp file and deletes it when done
+                # Profiling is per job: the shared Agent's profiler stays untouched
+                job_id = ingest_queue.submit(
+                    tmp_path, firm, name=f.name, cleanup=True, profile=profile_ingest, profile_log=profile_log,
+                )
+            except Exception as e:
                 os.remove(tmp_path)
-            except OSError:
-                pass
+                st.sidebar.error(f"Ingest failed: {e}")
+                continue
+            st.session_state["ingest_jobs"].append(job_id)
+        st.sidebar.info("Ingesting in the background — you can keep browsing.")
+
+
+# ---------- ingest jobs ----------
+def _stage_label(p: dict) -> str:
+    if p["status"] == "done" and p["seconds"] is not None:
+        return f"done ({p['seconds']:.2f}s)"
+    return p["status"]
+
+
+def _render_jobs() -> None:
+    jobs = ingest_queue.jobs(st.session_state["ingest_jobs"])
+    if not jobs:
+        return
+
+    st.subheader("Ingest jobs")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Statement": j["name"],
+                "Type": j["firm"],
+                "Status": j["status"],
+                "Parse": _stage_label(j["progress"]["parse"]),
+                "Commit": _stage_label(j["progress"]["commit"]),
+                "Inserted": (j["stats"] or {}).get("inserted"),
+                "Skipped": (j["stats"] or {}).get("skipped"),
+                "Error": j["error"],
+            }
+            for j in jobs
+        ]),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    # Report each finished job once, then refresh the summary with the new rows
+    seen = st.session_state["ingest_jobs_seen"]
+    newly_done = [j for j in jobs if j["status"] in ("done", "failed") and j["job_id"] not in seen]
+    for j in newly_done:
+        seen.add(j["job_id"])
+        if j["status"] == "done":
+            stats = j["stats"]
+            st.toast(
+                f"{j['name']}: +{stats.get('inserted', 0)} rows (skipped {stats.get('skipped', 0)})"
+                + (" — parsed statement reused from cache" if stats.get("statement_cache_hit") else "")
+            )
+            if stats.get("profile"):
+                st.session_state["pipeline_profile"] = stats["profile"]
+        else:
+            st.toast(f"{j['name']}: ingest failed — {j['error']}")
+    if any(j["status"] == "done" for j in newly_done):
+        if st.session_state["tx_df"] is not None:
+            _load_into_session()
+        st.rerun()
 
 
-# ---------- main display ----------
-df = st.session_state.get("tx_df")
+@st.fragment(run_every=1.0)
+def _poll_jobs() -> None:
+    _render_jobs()
 
-st.subheader("Data Summary")
 
-if df is None or df.empty:
-    st.info("No data loaded. Use the sidebar to load stored transactions or ingest a statement.")
+session_jobs = ingest_queue.jobs(st.session_state["ingest_jobs"])
+if any(j["status"] in ("queued", "running") for j in session_jobs):
+    # Only this block reruns every second while jobs are in flight
+    _poll_jobs()
 else:
+    _render_jobs()
 
-    # Required columns check
-    missing = [c for c in ["Date", "Amount"] if c not in df.columns]
-    if missing:
-        st.error(f"Missing required columns for summary: {', '.join(missing)}")
-        st.stop()
 
-    # Transactions count
-    n_tx = int(len(df))
+# ---------- pipeline profile ----------
+profile = st.session_state.get("pipeline_profile")
+if profile:
+    with st.expander("Pipeline profile (last ingest)", expanded=False):
+        prof_df = pd.DataFrame(profile)
+        st.caption(f"Total: {prof_df['seconds'].sum():.3f}s across {len(prof_df)} stages")
+        st.dataframe(prof_df, use_container_width=True, hide_index=True)
 
-    # Date range (inclusive)
-    valid_dates = df["Date"].dropna()
-    if valid_dates.empty:
-        time_range_days = None
-    else:
-        min_date = valid_dates.min()
-        max_date = valid_dates.max()
-        time_range_days = int((max_date - min_date).days) + 1
 
-    # Amount metrics (global)
-    total_spend, total_credits, total_net = _compute_amount_metrics(df["Amount"])
+# ---------- main display ----------
+st.subheader("Data Summary")
 
-    # Past 30 days
-    cutoff = pd.Timestamp.today().normalize() - pd.Timedelta(days=30)
-    df_30d = df.loc[df["Date"] >= cutoff]
-    spend_30d, credits_30d, net_30d = _compute_amount_metrics(df_30d["Amount"]) if not df_30d.empty else (0.0, 0.0, 0.0)
+# Totals come from the storage summary record and the spend cube: no table load.
+# Amount convention: > 0 is spend (charges), < 0 is a credit/refund/payment.
+summary = agent.summary(recent_days=30)
+
+if summary["rows"] == 0:
+    st.info("No data stored yet. Use the sidebar to ingest a statement.")
+else:
+    min_date, max_date = summary["min_date"], summary["max_date"]
+    time_range_days = None if min_date is None else int((max_date - min_date).days) + 1
 
     c1, c2, c3, c4, c5 = st.columns(5)
-    c1.metric("# Transactions", f"{n_tx:,}")
+    c1.metric("# Transactions", f"{summary['rows']:,}")
     c2.metric("Time range (days)", "N/A" if time_range_days is None else f"{time_range_days:,}")
-    c3.metric("Gross spend (all time)", f"{total_spend:,.2f}")
-    c4.metric("Credits/refunds (all time)", f"{total_credits:,.2f}")
-    c5.metric("Net total (all time)", f"{total_net:,.2f}")
+    c3.metric("Gross spend (all time)", f"{summary['gross_spend']:,.2f}")
+    c4.metric("Credits/refunds (all time)", f"{summary['credits']:,.2f}")
+    c5.metric("Net total (all time)", f"{summary['net']:,.2f}")
+
+    recent = summary["recent"]
+    st.caption(
+        f"Past {recent['days']} days — spend: {recent['gross_spend']:,.2f} | "
+        f"credits: {recent['credits']:,.2f} | net: {recent['net']:,.2f}"
+    )
 
-    st.caption(f"Past 30 days — spend: {spend_30d:,.2f} | credits: {credits_30d:,.2f} | net: {net_30d:,.2f}")
+    with st.expander("By source", expanded=False):
+        st.dataframe(
+            pd.DataFrame.from_dict(summary["by_source"], orient="index").rename_axis("Source"),
+            use_container_width=True,
+        )
 
     st.divider()
     st.subheader("Quick Visualization (Past 30 Days)")
 
-    import plotly.express as px
-
-    # Build a positive "Spend" series for plotting
-    df_plot = df.dropna(subset=["Date"]).copy()
-    if df_plot.empty:
-        st.info("No valid dates to visualize.")
-        st.stop()
-
-    # Plot spend consistently as positive charges
-    df_plot["Spend"] = df_plot["Amount"].clip(lower=0)
-
-    cutoff_30d = pd.Timestamp.today().normalize() - pd.Timedelta(days=30)
-    df_30d = df_plot.loc[df_plot["Date"] >= cutoff_30d]
+    today = pd.Timestamp.today().normalize()
+    cutoff_30d = today - pd.Timedelta(days=30)
+    end_30d = max(today, max_date) if max_date is not None else today
+    # Spend only (positive amounts), answered from the spend cube. end_30d follows
+    # the newest transaction, so the window can be long: max_points bounds the line
+    cat_30d, daily = agent.flex_spend_report(cutoff_30d, end_30d, fill_missing_days=False, max_points=60)
 
-    if df_30d.empty:
+    if daily.empty:
         st.info("No transactions in the past 30 days.")
-        st.stop()
+    else:
+        # plotly is only loaded once there is something to draw
+        import plotly.express as px
 
-    v1, v2 = st.columns(2)
-
-    # ---- Past 30 days spend by category (interactive bar) ----
-    with v1:
-        st.caption("Spend by category (past 30 days)")
-        if "Category" not in df_30d.columns:
-            st.info("No 'Category' column available.")
-        else:
-            cat_30d = (
-                df_30d.groupby("Category", as_index=False)["Spend"]
-                .sum()
-                .sort_values("Spend", ascending=False)
-            )
+        v1, v2 = st.columns(2)
 
+        # ---- Past 30 days spend by category (interactive bar) ----
+        with v1:
+            st.caption("Spend by category (past 30 days)")
             fig_cat = px.bar(
-                cat_30d,
+                cat_30d.rename(columns={"spend": "Spend"}).sort_values("Spend", ascending=False),
                 x="Category",
                 y="Spend",
                 title=None,
             )
             st.plotly_chart(fig_cat, use_container_width=True)
 
-    # ---- Past 30 days daily spend (interactive line) ----
-    with v2:
-        st.caption("Daily spend (past 30 days)")
-        daily = (
-            df_30d.assign(day=df_30d["Date"].dt.date)
-            .groupby("day", as_index=False)["Spend"]
-            .sum()
-            .sort_values("day")
-        )
+        # ---- Past 30 days daily spend (interactive line) ----
+        with v2:
+            st.caption("Daily spend (past 30 days)")
+            fig_daily = px.line(
+                daily.rename(columns={"spend": "Spend"}),
+                x="day",
+                y="Spend",
+                markers=True,
+            )
+            st.plotly_chart(fig_daily, use_container_width=True)
 
-        fig_daily = px.line(
-            daily,
-            x="day",
-            y="Spend",
-            markers=True,
-        )
-        st.plotly_chart(fig_daily, use_container_width=True)
+# Full table only when explicitly loaded from the sidebar
+df = st.session_state.get("tx_df")
+if df is not None and not df.empty:
+    with st.expander(f"Loaded transactions ({len(df):,} rows)", expanded=False):
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
 # Reset Transactions
 st.sidebar.divider()
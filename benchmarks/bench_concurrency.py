@@ -0,0 +1,148 @@
+"""
+Multi-process stress test + throughput benchmark for concurrent ingest.
+
+Starts N writer processes that ingest synthetic statements into the same
+store at once (every statement is submitted twice, by two different
+writers when N > 1, so duplicate tx_ids race each other), plus a reader process that loads the
+store in a loop while they run. Checks:
+
+  - no lost rows: the final tx_ids are exactly those of the statements
+  - no duplicated rows, and the writers' reported `inserted` add up
+  - every snapshot the reader saw was duplicate-free and never shrank
+  - the summary record and spend cube match the final table
+  - the write-ahead log is fully drained
+
+and reports aggregate ingest throughput (statement rows submitted per
+second) for each writer count. Throughput only scales with the CPUs the
+machine has: parsing runs in parallel, commits are serialized.
+
+tests/test_concurrency.py runs the same checks on a small dataset; this
+script is for larger runs and the throughput numbers.
+
+Usage:
+    python -m benchmarks.bench_concurrency --rows 200000 --files 16 --writers 1 2 4 8
+"""
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_storage import BACKENDS
+from benchmarks.synth import generate_statements
+from core.ingestion import Ingestion
+from core.report import FinanceReport
+
+
+def _writer(backend: str, data_dir: str, jobs: list, start, results) -> None:
+    sys.stdout = open(os.devnull, 'w')  # Ingestion prints per statement
+    storage = BACKENDS[backend](data_dir)
+    FinanceReport(storage)  # keep the spend cube following writes, as the app does
+    ingestion = Ingestion(storage)
+    start.wait()
+    inserted = 0
+    for path, firm in jobs:
+        inserted += ingestion.add_data(path, firm)['inserted']
+    results.put(inserted)
+
+
+def _reader(backend: str, data_dir: str, stop, results) -> None:
+    storage = BACKENDS[backend](data_dir)
+    reads, violations, last = 0, [], 0
+    while not stop.is_set():
+        ids = storage.load_transactions(columns=['tx_id'])['tx_id']
+        reads += 1
+        if ids.isna().any():
+            violations.append(f'read {reads}: missing tx_id (torn row)')
+        if ids.duplicated().any():
+            violations.append(f'read {reads}: {int(ids.duplicated().sum())} duplicated tx_ids')
+        if len(ids) < last:
+            violations.append(f'read {reads}: {len(ids)} rows after {last}')
+        last = len(ids)
+    results.put((reads, violations))
+
+
+def run(backend: str, files: list, sizes: dict, writers: int, expected: set) -> dict:
+    data_dir = tempfile.mkdtemp(prefix=f'bench_concurrency_{backend}_')
+    ctx = mp.get_context('spawn')
+    start, stop = ctx.Event(), ctx.Event()
+    results, reads = ctx.Queue(), ctx.Queue()
+
+    # Each statement is submitted twice, by two writers when there are several,
+    # so duplicates race each other and every run does the same work
+    jobs = [[] for _ in range(writers)]
+    for i, f in enumerate(files):
+        jobs[i % writers].append(f)
+        jobs[(i + 1) % writers].append(f)
+    submitted = sum(sizes[path] for j in jobs for path, _ in j)
+
+    procs = [ctx.Process(target=_writer, args=(backend, data_dir, j, start, results)) for j in jobs]
+    reader = ctx.Process(target=_reader, args=(backend, data_dir, stop, reads))
+    for p in procs:
+        p.start()
+    reader.start()
+    time.sleep(2.0)  # let the spawned interpreters import
+    t0 = time.perf_counter()
+    start.set()
+    inserted = [results.get() for _ in procs]
+    elapsed = time.perf_counter() - t0
+    for p in procs:
+        p.join()
+    stop.set()
+    n_reads, violations = reads.get()
+    reader.join()
+
+    storage = BACKENDS[backend](data_dir)
+    df = storage.load_transactions(columns=['tx_id', 'Amount'])
+    ids = df['tx_id']
+    assert not violations, violations[:5]
+    assert not ids.duplicated().any(), f'{int(ids.duplicated().sum())} duplicated tx_ids'
+    assert set(ids) == expected, f'lost {len(expected - set(ids))}, unexpected {len(set(ids) - expected)}'
+    assert sum(inserted) == len(ids), (sum(inserted), len(ids))
+    assert storage.summary()['rows'] == len(ids)
+    cube = FinanceReport(storage).cube.frame()
+    assert int(cube['count'].sum()) == int(df['Amount'].notna().sum())
+    if os.path.isdir(storage.wal_dir):
+        assert not os.listdir(storage.wal_dir), os.listdir(storage.wal_dir)
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return {'seconds': elapsed, 'rows_per_s': submitted / elapsed, 'rows': len(ids), 'reads': n_reads}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=200_000, help='total statement rows')
+    parser.add_argument('--files', type=int, default=16)
+    parser.add_argument('--amex-share', type=float, default=0.25)
+    parser.add_argument('--writers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp(prefix='bench_concurrency_statements_')
+    files = generate_statements(out_dir, args.rows, files=args.files, amex_share=args.amex_share)
+
+    # Reference: every tx_id the statements produce (parsing is deterministic)
+    parser_only = Ingestion(BACKENDS['csv'](tempfile.mkdtemp(prefix='bench_concurrency_ref_')))
+    expected, sizes = set(), {}
+    for path, firm in files:
+        ids = parser_only.ingest(path, firm)['tx_id']
+        sizes[path] = len(ids)
+        expected.update(ids)
+
+    print(f'statements={len(files)} rows={sum(sizes.values()):,} unique tx_ids={len(expected):,} cpus={os.cpu_count()}')
+    for backend in args.backends:
+        base = None
+        for w in args.writers:
+            r = run(backend, files, sizes, w, expected)
+            base = base or r['rows_per_s']
+            print(
+                f'  {backend:8s} writers={w:<3d} {r["seconds"]:7.2f}s  {r["rows_per_s"]:>10,.0f} rows/s '
+                f'({r["rows_per_s"] / base:4.2f}x)  reader snapshots={r["reads"]:<5d} '
+                f'final={r["rows"]:,} lost=0 duplicated=0'
+            )
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark + regression check for dictionary-encoded description processing.
+
+Compares the row-wise description work the loaders used to do (payment and
+promo regexes via str.contains over every row, re.sub key normalization per
+row) with core.descriptions (factorize once, classify each distinct string
+once, memoized across calls), and asserts identical results.
+
+Usage:
+    python -m benchmarks.bench_descriptions --rows 100000 1000000 --uniques 200 5000
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.descriptions import (
+    AMEX_PAYMENT_PATTERN,
+    DISCOVER_PAYMENT_PATTERN,
+    PROMO_CREDIT_PATTERN,
+    DescriptionClassifier,
+)
+
+WORDS = ['STARBUCKS', 'TRADER JOE S', 'SHELL OIL', 'UBER   TRIP', 'AMAZON MKTPL', 'COSTCO WHSE',
+         'AUTOPAY PAYMENT - THANK YOU', '$100 STATEMENT CREDIT', 'NETFLIX.COM', 'DELTA AIR LINES']
+
+
+def make_descriptions(n: int, uniques: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    pool = np.array([
+        f'{WORDS[i % len(WORDS)]} #{i:05d}  CITY {i % 50:02d}' for i in range(uniques)
+    ], dtype=object)
+    # Zipf-like repetition: a few merchants dominate, like real statements
+    weights = 1.0 / np.arange(1, uniques + 1)
+    values = pool[rng.choice(uniques, size=n, p=weights / weights.sum())]
+    values[rng.random(n) < 0.001] = None
+    return pd.Series(values, dtype=object)
+
+
+def legacy(desc: pd.Series) -> dict:
+    as_str = desc.astype(str)
+    return {
+        'amex_payment': as_str.str.contains(AMEX_PAYMENT_PATTERN, case=False, na=False, regex=True).to_numpy(),
+        'discover_payment': as_str.str.contains(DISCOVER_PAYMENT_PATTERN, case=False, na=False, regex=True).to_numpy(),
+        'promo': as_str.str.contains(PROMO_CREDIT_PATTERN, case=False, na=False, regex=True).to_numpy(),
+        'key': np.array(
+            ['' if pd.isna(v) else re.sub(r"\s+", " ", str(v).strip().lower()) for v in desc], dtype=object
+        ),
+    }
+
+
+def encoded(classifier: DescriptionClassifier, desc: pd.Series) -> dict:
+    desc = classifier.encode(desc)
+    return {f: classifier.lookup(desc, f) for f in ['amex_payment', 'discover_payment', 'promo', 'key']}
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--uniques', type=int, nargs='+', default=[200, 5_000])
+    args = parser.parse_args()
+
+    for n in args.rows:
+        for u in args.uniques:
+            desc = make_descriptions(n, u)
+            classifier = DescriptionClassifier()
+
+            ref, t_legacy = timed(lambda: legacy(desc))
+            out, t_cold = timed(lambda: encoded(classifier, desc))
+            # Next statement from the same merchants: classifications come from the memo
+            _, t_warm = timed(lambda: encoded(classifier, desc.sample(frac=1.0, random_state=1)))
+
+            for k in ref:
+                assert np.array_equal(ref[k], out[k]), k
+
+            print(
+                f'rows={n:>9,} uniques={u:>6,} legacy={t_legacy:7.3f}s '
+                f'encoded(cold)={t_cold:7.3f}s ({t_legacy / t_cold:5.1f}x) '
+                f'encoded(warm)={t_warm:7.3f}s ({t_legacy / t_warm:5.1f}x)  identical=True'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Per-row memory footprint: canonical vs compact in-memory schema.
+
+Usage:
+    python -m benchmarks.bench_memory --rows 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.bench_storage import canonical
+from core.report import FinanceReport
+from core.schema import memory_per_row, to_compact
+from core.storage import Storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    storage = Storage(tempfile.mkdtemp(prefix='bench_memory_'))
+    report = FinanceReport(storage, use_cube=False)
+
+    for n in args.rows:
+        df = canonical(storage, n, seed=0)
+        compact = to_compact(df)
+
+        before = memory_per_row(df)
+        after = memory_per_row(compact)
+        print(f'rows={n:>9,}  canonical {before:7.1f} B/row  compact {after:7.1f} B/row  ({before / after:4.1f}x)')
+        for col in df.columns:
+            src = df[col].memory_usage(deep=True, index=False) / n
+            dst_col = 'AmountCents' if col == 'Amount' else col
+            dst = compact[dst_col].memory_usage(deep=True, index=False) / n
+            print(f'    {col:12s} {src:7.1f} -> {dst:7.1f}')
+
+        for label, frame in [('canonical', df), ('compact', compact)]:
+            t0 = time.perf_counter()
+            report.spend_summary(frame, '2020-01-01', '2023-12-31')
+            report.monthly_spend_by_category(frame)
+            print(f'    reports on {label:9s} {time.perf_counter() - t0:7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
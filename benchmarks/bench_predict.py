@@ -0,0 +1,105 @@
+"""
+Benchmark + regression check for core.predict.BudgetPredictor.
+
+Times panel construction, features, batched ridge and prediction for many
+keys (profile x category) and checks the batched solve against a per-key
+loop of ordinary centered ridge solves. Then times the walk-forward
+backtest grid serially and with --workers processes (results must match).
+
+Usage:
+    python -m benchmarks.bench_predict --rows 1000000 --profiles 4 --categories 1500 --workers 4
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.predict import BudgetPredictor
+
+
+def make_transactions(n: int, profiles: int, categories: int, years: int = 6, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    days = rng.integers(0, years * 365, n)
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2019-01-01') + pd.to_timedelta(days, unit='D'),
+        'Amount': rng.gamma(2.0, 20.0, n).round(2),
+        'Category': np.array([f'Category {i:04d}' for i in range(categories)], dtype=object)[rng.integers(0, categories, n)],
+        'Profile': np.array([f'profile-{i}' for i in range(profiles)], dtype=object)[rng.integers(0, profiles, n)],
+    })
+
+
+def loop_ridge(frame: pd.DataFrame, feature: list[str], alpha: float) -> tuple[np.ndarray, np.ndarray]:
+    """One solve per key (what the batched version replaces)."""
+    y_all = frame['spend'].to_numpy()
+    X_all = np.stack([frame[f].to_numpy() for f in feature], axis=-1)
+    coef = np.full((y_all.shape[1], len(feature)), np.nan)
+    intercept = np.full(y_all.shape[1], np.nan)
+    for k in range(y_all.shape[1]):
+        y, X = y_all[:, k], X_all[:, k]
+        started = np.maximum.accumulate(np.nan_to_num(y) != 0)
+        ok = started & ~np.isnan(y) & ~np.isnan(X).any(axis=1)
+        if not ok.any():
+            continue
+        Xo, yo = X[ok], y[ok]
+        x_mean, y_mean = Xo.mean(axis=0), yo.mean()
+        Xc = Xo - x_mean
+        coef[k] = np.linalg.solve(Xc.T @ Xc + alpha * np.eye(len(feature)), Xc.T @ (yo - y_mean))
+        intercept[k] = y_mean - x_mean @ coef[k]
+    return coef, intercept
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--profiles', type=int, default=4)
+    parser.add_argument('--categories', type=int, default=1500)
+    parser.add_argument('--alpha', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=None, help='backtest pool size (default: all CPUs)')
+    parser.add_argument('--cutoffs', type=int, default=12)
+    args = parser.parse_args()
+
+    df = make_transactions(args.rows, args.profiles, args.categories)
+    feature = ['lag_1', 'roll3_mean']
+    p = BudgetPredictor()
+
+    panel, t_panel = timed(lambda: p.build_monthly_panel(df, by=['Profile', 'Category']))
+    frame, t_features = timed(lambda: p.make_features(panel))
+    _, t_fit = timed(lambda: p.fit_ridge(frame, feature=feature, alpha=args.alpha, val_months=3))
+    pred, t_predict = timed(lambda: p.predict_next_month(frame))
+
+    (coef, intercept), t_loop = timed(lambda: loop_ridge(frame, feature, args.alpha))
+    assert np.allclose(coef, p.coef_.to_numpy(), equal_nan=True)
+    assert np.allclose(intercept, p.intercept_.to_numpy(), equal_nan=True)
+
+    print(f'rows={args.rows:,} keys={panel.shape[1]:,} months={panel.shape[0]}')
+    print(f'  build_monthly_panel  {t_panel:7.3f}s')
+    print(f'  make_features        {t_features:7.3f}s')
+    print(f'  fit_ridge (batched)  {t_fit:7.3f}s   (validation fit + final fit)')
+    print(f'  predict_next_month   {t_predict:7.3f}s')
+    print(f'  per-key loop solve   {t_loop:7.3f}s   (final fit only)  identical=True')
+    print(f'  models: {int((pred["method"] == "ridge").sum()):,} ridge, {int((pred["method"] != "ridge").sum()):,} fallback')
+
+    grid = {
+        'feature_sets': [['lag_1'], ['lag_1', 'roll3_mean'], ['lag_1', 'roll3_mean', 'lag_12']],
+        'alphas': [0.1, 1.0, 10.0, 100.0],
+        'n_cutoffs': args.cutoffs,
+    }
+    serial, t_serial = timed(lambda: p.backtest(panel, workers=1, **grid))
+    pooled, t_pooled = timed(lambda: p.backtest(panel, workers=args.workers, **grid))
+    pd.testing.assert_frame_equal(serial, pooled)
+    folds = args.cutoffs * len(grid['feature_sets']) * len(grid['alphas'])
+    print(f'  backtest {folds} cutoff x feature set x alpha folds')
+    print(f'    workers=1            {t_serial:7.3f}s')
+    print(f'    workers={args.workers or "all CPUs":<12} {t_pooled:7.3f}s   ({t_serial / t_pooled:4.1f}x)  identical=True')
+    print(p.backtest_summary(pooled).head(5).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Nightly all-profile report over many small shards (core.profiles).
+
+Creates --profiles households under one root (each with its own synthetic
+statements, backends mixed csv/parquet/sqlite), then runs
+ProfileStore.run_batch for the given task with each worker count and checks:
+
+  - every profile reports exactly once, without errors
+  - results equal the sequential (workers=1) run
+  - the catalog's row counts and data versions match the shards
+
+Reports wall time, shards per second and the time to the first streamed
+result. Runtime should fall with workers up to the machine's CPU count and
+stay flat beyond it.
+
+Usage:
+    python -m benchmarks.bench_profiles --profiles 64 --rows 5000 --workers 1 2 4 8 --task monthly_spend_by_category
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synth import generate_statements
+from core.ingestion import Ingestion
+from core.profiles import BATCH_TASKS, ProfileStore
+
+BACKEND_CYCLE = ['csv', 'parquet', 'sqlite']
+
+# Arguments for the tasks that need them
+TASK_PARAMS = {
+    'spend_summary': {'start': '2020-01-01', 'end': '2023-12-31', 'max_points': 400},
+    'query': {'dimensions': ['Source', 'weekday'], 'measures': ['spend', 'count'], 'granularity': 'month'},
+}
+
+
+def build(root: str, n_profiles: int, rows: int) -> ProfileStore:
+    profiles = ProfileStore(root)
+    statements = tempfile.mkdtemp(prefix='bench_profiles_statements_')
+    for i in range(n_profiles):
+        storage = profiles.create(f'household-{i:04d}', backend=BACKEND_CYCLE[i % len(BACKEND_CYCLE)])
+        files = generate_statements(os.path.join(statements, str(i)), rows, files=2, amex_share=0.25, seed=i)
+        with contextlib.redirect_stdout(io.StringIO()):
+            Ingestion(storage).add_many(files, workers=1)
+    shutil.rmtree(statements, ignore_errors=True)
+    return profiles
+
+
+def same(a, b) -> bool:
+    # A cube reloaded from its CSV can differ from a fresh one in the last float bit
+    if isinstance(a, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(a, b, check_exact=False, rtol=1e-9)
+            return True
+        except AssertionError:
+            return False
+    if isinstance(a, tuple):
+        return all(same(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(abs(a[k] - b[k]) <= 1e-6 * max(1.0, abs(a[k])) for k in a)
+    return a == b
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--profiles', type=int, default=64)
+    parser.add_argument('--rows', type=int, default=5_000, help='statement rows per profile')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--task', default='monthly_spend_by_category', choices=BATCH_TASKS)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='bench_profiles_')
+    t0 = time.perf_counter()
+    profiles = build(root, args.profiles, args.rows)
+    print(f'profiles={args.profiles} rows/profile~{args.rows:,} built in {time.perf_counter() - t0:.1f}s cpus={os.cpu_count()}')
+
+    params = TASK_PARAMS.get(args.task, {})
+    # Untimed first pass: builds each shard's cube/models, as the first nightly run would
+    t0 = time.perf_counter()
+    reference = {r['profile']: r for r in profiles.run_batch(args.task, workers=1, **params)}
+    print(f'  first (cold) pass {time.perf_counter() - t0:.2f}s')
+
+    base = None
+    for w in args.workers:
+        results, first = {}, None
+        t0 = time.perf_counter()
+        for r in profiles.run_batch(args.task, workers=w, **params):
+            first = first or time.perf_counter() - t0
+            assert r['error'] is None, (r['profile'], r['error'])
+            assert r['profile'] not in results, r['profile']
+            results[r['profile']] = r
+        elapsed = time.perf_counter() - t0
+
+        assert set(results) == set(profiles.profiles())
+        for p, r in results.items():
+            assert same(r['result'], reference[p]['result']), p
+        catalog = profiles.catalog()
+        for p, r in results.items():
+            assert catalog[p]['rows'] == r['rows'] and catalog[p]['data_version'] == r['data_version'], p
+
+        base = base or elapsed
+        print(
+            f'  workers={w:<3d} {elapsed:7.2f}s  {len(results) / elapsed:7.1f} shards/s '
+            f'({base / elapsed:4.2f}x)  first result after {first:.2f}s'
+        )
+    shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Cold-start import profile for each entry point.
+
+Runs every entry point in fresh interpreters (python -X importtime) and
+reports:
+
+  - wall time from interpreter start of the entry code to done
+    (median of --repeat runs)
+  - which heavy optional modules got loaded (they should only load when
+    used: openpyxl for AMEX statements, plotly for Home's charts,
+    core.predict for predictions)
+  - the slowest top-level imports (cumulative microseconds, from the last run)
+
+Entry points:
+
+  agent            from core.agent import Agent; Agent(<empty store>)
+  home             Home.py, run as a script in streamlit bare mode
+  data_breakdown   pages/Data_Breakdown.py, likewise
+
+The pages need streamlit installed and are skipped otherwise. Each run
+uses an empty temporary store, so this is the first-visit cost.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ['openpyxl', 'plotly', 'altair', 'pyarrow', 'sqlite3', 'core.predict', 'core.model_store', 'core.xlsx']
+
+ENTRY_POINTS = {
+    'agent': "from core.agent import Agent\nAgent(data_dir='agent_data')",
+    'home': f"import runpy\nrunpy.run_path({os.path.join(ROOT, 'Home.py')!r}, run_name='__main__')",
+    'data_breakdown': f"import runpy\nrunpy.run_path({os.path.join(ROOT, 'pages', 'Data_Breakdown.py')!r}, run_name='__main__')",
+}
+
+# Wraps an entry point: time it, then report what it loaded on the last stdout line
+TEMPLATE = """
+import time
+_t0 = time.perf_counter()
+{code}
+_elapsed = time.perf_counter() - _t0
+import json, sys
+print(json.dumps({{'seconds': _elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def needs_streamlit(name: str) -> bool:
+    return name != 'agent'
+
+
+def run_once(code: str) -> tuple[dict, list[tuple[int, str]]]:
+    with tempfile.TemporaryDirectory(prefix='bench_startup_') as cwd:
+        env = dict(os.environ, PYTHONPATH=ROOT + os.pathsep + os.environ.get('PYTHONPATH', ''))
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TEMPLATE.format(code=code, heavy=HEAVY)],
+            cwd=cwd, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed')
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    # "import time: self [us] | cumulative | imported package", nesting shown by indentation
+    top = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if name.startswith('  '):
+            # Nested import: already counted in its parent's cumulative time
+            continue
+        top.append((int(cumulative), name.strip()))
+    return result, sorted(top, reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--entries', nargs='+', default=list(ENTRY_POINTS), choices=list(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=6)
+    parser.add_argument('--out', default=None, help='write results as JSON (compare across commits)')
+    args = parser.parse_args()
+
+    try:
+        import streamlit  # noqa: F401
+        have_streamlit = True
+    except ImportError:
+        have_streamlit = False
+
+    results = {}
+    for name in args.entries:
+        if needs_streamlit(name) and not have_streamlit:
+            print(f'{name:16s} skipped (streamlit not installed)')
+            continue
+        runs, top = [], []
+        try:
+            for _ in range(args.repeat):
+                result, top = run_once(ENTRY_POINTS[name])
+                runs.append(result['seconds'])
+        except RuntimeError as e:
+            print(f'{name:16s} failed: {e}')
+            continue
+        results[name] = {'seconds': statistics.median(runs), 'runs': runs, 'loaded': result['loaded'], 'top': top[:args.top]}
+        print(f'{name:16s} {statistics.median(runs):7.3f}s  (median of {len(runs)})  heavy loaded: {", ".join(result["loaded"]) or "-"}')
+        for cumulative, module in top[:args.top]:
+            print(f'    {cumulative / 1e6:7.3f}s  {module}')
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nwrote {args.out}')
+
+
+if __name__ == '__main__':
+    main()
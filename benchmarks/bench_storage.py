@@ -0,0 +1,68 @@
+"""
+Storage backend benchmark: CSV vs Parquet vs SQLite.
+
+Times, per backend:
+  - initial merge_and_save of the full history
+  - merge_and_save of a small monthly statement (half new, half duplicates)
+  - full load_transactions
+  - FinanceReport.spend_summary over a 30-day window (df=None, read from storage)
+
+Usage:
+    python -m benchmarks.bench_storage --rows 100000 1000000
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_tx_id import make_frame
+from core.descriptions import DESCRIPTIONS
+from core.ingestion import Ingestion
+from core.parquet_storage import ParquetStorage
+from core.report import FinanceReport
+from core.sqlite_storage import SQLiteStorage
+from core.storage import Storage
+
+BACKENDS = {'csv': Storage, 'parquet': ParquetStorage, 'sqlite': SQLiteStorage}
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def canonical(storage: Storage, n: int, seed: int) -> pd.DataFrame:
+    ing = Ingestion(storage)
+    df = ing.assign_tx_id(ing.ingest_dates(make_frame(n, seed=seed)))
+    df['Merchant'] = DESCRIPTIONS.lookup(df['Description'], 'merchant')
+    return df[storage.canonical_cols]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    args = parser.parse_args()
+
+    for n in args.rows:
+        for name in args.backends:
+            storage = BACKENDS[name](tempfile.mkdtemp(prefix=f'bench_{name}_'))
+            report = FinanceReport(storage)
+            history = canonical(storage, n, seed=0)
+            statement = pd.concat([history.sample(250, random_state=0), canonical(storage, 250, seed=99)])
+
+            _, t_initial = timed(lambda: storage.merge_and_save(history))
+            _, t_merge = timed(lambda: storage.merge_and_save(statement))
+            _, t_load = timed(storage.load_transactions)
+            _, t_window = timed(lambda: report.spend_summary(None, '2021-06-01', '2021-06-30'))
+
+            print(
+                f'{name:8s} rows={n:>9,}  initial={t_initial:7.3f}s  merge(500)={t_merge:7.3f}s  '
+                f'load={t_load:7.3f}s  30d-summary={t_window:7.3f}s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+End-to-end pipeline benchmark suite.
+
+For each size, generates synthetic AMEX/Discover statements (benchmarks.synth)
+and times every pipeline stage:
+
+  ingest_amex, ingest_discover     Ingestion.ingest over the statement files
+  merge_initial                    Storage.merge_and_save of the whole batch
+  merge_incremental                merge_and_save of one small new statement
+  load_transactions                full load from storage
+  spend_summary_cube               FinanceReport.spend_summary(df=None), 90-day window
+  spend_summary_frame              FinanceReport.spend_summary on a loaded frame
+  spend_summary_points             spend_summary(df=None) over the whole range, max_points=400 (bucketed)
+  spend_summary_lttb               the same with method='lttb'
+  monthly_spend_by_category        FinanceReport.monthly_spend_by_category()
+  query_merchant_month             FinanceReport.query(Merchant x weekday per month), cold
+  query_cached                     the same query again (served from the query cache)
+  rolling_spend                    FinanceReport.rolling_spend(), 7/30/90/365 days x Category x Source
+  predict                          Agent.run_next_month_prediction (cold: panel + full fit)
+  predict_cached                   the same call again (persisted model, no refit)
+
+Each stage records wall time and peak RSS (sampled from /proc/self/statm, so
+native pandas/pyarrow buffers are included). Results are written as JSON
+keyed by stage so runs from different commits can be compared.
+
+Usage:
+    python -m benchmarks.run_suite --sizes 10000 100000 1000000 --out bench_results.json
+    python -m benchmarks.run_suite --sizes 10000 --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from benchmarks.bench_storage import BACKENDS
+from benchmarks.synth import generate_statements, write_discover_csv
+from core.agent import Agent
+from core.ingestion import Ingestion
+from core.report import FinanceReport
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes() -> int:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        # ru_maxrss is KiB on Linux; only a monotonic upper bound elsewhere
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PeakRSS:
+    """Sample RSS in a background thread while the block runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline = 0
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def run_stage(results: list, size: int, stage: str, fn):
+    with PeakRSS() as mem:
+        t0 = time.perf_counter()
+        try:
+            out, error = fn(), None
+        except Exception as e:  # record and keep going (e.g. predictor not available)
+            out, error = None, f'{type(e).__name__}: {e}'
+        elapsed = time.perf_counter() - t0
+
+    row = {
+        'size': size,
+        'stage': stage,
+        'seconds': round(elapsed, 6),
+        'peak_rss_mib': round(mem.peak / 2**20, 1),
+        'peak_delta_mib': round((mem.peak - mem.baseline) / 2**20, 1),
+    }
+    if isinstance(out, pd.DataFrame):
+        row['rows_out'] = len(out)
+    if error:
+        row['error'] = error
+    results.append(row)
+    status = f"ERROR {error}" if error else f"{elapsed:9.3f}s  peak +{row['peak_delta_mib']:8.1f} MiB"
+    print(f'  {stage:28s} {status}')
+    return out
+
+
+def run_size(size: int, backend: str, files: int, keep: bool) -> list:
+    results = []
+    root = tempfile.mkdtemp(prefix=f'bench_suite_{size}_')
+    try:
+        print(f'size={size:,} backend={backend} ({root})')
+        statements = generate_statements(os.path.join(root, 'statements'), size, files=files)
+        storage = BACKENDS[backend](os.path.join(root, 'store'))
+        ing = Ingestion(storage)
+        report = FinanceReport(storage)
+
+        amex = [p for p, firm in statements if firm == 'AMEX']
+        discover = [p for p, firm in statements if firm == 'DISCOVER']
+        parsed = []
+        parsed += run_stage(results, size, 'ingest_amex', lambda: [ing.ingest(p, 'AMEX') for p in amex]) or []
+        parsed += run_stage(results, size, 'ingest_discover', lambda: [ing.ingest(p, 'DISCOVER') for p in discover]) or []
+        batch = pd.concat(parsed, ignore_index=True)
+
+        run_stage(results, size, 'merge_initial', lambda: storage.merge_and_save(batch))
+
+        monthly_path = os.path.join(root, 'statements', 'monthly.csv')
+        write_discover_csv(monthly_path, max(size // 100, 10), seed=10_000, start='2024-01-01', days=30)
+        monthly = ing.ingest(monthly_path, 'DISCOVER')
+        run_stage(results, size, 'merge_incremental', lambda: storage.merge_and_save(monthly))
+
+        df = run_stage(results, size, 'load_transactions', storage.load_transactions)
+        run_stage(results, size, 'spend_summary_cube', lambda: report.spend_summary(None, '2023-10-01', '2023-12-29')[1])
+        run_stage(results, size, 'spend_summary_frame', lambda: report.spend_summary(df, '2023-10-01', '2023-12-29')[1])
+        run_stage(results, size, 'spend_summary_points', lambda: report.spend_summary(None, '2020-01-01', '2024-01-31', max_points=400)[1])
+        run_stage(results, size, 'spend_summary_lttb', lambda: report.spend_summary(None, '2020-01-01', '2024-01-31', max_points=400, method='lttb')[1])
+        run_stage(results, size, 'monthly_spend_by_category', report.monthly_spend_by_category)
+        merchant_query = lambda: report.query(['Merchant', 'weekday'], ['spend', 'count'], granularity='month')
+        run_stage(results, size, 'query_merchant_month', merchant_query)
+        run_stage(results, size, 'query_cached', merchant_query)
+        run_stage(results, size, 'rolling_spend', report.rolling_spend)
+
+        agent = Agent(data_dir=storage.data_dir, filename=storage.filename, backend=backend)
+        run_stage(results, size, 'predict', agent.run_next_month_prediction)
+        run_stage(results, size, 'predict_cached', agent.run_next_month_prediction)
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: list, baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base = {(r['size'], r['stage']): r for r in baseline['results']}
+    print(f"\ncompared to {baseline_path} (commit {baseline['meta'].get('commit')})")
+    for r in current:
+        b = base.get((r['size'], r['stage']))
+        if b is None or 'error' in r or 'error' in b:
+            continue
+        ratio = r['seconds'] / b['seconds'] if b['seconds'] else float('inf')
+        flag = '  REGRESSION' if ratio > 1.2 else ''
+        print(f"  size={r['size']:>9,} {r['stage']:28s} {b['seconds']:9.3f}s -> {r['seconds']:9.3f}s  ({ratio:5.2f}x){flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--backend', default='csv', choices=list(BACKENDS))
+    parser.add_argument('--files', type=int, default=12, help='statements per size (half AMEX, half Discover)')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', help='previous results JSON to compare against')
+    parser.add_argument('--keep', action='store_true', help='keep generated statements and store')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results += run_size(size, args.backend, args.files, args.keep)
+
+    payload = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'backend': args.backend,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f'\nwrote {args.out}')
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Synthetic AMEX (.xlsx) and Discover (.csv) statement generator.
+
+Statements look like real exports: a preamble above the header row, payment
+rows, promo statement credits, refunds, exact duplicate charges and (AMEX)
+hierarchical 'Main-Sub' categories.
+
+Usage:
+    python -m benchmarks.synth --out synth_data --rows 100000 --files 12
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# (description, AMEX category, Discover category)
+MERCHANTS = [
+    ('STARBUCKS STORE 1234 SEATTLE WA', 'Restaurant-Bar & Café', 'Restaurants'),
+    ('CHIPOTLE 0456 AUSTIN TX', 'Restaurant-Restaurant', 'Restaurants'),
+    ('TRADER JOE S #552 QPS', 'Merchandise & Supplies-Groceries', 'Supermarkets'),
+    ('WHOLEFDS MKT 10234', 'Merchandise & Supplies-Groceries', 'Supermarkets'),
+    ('SHELL OIL 57442', 'Transportation-Fuel', 'Gasoline'),
+    ('UBER   TRIP HELP.UBER.COM', 'Transportation-Taxis & Coach', 'Travel/ Entertainment'),
+    ('DELTA AIR LINES ATLANTA', 'Travel-Airline', 'Travel/ Entertainment'),
+    ('MARRIOTT HOTEL BOSTON', 'Travel-Lodging', 'Travel/ Entertainment'),
+    ('AMAZON MKTPL*AB12CD', 'Merchandise & Supplies-Internet Purchase', 'Merchandise'),
+    ('TARGET 00012345', 'Merchandise & Supplies-Department Stores', 'Department Stores'),
+    ('COSTCO WHSE #0012', 'Merchandise & Supplies-Wholesale Stores', 'Warehouse Clubs'),
+    ('NETFLIX.COM', 'Entertainment-Associations', 'Services'),
+    ('STATE DMV RENEWAL', 'Business Services-Government Services', 'Government Services'),
+    ('UNIV TUITION PAYMT PORTAL', 'Business Services-Education', 'Education'),
+]
+PAYMENTS = [
+    ('AUTOPAY PAYMENT - THANK YOU', 'Payments-Payments', 'Payments and Credits'),
+    ('INTERNET PAYMENT - THANK YOU', 'Payments-Payments', 'Payments and Credits'),
+]
+PROMOS = [
+    ('$100 STATEMENT CREDIT W/ 1ST PURCHASE', 'Fees & Adjustments-Fees & Adjustments', 'Awards and Rebate Credits'),
+    ('$50 REFER A FRIEND CREDIT', 'Fees & Adjustments-Fees & Adjustments', 'Awards and Rebate Credits'),
+]
+
+
+def make_statement(n: int, seed: int = 0, start: str = '2020-01-01', days: int = 4 * 365) -> pd.DataFrame:
+    """Raw statement rows: Date, Description, Amount, amex_category, discover_category.
+
+    Mix: ~90% merchant charges (4% of them refunds), ~4% payments, ~1% promo
+    credits and ~5% exact duplicates of earlier rows.
+    """
+    rng = np.random.default_rng(seed)
+    n_dup = int(n * 0.05)
+    n_base = n - n_dup
+
+    kind = rng.random(n_base)
+    table = np.array(MERCHANTS + PAYMENTS + PROMOS, dtype=object)
+    pick = rng.integers(0, len(MERCHANTS), n_base)
+    pick = np.where(kind < 0.04, len(MERCHANTS) + rng.integers(0, len(PAYMENTS), n_base), pick)
+    pick = np.where((kind >= 0.04) & (kind < 0.05), len(MERCHANTS) + len(PAYMENTS) + rng.integers(0, len(PROMOS), n_base), pick)
+
+    amounts = np.round(rng.gamma(2.0, 25.0, n_base) + 1, 2)
+    is_payment = kind < 0.04
+    is_promo = (kind >= 0.04) & (kind < 0.05)
+    is_refund = (~is_payment) & (~is_promo) & (rng.random(n_base) < 0.04)
+    amounts = np.where(is_payment, -np.round(amounts * 20, 2), amounts)
+    amounts = np.where(is_promo | is_refund, -amounts, amounts)
+
+    df = pd.DataFrame({
+        'Date': pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n_base), unit='D'),
+        'Description': table[pick, 0],
+        'Amount': amounts,
+        'amex_category': table[pick, 1],
+        'discover_category': table[pick, 2],
+    })
+
+    # Exact duplicate charges (same merchant, day and amount)
+    dups = df.iloc[rng.integers(0, n_base, n_dup)] if n_base else df.iloc[:0]
+    df = pd.concat([df, dups], ignore_index=True)
+    return df.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+def write_discover_csv(path: str, n: int, seed: int = 0, **kwargs) -> None:
+    df = make_statement(n, seed=seed, **kwargs)
+    out = pd.DataFrame({
+        'Trans. Date': df['Date'].dt.strftime('%m/%d/%Y'),
+        'Post Date': (df['Date'] + pd.Timedelta(days=1)).dt.strftime('%m/%d/%Y'),
+        'Description': df['Description'],
+        'Amount': df['Amount'].map('{:.2f}'.format),
+        'Category': df['discover_category'],
+    })
+    with open(path, 'w', newline='') as f:
+        # Preamble rows padded to the body width so whole-file parsers accept them
+        f.write('Discover Card Statement,,,,\nAccount ending 1234,,,,\n\n')
+        out.to_csv(f, index=False)
+
+
+def write_amex_xlsx(path: str, n: int, seed: int = 0, **kwargs) -> None:
+    """Write an AMEX-style workbook (streamed with openpyxl write-only mode)."""
+    from openpyxl import Workbook
+
+    df = make_statement(n, seed=seed, **kwargs)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Transaction Details')
+    ws.append(['Transaction Details', None, None, None, None])
+    ws.append(['Prepared for', 'JANE DOE', None, None, None])
+    ws.append(['Account Number', 'XXXX-XXXXXX-11005', None, None, None])
+    ws.append([None, None, None, None, None])
+    ws.append(['Date', 'Description', 'Amount', 'Extended Details', 'Category'])
+    for date, desc, amount, cat in zip(
+        df['Date'].dt.strftime('%m/%d/%Y').tolist(),
+        df['Description'].tolist(),
+        df['Amount'].tolist(),
+        df['amex_category'].tolist(),
+    ):
+        ws.append([date, desc, amount, desc.title(), cat])
+    wb.save(path)
+
+
+def generate_statements(out_dir: str, rows: int, files: int = 12, amex_share: float = 0.5, seed: int = 0) -> list[tuple[str, str]]:
+    """Write `files` statements (alternating firms) totalling about `rows` rows.
+
+    Returns [(path, firm)] ready for Agent.add_many.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    n_amex = max(1, round(files * amex_share)) if amex_share > 0 else 0
+    out = []
+    for i in range(files):
+        firm = 'AMEX' if i < n_amex else 'DISCOVER'
+        n = rows // files + (1 if i < rows % files else 0)
+        if firm == 'AMEX':
+            path = os.path.join(out_dir, f'amex_{i:03d}.xlsx')
+            write_amex_xlsx(path, n, seed=seed + i)
+        else:
+            path = os.path.join(out_dir, f'discover_{i:03d}.csv')
+            write_discover_csv(path, n, seed=seed + i)
+        out.append((path, firm))
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--out', default='synth_data')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--files', type=int, default=12)
+    parser.add_argument('--amex-share', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for path, firm in generate_statements(args.out, args.rows, args.files, args.amex_share, args.seed):
+        print(f'{firm:8s} {path}')
+
+
+if __name__ == '__main__':
+    main()
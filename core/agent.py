@@ -1,40 +1,188 @@
+import os
+import threading
+from typing import Sequence
+
 import pandas as pd
 from core.storage import Storage
+from core.parquet_storage import ParquetStorage
+from core.sqlite_storage import SQLiteStorage
 from core.ingestion import Ingestion
 from core.report import FinanceReport
-from core.predict import BudgetPredictor
+from core.cache import LOAD_CACHE
+from core.profiling import PipelineProfiler
+from core.statement_cache import StatementCache
+# core.predict / core.model_store are imported on first use (see Agent.models)
+
+STORAGE_BACKENDS = {
+    'csv': Storage,
+    'parquet': ParquetStorage,
+    'sqlite': SQLiteStorage,
+}
 
 # Execution Layer
 class Agent:
-    def __init__(self, data_dir: str = 'agent_data', filename: str = 'transactions.csv'):
-        self.storage = Storage(data_dir, filename)
-        self.ingestion = Ingestion(self.storage)
+    def __init__(
+        self,
+        data_dir: str = 'agent_data',
+        filename: str = 'transactions.csv',
+        backend: str = 'csv',
+        compact: bool = False,
+        profile: bool = False,
+        profile_log: str | None = None,
+        statement_cache_bytes: int | None = 256 * 2**20,
+    ):
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unsupported storage backend: {backend}. Choose from {list(STORAGE_BACKENDS)}")
+        self.storage = STORAGE_BACKENDS[backend](data_dir, filename)
+        # Per-stage ingest/merge profiling (off by default); profile_log appends JSON lines
+        self.storage.profiler = PipelineProfiler(enabled=profile, jsonl_path=profile_log)
+        # Parsed-statement cache keyed by file content; None disables it
+        self.statement_cache = (
+            StatementCache(os.path.join(data_dir, 'statement_cache'), max_bytes=statement_cache_bytes)
+            if statement_cache_bytes else None
+        )
+        self.ingestion = Ingestion(self.storage, statement_cache=self.statement_cache)
         self.report = FinanceReport(self.storage)
+        # Next-month models persisted next to the store, refit only for changed months
+        self._models = None
+        self.storage.subscribe(_ModelsOnWrite(self))
+        # Opt-in compact in-memory schema for load_transactions (see core.schema)
+        self.compact = compact
 
     # Data Modifying Layer
-    def add_data(self, path: str, firm: str) -> dict:
+    def add_data(self, path: str, firm: str, chunksize: int | None = None) -> dict:
         print("Data is added into the storage")
-        return self.ingestion.add_data(path,firm)
+        return self.ingestion.add_data(path, firm, chunksize=chunksize)
     
+    def add_many(self, paths_and_firms: list[tuple[str, str]], workers: int | None = None) -> dict:
+        """Bulk ingest [(path, firm), ...]: parallel parse, one storage merge."""
+        return self.ingestion.add_many(paths_and_firms, workers=workers)
+
     def load_transactions(self) -> pd.DataFrame:
-        return self.storage.load_transactions()
+        """Full history, served from the process-wide cache until the data changes (a private copy)."""
+        return LOAD_CACHE.load(self.storage, compact=self.compact)
+
+    def data_version(self) -> str:
+        return self.storage.data_version()
+
+    def summary(self, recent_days: int | None = 30) -> dict:
+        """Row count, date range and amount totals (overall and per source) without loading the table.
+
+        With recent_days, summary['recent'] holds the totals of the last
+        `recent_days` days (from the spend cube).
+        """
+        summary = self.storage.summary()
+        if recent_days:
+            start = pd.Timestamp.today().normalize() - pd.Timedelta(days=recent_days)
+            summary['recent'] = dict(self.report.totals(start, None), days=recent_days)
+        return summary
+
+    def load_cache_stats(self) -> dict:
+        return LOAD_CACHE.stats()
+
+    def query_cache_stats(self) -> dict:
+        return self.report.query_cache.stats()
+
+    def set_profiling(self, enabled: bool, profile_log: str | None = None) -> None:
+        profiler = self.storage.profiler
+        profiler.enabled = enabled
+        profiler.jsonl_path = profile_log
+        profiler.reset()
     
     # Reporting Layer
-    def flex_spend_report(self, start, end, fill_missing_days: bool = True):
-        df = self.load_transactions()
-        return self.report.spend_summary(df, start, end, fill_missing_days=fill_missing_days)
+    def flex_spend_report(self, start, end, fill_missing_days: bool = True, max_points: int | None = None, method: str = 'bucket'):
+        # df=None lets the report read only the requested window from storage
+        return self.report.spend_summary(
+            None, start, end, fill_missing_days=fill_missing_days, max_points=max_points, method=method
+        )
+
+    def breakdown_report(
+        self,
+        dimensions: Sequence[str],
+        measures: Sequence[str] = ('spend',),
+        filters: dict | None = None,
+        start=None,
+        end=None,
+        granularity: str | None = None,
+    ) -> pd.DataFrame:
+        """Measures grouped by dimensions (and a time bucket); see FinanceReport.query."""
+        return self.report.query(dimensions, measures, filters=filters, date_range=(start, end), granularity=granularity)
+
+    def rolling_spend_report(self, start=None, end=None, windows: Sequence[int] = (7, 30, 90, 365), by: Sequence[str] = ()) -> pd.DataFrame:
+        """Trailing-window spend per day (and group) in [start, end]; see FinanceReport.rolling_spend."""
+        return self.report.rolling_spend(windows=windows, by=by, start=start, end=end)
     
     # Prediction Layer
-    def run_next_month_prediction(self):
-        
-        df = self.load_transactions()
+    @property
+    def models(self):
+        """The store's ModelStore; built (and core.predict imported) on first use."""
+        if self._models is None:
+            from core.model_store import ModelStore
+            self._models = ModelStore(self.storage)
+        return self._models
+
+    def run_next_month_prediction(self) -> pd.DataFrame:
+        """Next-month spend per category; cached until the data changes (see ModelStore)."""
+        return self.models.predict()
+
+    def run_prediction_backtest(self, by: str | list[str] = 'Category', workers: int | None = None, **grid) -> pd.DataFrame:
+        """Walk-forward MAE/MAPE per key over a feature set x alpha grid (see BudgetPredictor.backtest)."""
+        from core.predict import BudgetPredictor
 
         p = BudgetPredictor()
-        panel = p.build_monthly_panel(df)
-        panel_with_feature = p.make_features(panel)
-        
-        p.fit_ridge(panel_with_feature, feature = ['lag_1', 'roll3_mean'], alpha = 1.0, val_months = 3)
+        panel = p.build_monthly_panel(self.load_transactions(), by=by)
+        return p.backtest(panel, workers=workers, **grid)
+
+
+class _ModelsOnWrite:
+    """Storage listener standing in for an Agent's ModelStore until it is built.
+
+    If the store has persisted models, the first write builds the ModelStore
+    and hands it the event, so the models stay incremental (as if they had
+    been listening all along). Otherwise writes cost nothing and the models
+    are built from storage on first use.
+    """
+
+    def __init__(self, agent: 'Agent'):
+        self.agent = agent
+        storage = agent.storage
+        # Same path as ModelStore.meta_path
+        self.meta_path = os.path.join(storage.data_dir, os.path.splitext(storage.filename)[0] + '.model.json')
+
+    def _take_over(self):
+        """Build the ModelStore if persisted models must follow this write; return it if built now."""
+        if self.agent._models is not None or not os.path.exists(self.meta_path):
+            return None
+        return self.agent.models
+
+    def on_insert(self, rows, fp_before, fp_after) -> None:
+        models = self._take_over()
+        if models is not None:
+            models.on_insert(rows, fp_before, fp_after)
+
+    def on_rewrite(self, df, fp_after) -> None:
+        models = self._take_over()
+        if models is not None:
+            models.on_rewrite(df, fp_after)
+
+
+# ------------------------------
+# one Agent per process
+# ------------------------------
+_SHARED_AGENTS = {}
+_SHARED_LOCK = threading.Lock()
+
 
-        pred = p.predict_next_month(panel_with_feature)
+def shared_agent(data_dir: str = 'agent_data', filename: str = 'transactions.csv', backend: str = 'csv') -> Agent:
+    """The process-wide Agent for a store, built on first use.
 
-        return pred
\ No newline at end of file
+    Streamlit pages (and sessions) call this instead of constructing an
+    Agent, so the spend cube, summary record, models and load cache are
+    set up once per process and shared.
+    """
+    key = (os.path.abspath(data_dir), filename, backend)
+    with _SHARED_LOCK:
+        agent = _SHARED_AGENTS.get(key)
+        if agent is None:
+            agent = _SHARED_AGENTS[key] = Agent(data_dir=data_dir, filename=filename, backend=backend)
+        return agent
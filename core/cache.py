@@ -0,0 +1,162 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from core.storage import Storage
+
+# pandas >= 3 always copies on write: a shallow copy is then a private frame
+# whose columns are only copied once the caller writes to them
+_COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3 or pd.get_option('mode.copy_on_write') is True
+
+
+def _private(df: pd.DataFrame) -> pd.DataFrame:
+    """A copy of df the caller may mutate without touching the cached frame."""
+    return df.copy(deep=not _COPY_ON_WRITE)
+
+
+class LoadCache:
+    """Process-wide cache of full transaction loads, keyed by storage location.
+
+    An entry is reused while storage.data_version() is unchanged, so repeated
+    Streamlit reruns return the same frame without touching the data files.
+    Writes through a Storage instance evict its entry immediately; writes
+    from elsewhere are caught by the version check.
+
+    Every call returns its own copy of the cached frame (cheap under
+    copy-on-write), so callers may mutate it freely.
+    """
+
+    def __init__(self, max_entries: int = 8):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (version, df)
+        self._lock = threading.Lock()
+        self._subscribed = weakref.WeakSet()
+
+    @staticmethod
+    def _key(storage: Storage) -> tuple:
+        return (type(storage).__name__, os.path.abspath(storage.data_dir), storage.filename)
+
+    def load(self, storage: Storage, compact: bool = False) -> pd.DataFrame:
+        key = self._key(storage) + (compact,)
+        version = storage.data_version()
+
+        with self._lock:
+            if storage not in self._subscribed:
+                storage.subscribe(_Evictor(self, self._key(storage)))
+                self._subscribed.add(storage)
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return _private(entry[1])
+            self.misses += 1
+
+        df = storage.load_compact() if compact else storage.load_transactions()
+
+        with self._lock:
+            self._entries[key] = (version, df)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return _private(df)
+
+    def invalidate(self, storage: Storage | None = None) -> None:
+        with self._lock:
+            if storage is None:
+                self._entries.clear()
+            else:
+                self._evict_locked(self._key(storage))
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+            }
+
+    def _evict(self, key: tuple) -> None:
+        with self._lock:
+            self._evict_locked(key)
+
+    def _evict_locked(self, key: tuple) -> None:
+        # Drop both the canonical and the compact entry for this storage
+        for compact in (False, True):
+            self._entries.pop(key + (compact,), None)
+
+
+class _Evictor:
+    """Storage listener that drops one LoadCache entry on every write."""
+
+    def __init__(self, cache: LoadCache, key: tuple):
+        self.cache = cache
+        self.key = key
+
+    def on_insert(self, rows, fp_before, fp_after) -> None:
+        self.cache._evict(self.key)
+
+    def on_rewrite(self, df, fp_after) -> None:
+        self.cache._evict(self.key)
+
+
+class QueryCache:
+    """Bounded LRU of report query results.
+
+    Keys are built by the caller and must include storage.data_version(),
+    so an entry can never be served after the store changed; stale entries
+    simply age out. Frames are copied on the way in and out, so neither the
+    caller that stored a result nor later readers can change the entry.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> result
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple):
+        """Cached result for key, or None (counted as a miss)."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+        return _private(value) if isinstance(value, pd.DataFrame) else value
+
+    def put(self, key: tuple, value) -> None:
+        if isinstance(value, pd.DataFrame):
+            value = _private(value)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+            }
+
+
+# Shared by every Agent/page in the process
+LOAD_CACHE = LoadCache()
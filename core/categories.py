@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------
+# AMEX -> Discover-style category rules
+# ------------------------------
+# Ordered rule table, first match wins. Each rule is
+#   (target, main_terms, sub_terms)
+# and matches when the lowercased main category contains any of `main_terms`
+# AND the lowercased sub category contains any of `sub_terms`. An empty term
+# tuple means "don't care". A target of None marks a non-spend row (dropped).
+AMEX_CATEGORY_RULES = [
+    # --- Non-spend / bookkeeping rows ---
+    # NOTE: "awards/rebate" credits are still labeled explicitly.
+    ('Awards and Rebate Credits', ('award', 'rebate'), ()),
+    (None, ('payment', 'payments'), ()),
+    (None, ('credit', 'credits'), ()),
+    (None, ('fees & adjustments',), ()),
+
+    # --- Spend category mapping (Discover-style) ---
+    ('Restaurants', ('restaurant', 'dining'), ()),
+    ('Supermarkets', ('merchandise & supplies',), ('grocer', 'supermarket', 'grocery')),
+    ('Supermarkets', ('supermarket', 'grocery'), ()),
+    ('Gasoline', ('transportation',), ('fuel',)),
+    ('Gasoline', ('gas', 'gasoline'), ()),
+    ('Travel/ Entertainment', ('travel', 'entertainment'), ()),
+    ('Travel/ Entertainment', (), ('lodging', 'air', 'hotel')),
+    ('Education', ('education',), ()),
+    ('Education', (), ('school', 'tuition')),
+    ('Government Services', ('government',), ()),
+    ('Government Services', (), ('tax', 'dmv')),
+    ('Interest', ('interest',), ()),
+    ('Department Stores', ('department',), ()),
+    ('Department Stores', (), ('department store',)),
+    ('Warehouse Clubs', ('warehouse',), ()),
+    ('Warehouse Clubs', (), ('warehouse club',)),
+    ('Merchandise', ('merchandise & supplies',), ()),
+]
+
+AMEX_DEFAULT_CATEGORY = 'Unknown Source'
+
+
+class CategoryMapper:
+    """Compiled (main, sub) -> category rule table.
+
+    Rules are evaluated once per distinct (main, sub) pair and the result is
+    broadcast back to every row, so mapping cost is O(unique pairs).
+    """
+
+    def __init__(self, rules: list, default: str | None = AMEX_DEFAULT_CATEGORY):
+        self.default = default
+        self.rules = [
+            (target, tuple(t.lower() for t in main_terms), tuple(t.lower() for t in sub_terms))
+            for target, main_terms, sub_terms in rules
+        ]
+
+    def map_pair(self, main, sub) -> str | None:
+        main = str(main).strip().lower()
+        sub = str(sub).strip().lower()
+
+        for target, main_terms, sub_terms in self.rules:
+            if main_terms and not any(t in main for t in main_terms):
+                continue
+            if sub_terms and not any(t in sub for t in sub_terms):
+                continue
+            return target
+
+        return self.default
+
+    def map_series(self, main: pd.Series, sub: pd.Series) -> pd.Series:
+        """Map aligned main/sub category columns to flat categories (None = drop)."""
+        main_codes, main_uniques = pd.factorize(main, use_na_sentinel=False)
+        sub_codes, sub_uniques = pd.factorize(sub, use_na_sentinel=False)
+
+        # One code per distinct (main, sub) pair
+        n_sub = max(len(sub_uniques), 1)
+        pair_codes, pair_uniques = pd.factorize(main_codes.astype(np.int64) * n_sub + sub_codes)
+        mapped = np.array(
+            [self.map_pair(main_uniques[p // n_sub], sub_uniques[p % n_sub]) for p in pair_uniques],
+            dtype=object,
+        )
+
+        return pd.Series(mapped[pair_codes], index=main.index, dtype=object)
+
+
+AMEX_CATEGORY_MAPPER = CategoryMapper(AMEX_CATEGORY_RULES)
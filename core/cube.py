@@ -0,0 +1,247 @@
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.schema import to_canonical
+from core.storage import Storage
+
+
+class SpendCube:
+    """Materialized day x Category x Source aggregate of the transaction store.
+
+    Columns:
+      ['day', 'Category', 'Source', 'spend', 'refunds', 'count']
+
+      - spend   = sum of positive Amount
+      - refunds = sum of |negative Amount|
+      - count   = number of rows with a valid Amount
+
+    Rows without a valid Date are not in the cube. A missing Category or
+    Source is kept as NaN so reports can decide how to label it.
+
+    Persisted next to the store as <name>.cube.csv plus delta files in
+    <name>.cube.d/, with a <name>.cube.json sidecar recording the storage
+    fingerprint they match. The cube follows storage writes through
+    Storage.subscribe: a merge re-collapses only the days its rows touch
+    and persists them as a new delta file; full rewrites (compact(),
+    save_transactions) rebuild the cube from the rewritten frame and fold
+    the deltas into <name>.cube.csv, as does a merge once max_deltas have
+    piled up. If the store changed behind its back (another process,
+    manual edit), the next query rebuilds it from storage.
+    """
+
+    dims = ['day', 'Category', 'Source']
+    measures = ['spend', 'refunds', 'count']
+
+    # Delta files kept before a merge folds them into the base file
+    max_deltas = 64
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        stem = os.path.join(storage.data_dir, os.path.splitext(storage.filename)[0])
+        self.cube_path = stem + '.cube.csv'
+        self.delta_dir = stem + '.cube.d'
+        self.meta_path = stem + '.cube.json'
+
+        self._cube = None
+        self._fingerprint = None
+        storage.subscribe(self)
+
+    # ------------------------------
+    # build / persist
+    # ------------------------------
+    @classmethod
+    def aggregate(cls, df: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate canonical transactions into cube rows."""
+        if df.empty:
+            return cls._empty()
+
+        df = to_canonical(df)
+        date = pd.to_datetime(df['Date'], errors='coerce')
+        amount = pd.to_numeric(df['Amount'], errors='coerce')
+        rows = pd.DataFrame({
+            'day': date.dt.floor('D'),
+            'Category': df['Category'].astype(object),
+            'Source': df['Source'].astype(object),
+            'spend': amount.clip(lower=0).fillna(0.0),
+            'refunds': (-amount).clip(lower=0).fillna(0.0),
+            'count': amount.notna().astype(np.int64),
+        })
+        rows = rows[rows['day'].notna()]
+        return cls._collapse(rows)
+
+    @classmethod
+    def _collapse(cls, rows: pd.DataFrame) -> pd.DataFrame:
+        if rows.empty:
+            return cls._empty()
+        cube = (
+            rows.groupby(cls.dims, as_index=False, dropna=False, sort=True)[cls.measures]
+                .sum()
+        )
+        cube['count'] = cube['count'].astype(np.int64)
+        return cube.reset_index(drop=True)
+
+    @classmethod
+    def _empty(cls) -> pd.DataFrame:
+        return pd.DataFrame({
+            'day': pd.Series(dtype='datetime64[ns]'),
+            'Category': pd.Series(dtype=object),
+            'Source': pd.Series(dtype=object),
+            'spend': pd.Series(dtype='float64'),
+            'refunds': pd.Series(dtype='float64'),
+            'count': pd.Series(dtype='int64'),
+        })
+
+    @classmethod
+    def _merge_days(cls, cube: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """cube + delta (both collapsed), re-collapsing only the days delta touches."""
+        if delta.empty:
+            return cube
+        if cube.empty:
+            return delta.reset_index(drop=True)
+        # Days before the delta's first day are untouched and stay as they are
+        lo = np.searchsorted(cube['day'].to_numpy(), delta['day'].min().to_datetime64(), side='left')
+        tail = cube.iloc[lo:]
+        touched = tail['day'].isin(delta['day'].unique()).to_numpy()
+        merged = cls._collapse(pd.concat([tail[touched], delta], ignore_index=True))
+        # Each day comes whole from one side, so a stable sort on day keeps the dims order
+        tail = pd.concat([tail[~touched], merged], ignore_index=True).sort_values('day', kind='stable')
+        return pd.concat([cube.iloc[:lo], tail], ignore_index=True)
+
+    @staticmethod
+    def _stat(path: str) -> list:
+        st = os.stat(path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def _write_meta(self, meta: dict) -> None:
+        tmp_path = f'{self.meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_meta(self) -> dict | None:
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        meta.setdefault('deltas', [])
+        return meta
+
+    def _save(self, cube: pd.DataFrame, fingerprint: list) -> None:
+        self._cube = cube
+        self._fingerprint = fingerprint
+        with self.storage._pinned(fingerprint) as current:
+            if not current:
+                # The store moved on (or is being written) since this was built: memory only
+                return
+            self._write_base(cube, fingerprint)
+
+    def _write_base(self, cube: pd.DataFrame, fingerprint: list) -> None:
+        """Replace the persisted cube by `cube` (caller holds the lock), dropping deltas."""
+        tmp_path = f'{self.cube_path}.{os.getpid()}.tmp'
+        cube.to_csv(tmp_path, index=False, date_format='%Y-%m-%d')
+        os.replace(tmp_path, self.cube_path)
+
+        # The sidecar names the cube files it describes (readers check them)
+        self._write_meta({'fingerprint': fingerprint, 'file': self._stat(self.cube_path), 'deltas': []})
+        if os.path.isdir(self.delta_dir):
+            for name in os.listdir(self.delta_dir):
+                os.remove(os.path.join(self.delta_dir, name))
+
+    def _save_delta(self, cube: pd.DataFrame, delta: pd.DataFrame, fp_before: list, fp_after: list) -> None:
+        """Persist a merge: append `delta` if the files are at fp_before, else write `cube` whole."""
+        self._cube = cube
+        self._fingerprint = fp_after
+        with self.storage._pinned(fp_after) as current:
+            if not current:
+                return
+            meta = self._read_meta()
+            if meta is None or meta['fingerprint'] != fp_before or len(meta['deltas']) >= self.max_deltas:
+                self._write_base(cube, fp_after)
+                return
+            if not delta.empty:
+                os.makedirs(self.delta_dir, exist_ok=True)
+                name = f'{len(meta["deltas"]):06d}-{time.time_ns()}-{os.getpid()}.csv'
+                path = os.path.join(self.delta_dir, name)
+                delta.to_csv(path + '.tmp', index=False, date_format='%Y-%m-%d')
+                os.replace(path + '.tmp', path)
+                meta['deltas'].append([name, *self._stat(path)])
+            meta['fingerprint'] = fp_after
+            self._write_meta(meta)
+
+    def _read_checked(self, path: str, stat: list) -> pd.DataFrame | None:
+        with open(path, 'rb') as f:
+            st = os.fstat(f.fileno())
+            if [st.st_size, st.st_mtime_ns] != stat:
+                # Replaced after the sidecar was read
+                return None
+            return pd.read_csv(f, parse_dates=['day'], dtype={'Category': object, 'Source': object})
+
+    def _load_persisted(self) -> tuple[pd.DataFrame | None, list | None]:
+        meta = self._read_meta()
+        if meta is None:
+            return None, None
+        try:
+            cube = self._read_checked(self.cube_path, meta['file'])
+            deltas = [self._read_checked(os.path.join(self.delta_dir, name), stat) for name, *stat in meta['deltas']]
+        except (OSError, ValueError, KeyError):
+            return None, None
+        if cube is None or any(d is None for d in deltas):
+            return None, None
+        if deltas:
+            cube = self._merge_days(cube, self._collapse(pd.concat(deltas, ignore_index=True)))
+        return cube, meta['fingerprint']
+
+    def rebuild(self) -> pd.DataFrame:
+        fingerprint = self.storage._fingerprint()
+        df = self.storage.load_transactions(columns=['Date', 'Amount', 'Category', 'Source'])
+        cube = self.aggregate(df)
+        self._save(cube, fingerprint)
+        return cube
+
+    def frame(self) -> pd.DataFrame:
+        """Current cube (sorted by day), rebuilt if the store changed."""
+        current = self.storage._fingerprint()
+        if self._cube is not None and self._fingerprint == current:
+            return self._cube
+
+        cube, fingerprint = self._load_persisted()
+        if cube is not None and fingerprint == current:
+            self._cube, self._fingerprint = cube, fingerprint
+            return cube
+
+        return self.rebuild()
+
+    # ------------------------------
+    # storage listener
+    # ------------------------------
+    def on_insert(self, rows: pd.DataFrame, fp_before: list, fp_after: list) -> None:
+        if self._cube is None or self._fingerprint != fp_before:
+            cube, fingerprint = self._load_persisted()
+            if cube is None or fingerprint != fp_before:
+                # Out of sync before this write; next query rebuilds from storage
+                self._cube = self._fingerprint = None
+                return
+        else:
+            cube = self._cube
+
+        delta = self.aggregate(rows)
+        self._save_delta(self._merge_days(cube, delta), delta, fp_before, fp_after)
+
+    def on_rewrite(self, df: pd.DataFrame, fp_after: list) -> None:
+        self._save(self.aggregate(df), fp_after)
+
+    # ------------------------------
+    # queries
+    # ------------------------------
+    def window(self, start=None, end=None) -> pd.DataFrame:
+        """Cube rows with day in [start, end] inclusive (binary search on day)."""
+        cube = self.frame()
+        days = cube['day'].to_numpy()
+        lo = 0 if start is None else np.searchsorted(days, pd.to_datetime(start).floor('D').to_datetime64(), side='left')
+        hi = len(cube) if end is None else np.searchsorted(days, pd.to_datetime(end).floor('D').to_datetime64(), side='right')
+        return cube.iloc[lo:hi]
@@ -0,0 +1,112 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+
+# ------------------------------
+# Description patterns
+# ------------------------------
+# Payment rows are dropped at ingest (they are not spending). The AMEX and
+# Discover loaders historically use slightly different alternations; both
+# are kept so results do not change.
+AMEX_PAYMENT_PATTERN = r"\b(autopay|payment|mobile\s+payment|online\s+payment|directpay|bill\s+pay|thank\s+you)\b"
+DISCOVER_PAYMENT_PATTERN = r"\b(autopay|payment|online\s+payment|directpay|bill\s+pay|thank\s+you)\b"
+# Promo statement credits, e.g. "$100 STATEMENT CREDIT ...", "$100 REFER A FRIEND CREDIT"
+PROMO_CREDIT_PATTERN = r"\b(statement\s+credit|refer\s+a\s+friend\s+credit)\b"
+
+# Card-processor prefixes in front of the merchant name ("SQ *BLUE BOTTLE")
+_PROCESSOR_PREFIX = re.compile(r"^(?:SQ|TST|PAYPAL|PP|SP|DD|IC)\s*\*\s*")
+# Everything from the first store number / reference onwards: '#552', '*AB12CD', '0456 AUSTIN TX'
+_MERCHANT_TAIL = re.compile(r"\s*(?:[#*].*|\b\S*\d{3,}\S*\b.*)$")
+
+
+def normalize_merchant(desc: str) -> str:
+    """'STARBUCKS STORE 1234 SEATTLE WA' -> 'STARBUCKS STORE', 'AMAZON MKTPL*AB12CD' -> 'AMAZON MKTPL'."""
+    s = re.sub(r"\s+", " ", desc.strip().upper())
+    s = _PROCESSOR_PREFIX.sub('', s)
+    merchant = _MERCHANT_TAIL.sub('', s).strip(' -.,/')
+    return merchant or s
+
+
+class DescriptionClassifier:
+    """Everything derived from a transaction description, once per distinct string.
+
+    For a description value `v` (any scalar; NaN gives the neutral result):
+      - amex_payment / discover_payment / promo: the loaders' regex filters
+        (case-insensitive search over str(v))
+      - key: normalized text used in tx_id ("  Foo   BAR " -> "foo bar")
+      - merchant: normalize_merchant(str(v))
+
+    Series are factorized (categoricals reuse their codes) so each distinct
+    value is classified once per call, and classifications are memoized
+    across calls in a bounded LRU cache of `max_entries` strings.
+    """
+
+    fields = ['amex_payment', 'discover_payment', 'promo', 'key', 'merchant']
+    # Result for a missing description
+    na_result = (False, False, False, '', None)
+
+    def __init__(self, max_entries: int = 200_000):
+        self.max_entries = max_entries
+        self._amex_payment = re.compile(AMEX_PAYMENT_PATTERN, re.IGNORECASE)
+        self._discover_payment = re.compile(DISCOVER_PAYMENT_PATTERN, re.IGNORECASE)
+        self._promo = re.compile(PROMO_CREDIT_PATTERN, re.IGNORECASE)
+        self._classify_cached = lru_cache(maxsize=max_entries, typed=True)(self._classify)
+
+    def _classify(self, value) -> tuple:
+        s = str(value)
+        return (
+            self._amex_payment.search(s) is not None,
+            self._discover_payment.search(s) is not None,
+            self._promo.search(s) is not None,
+            re.sub(r"\s+", " ", s.strip().lower()),
+            normalize_merchant(s),
+        )
+
+    def classify(self, value) -> dict:
+        if pd.isna(value):
+            return dict(zip(self.fields, self.na_result))
+        return dict(zip(self.fields, self._classify_cached(value)))
+
+    def encode(self, values: pd.Series) -> pd.Series:
+        """Dictionary-encode descriptions (categorical); filters keep the codes."""
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            return values
+        return values.astype('category')
+
+    def lookup(self, values: pd.Series, field: str) -> np.ndarray:
+        """Per-row `field` for a Series of descriptions."""
+        if field not in self.fields:
+            raise ValueError(f"Unknown field: {field}. Choose from {self.fields}")
+        i = self.fields.index(field)
+
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = values.cat.codes.to_numpy()
+            uniques = values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+
+        # Last slot holds the NaN result, picked by code -1
+        per_unique = [self._classify_cached(v)[i] for v in uniques] + [self.na_result[i]]
+        dtype = bool if isinstance(self.na_result[i], bool) else object
+        return np.array(per_unique, dtype=dtype)[codes]
+
+    def cache_info(self) -> dict:
+        info = self._classify_cached.cache_info()
+        total = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'hit_rate': info.hits / total if total else 0.0,
+            'entries': info.currsize,
+            'max_entries': info.maxsize,
+        }
+
+    def cache_clear(self) -> None:
+        self._classify_cached.cache_clear()
+
+
+# Shared by every ingest in the process (memo survives across statements)
+DESCRIPTIONS = DescriptionClassifier()
@@ -1,60 +1,134 @@
 from core.storage import Storage
+from core.categories import AMEX_CATEGORY_MAPPER
+from core.descriptions import DESCRIPTIONS
+from core.statement_cache import StatementCache
+import csv
 import re
 import os
 import pandas as pd
+import numpy as np
 import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+def _parse_statement(path: str, firm: str, data_dir: str, cache_args: tuple | None = None) -> tuple[pd.DataFrame, bool | None]:
+    """Process-pool entry point: parse one statement into canonical rows."""
+    cache = StatementCache(*cache_args) if cache_args else None
+    return Ingestion(Storage(data_dir), statement_cache=cache).ingest_cached(path, firm)
 
 
 class Ingestion:
-    def __init__(self, storage: Storage):
+    # Normalized first-column values that mark the Discover header row
+    discover_date_headers = {'transdate', 'transactiondate', 'transactdate'}
+    # AMEX sheet columns used by the loader
+    amex_columns = ['Date', 'Description', 'Amount', 'Category']
+
+    def __init__(self, storage: Storage, statement_cache: StatementCache | None = None):
         self.storage = storage
         self.canonical_cols = self.storage.canonical_cols
+        # Optional content-hash cache of parsed statements (skips re-parsing re-uploads)
+        self.statement_cache = statement_cache
+
+    @property
+    def profiler(self):
+        # One profiler per storage, so ingest and merge stages land in the same report
+        return self.storage.profiler
 
     # ------------------------------
     # tx_id assignment
     # ------------------------------
-    def assign_tx_id(self, df: pd.DataFrame) -> pd.DataFrame:
+    def assign_tx_id(self, df: pd.DataFrame, dup_offsets: dict | None = None) -> pd.DataFrame:
+        """
+        Assign a deterministic tx_id to every row.
+
+        tx_id = sha1("SOURCE|YYYY-MM-DD|amount(.2f)|normalized description|dup_rank"),
+        where dup_rank disambiguates identical rows within the same frame.
+        When a file is processed in chunks, pass the same `dup_offsets` dict
+        to every call: it carries per-key counts forward so ranks continue
+        across chunk boundaries exactly as in a single pass.
+        Keys are built column-wise: each field is formatted once per distinct
+        value and broadcast back with the factorize codes.
+        """
         df = df.copy()
-        def make_base_key(row) -> str:
-            dt = pd.to_datetime(row['Date'], errors = 'coerce')
-            date_s = dt.strftime('%Y-%m-%d') if pd.notna(dt) else ''
-
-            amt = pd.to_numeric(row['Amount'], errors = 'coerce')
-            amt_s = f'{float(amt):.2f}' if pd.notna(amt) else ''
-
-            desc_val = row.get('Description', '')
-            if pd.isna(desc_val):
-                desc_val = ''
-            desc = str(desc_val).strip().lower()
-            desc = re.sub(r"\s+", " ", desc)
-
-            source_val = row.get('Source', '')
-            if pd.isna(source_val):
-                source_val = ''
-            source = str(source_val).strip().upper()
-
-            key = f"{source}|{date_s}|{amt_s}|{desc}"
-            return key
-        
+
+        def format_unique(values: pd.Series, fmt) -> np.ndarray:
+            # Format each distinct value once, then broadcast back by code
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            formatted = np.array([fmt(v) for v in uniques], dtype=object)
+            return formatted[codes]
+
+        def date_keys(col: pd.Series) -> np.ndarray:
+            if pd.api.types.is_datetime64_any_dtype(col):
+                dt = col
+            else:
+                # Parse element-wise (same as the old per-row path), once per distinct value
+                dt = pd.Series(format_unique(col, lambda v: pd.to_datetime(v, errors='coerce')), index=col.index)
+            return format_unique(dt, lambda d: d.strftime('%Y-%m-%d') if pd.notna(d) else '')
+
+        def amount_keys(col: pd.Series) -> np.ndarray:
+            if pd.api.types.is_float_dtype(col):
+                # Factorize on the bit pattern so -0.0 keeps its own '-0.00' key
+                codes, uniques = pd.factorize(col.to_numpy(dtype='float64').view('int64'))
+                amounts = uniques.view('float64').tolist()
+                formatted = np.array([f'{a:.2f}' if a == a else '' for a in amounts], dtype=object)
+                return formatted[codes]
+
+            def fmt(v):
+                amt = pd.to_numeric(v, errors='coerce')
+                return f'{float(amt):.2f}' if pd.notna(amt) else ''
+            # Object columns: -0.0 == 0.0, so factorize on the text form to keep them
+            # apart, and format one original value per distinct text
+            codes, _ = pd.factorize(col.astype(str), use_na_sentinel=False)
+            _, first = np.unique(codes, return_index=True)
+            formatted = np.array([fmt(v) for v in col.to_numpy()[first]], dtype=object)
+            return formatted[codes]
+
+        def text_keys(df: pd.DataFrame, col: str, norm) -> np.ndarray:
+            if col not in df.columns:
+                return np.full(len(df), '', dtype=object)
+            return format_unique(df[col], lambda v: '' if pd.isna(v) else norm(str(v)))
+
+        def make_base_keys(df: pd.DataFrame) -> np.ndarray:
+            source = text_keys(df, 'Source', lambda s: s.strip().upper())
+            date_s = date_keys(df['Date'])
+            amt_s = amount_keys(df['Amount'])
+            # Memoized per distinct description (core.descriptions)
+            desc = (
+                DESCRIPTIONS.lookup(df['Description'], 'key') if 'Description' in df.columns
+                else np.full(len(df), '', dtype=object)
+            )
+
+            sep = np.array('|', dtype=object)
+            return source + sep + date_s + sep + amt_s + sep + desc
+
         def assign_dup_rank(df: pd.DataFrame) -> pd.DataFrame:
             df = df.copy()
-            df['_base_key'] = df.apply(make_base_key, axis=1)
+            df['_base_key'] = make_base_keys(df)
             df = df.sort_values(['_base_key'], kind='mergesort').reset_index(drop=True)
             df['_dup_rank'] = df.groupby('_base_key').cumcount()
+            if dup_offsets is not None:
+                # dict lookups stay O(chunk); Series.map(dict) would rebuild the whole dict each call
+                keys = df['_base_key'].tolist()
+                offsets = [dup_offsets.get(k, 0) for k in keys]
+                df['_dup_rank'] += np.asarray(offsets, dtype=np.int64)
+                dup_offsets.update(zip(keys, (df['_dup_rank'] + 1).tolist()))
             return df
-        
+
         def encode_tx_id(df: pd.DataFrame) -> pd.DataFrame:
             df = df.copy()
-            df['tx_id'] = (df['_base_key'] + '|' +df['_dup_rank'].astype(str)
-                        ).apply(lambda s: hashlib.sha1(s.encode('utf-8')).hexdigest())
-            df = df.drop(columns = ['_base_key', '_dup_rank'])
+            sha1 = hashlib.sha1
+            df['tx_id'] = [
+                sha1(f'{key}|{rank}'.encode('utf-8')).hexdigest()
+                for key, rank in zip(df['_base_key'].tolist(), df['_dup_rank'].tolist())
+            ]
+            df = df.drop(columns=['_base_key', '_dup_rank'])
             return df
-        
+
         df = assign_dup_rank(df)
         df = encode_tx_id(df)
-        
+
         return df
-    
+
     def ingest_dates(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Derive Day/Month/Year from Date as part of the canonical schema.
@@ -67,118 +141,258 @@ class Ingestion:
         return df
 
 
-    def ingest(self, path: str, firm: str) -> pd.DataFrame:
-        firm = firm.strip().upper()
-
-        # AMEX loader
-        def load_amex_xlsx(xlsx_path: str) -> pd.DataFrame:
-            # Data Loading
-            raw = pd.read_excel(xlsx_path, header=None)
-
-            # --- Detect header row (first column == 'date') ---
-            header_candidates = raw.index[
-                raw.iloc[:, 0].astype(str).str.strip().str.lower().eq('date')
-            ].tolist()
+    # ------------------------------
+    # Discover normalize stage
+    # ------------------------------
+    def normalize_discover(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Map raw Discover columns (as found under the header row) to
+        Date/Description/Amount/Category/Source and drop non-spend rows.
+        Shared by the whole-file loader and the chunked stream.
+        """
+        # Normalize column names (strip) and build a normalized lookup
+        df.columns = [str(c).strip() for c in df.columns]
+        col_norm_map = {
+            str(c).strip(): re.sub(r"[^a-z0-9]+", "", str(c).strip().lower())
+            for c in df.columns
+        }
+
+        def _pick(norm_targets):
+            for orig, norm in col_norm_map.items():
+                if norm in norm_targets:
+                    return orig
+            return None
+
+        # Discover exports commonly include: Trans. Date, Post Date, Description, Amount, Category
+        date_col = _pick(self.discover_date_headers)
+        desc_col = _pick({'description'})
+        amt_col = _pick({'amount'})
+        cat_col = _pick({'category'})
+
+        missing = [name for name, col in [("Date", date_col), ("Description", desc_col), ("Amount", amt_col), ("Category", cat_col)] if col is None]
+        if missing:
+            raise ValueError(
+                f"Discover CSV missing required columns: {missing}. Available columns: {list(df.columns)}"
+            )
 
-            if not header_candidates:
-                raise ValueError(
-                    "Could not find AMEX header row."
-                )
+        profiler = self.profiler
 
-            header_id = header_candidates[0]
-            col = raw.loc[header_id, :].tolist()
-            df = raw.loc[header_id + 1:, :].copy()
-            df.columns = col
+        # --- Select and rename columns to canonical names ---
+        with profiler.span('normalize_types', rows_in=len(df)) as span:
+            df = df[[date_col, desc_col, amt_col, cat_col]].copy()
+            df.columns = ['Date', 'Description', 'Amount', 'Category']
 
-            # Make sure date and amount are in correct types
+            # --- Type normalization ---
             df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
             df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+            span.rows_out = len(df)
 
-            # --- Remove non-spend rows (payments/autopay) ---
-            # We keep statement credits/refunds as negative Amounts, but we drop *payments*
-            # because they are not spending and will inflate credits/net metrics.
-            payment_pat = r"\b(autopay|payment|mobile\s+payment|online\s+payment|directpay|bill\s+pay|thank\s+you)\b"
-            df = df[
-                ~df['Description'].astype(str).str.contains(payment_pat, case=False, na=False, regex=True)
-            ].copy().reset_index(drop=True)
-
-            # --- Split hierarchical AMEX category (Main-Sub) ---
-            df[['category_main', 'category_sub']] = (
-                df['Category'].astype(str)
-                .str.split('-', n=1, expand=True)
-            )
+        # Filters only build masks; rows_out is what would survive up to that stage
+        with profiler.span('payment_filter', rows_in=len(df)) as span:
+            # --- Remove non-spend rows (Payments and Credits) ---
+            non_spend = df['Category'].astype(str).str.contains('Payments and Credits', case=False, na=False)
 
-            # --- Map AMEX categories to Discover-style flat categories ---
-            def amex_to_discover(main, sub):
-                main = str(main).strip().lower()
-                sub = str(sub).strip().lower()
+            # --- Remove payment rows that are sometimes categorized differently ---
+            # Descriptions are dictionary-encoded once; regexes run per distinct string
+            df['Description'] = DESCRIPTIONS.encode(df['Description'])
+            non_spend |= DESCRIPTIONS.lookup(df['Description'], 'discover_payment')
+            if span:
+                span.rows_out = int(len(df) - non_spend.sum())
+
+        with profiler.span('promo_filter') as span:
+            if span:
+                span.rows_in = int(len(df) - non_spend.sum())
+            # --- Remove promo statement credits (data-layer cleanup) ---
+            # Examples: "$100 STATEMENT CREDIT ...", "$100 REFER A FRIEND CREDIT"
+            # These are not payments, but promotional credits that can distort credit metrics.
+            non_spend |= DESCRIPTIONS.lookup(df['Description'], 'promo')
 
-                # --- Non-spend / bookkeeping rows ---
-                # Some AMEX exports may include payments/credits buckets. Drop them here.
-                # NOTE: We still allow "awards/rebate" credits to be labeled explicitly.
-                if 'award' in main or 'rebate' in main:
-                    return 'Awards and Rebate Credits'
+            # One filtered copy instead of one per stage
+            df = df[~non_spend].copy()
+            span.rows_out = len(df)
 
-                if 'payment' in main or 'payments' in main:
-                    return None
+        # --- Canonicalize: add Source and tx_id ---
+        df['Source'] = 'DISCOVER'
+        df = df.reset_index(drop=True)
 
-                if 'credit' in main or 'credits' in main:
-                    return None
+        return df
 
-                if 'fees & adjustments' in main:
-                    return None  # drop later
+    def iter_discover_csv(self, path: str, chunksize: int = 100_000, sniff_lines: int = 100):
+        """
+        Stream a Discover CSV as canonical chunks (with tx_id) of at most
+        `chunksize` raw rows.
 
-                # --- Spend category mapping (Discover-style) ---
-                # Restaurants
-                if 'restaurant' in main or 'dining' in main:
-                    return 'Restaurants'
+        Only the first `sniff_lines` lines are scanned for the header row;
+        the body is then read chunk by chunk through normalize_discover, so
+        peak memory depends on `chunksize`, not on the file size. tx_ids
+        match the whole-file loader.
+        """
+        profiler = self.profiler
+        header_line = None
+        with profiler.span('detect_header'), open(path, newline='') as f:
+            for i in range(sniff_lines):
+                line = f.readline()
+                if not line:
+                    break
+                first = next(csv.reader([line]), [''])
+                first_norm = re.sub(r"[^a-z0-9]+", "", (first[0] if first else '').strip().lower())
+                if first_norm in self.discover_date_headers:
+                    header_line = i
+                    break
+
+        if header_line is None:
+            raise ValueError(
+                "Could not find Discover header row. Expected first column header like 'Trans. Date'."
+            )
 
-                # Supermarkets (Discover calls this "Supermarkets")
-                if 'merchandise & supplies' in main and ('grocer' in sub or 'supermarket' in sub or 'grocery' in sub):
-                    return 'Supermarkets'
-                if 'supermarket' in main or 'grocery' in main:
-                    return 'Supermarkets'
+        dup_offsets = {}
+        reader = pd.read_csv(path, skiprows=header_line, header=0, dtype=str, chunksize=chunksize)
+        while True:
+            with profiler.span('read_csv') as span:
+                raw = next(reader, None)
+                if raw is None:
+                    # Bytes are attributed once the whole file has been consumed
+                    if span:
+                        span.bytes_read = os.path.getsize(path)
+                    break
+                span.rows_out = len(raw)
+            df = self.normalize_discover(raw)
+            df = self._finish(df, dup_offsets=dup_offsets)
+            yield df
 
-                # Gasoline
-                if ('transportation' in main and 'fuel' in sub) or 'gas' in main or 'gasoline' in main:
-                    return 'Gasoline'
+    # ------------------------------
+    # AMEX xlsx reader
+    # ------------------------------
+    def read_amex_xlsx(self, path: str) -> pd.DataFrame:
+        """
+        Read the AMEX sheet below its header row as raw object columns
+        Date/Description/Amount/Category.
 
-                # Travel / Entertainment
-                if 'travel' in main or 'entertainment' in main or 'lodging' in sub or 'air' in sub or 'hotel' in sub:
-                    return 'Travel/ Entertainment'
+        Streams the first worksheet (core.xlsx): preamble rows are scanned
+        only for the header, and body cells right of the last column the
+        loader needs (address, reference, ...) are skipped unconverted.
+        Values match pd.read_excel(header=None) for these columns.
+        """
+        # openpyxl (via core.xlsx) is only needed once an AMEX statement shows up
+        from core.xlsx import iter_sheet_rows
+
+        # --- Detect header row (first column == 'date') ---
+        header_row, header = None, None
+        for row_number, row, _ in iter_sheet_rows(path):
+            if row and str(row[0]).strip().lower() == 'date':
+                header_row, header = row_number, row
+                break
+        if header_row is None:
+            raise ValueError(
+                "Could not find AMEX header row."
+            )
 
-                # Education
-                if 'education' in main or 'school' in sub or 'tuition' in sub:
-                    return 'Education'
+        positions = {}
+        for i, name in enumerate(header):
+            positions.setdefault(name, i)
+        missing = [c for c in self.amex_columns if c not in positions]
+        if missing:
+            raise ValueError(f"AMEX sheet missing required columns: {missing}. Available columns: {header}")
+        picks = [positions[c] for c in self.amex_columns]
+
+        data, filled = [], []
+        for _, row, row_filled in iter_sheet_rows(path, min_row=header_row + 1, max_col=max(picks) + 1):
+            data.append([row[i] if i < len(row) else None for i in picks])
+            filled.append(row_filled)
+
+        # read_excel drops trailing rows with nothing in any column
+        while data and not filled[-1]:
+            data.pop()
+            filled.pop()
+
+        df = pd.DataFrame(data, columns=self.amex_columns)
+        return df.where(df.notna(), np.nan)
+
+    def _finish(self, df: pd.DataFrame, dup_offsets: dict | None = None) -> pd.DataFrame:
+        """Shared tail of every loader: dates, tx_id, canonical column order."""
+        profiler = self.profiler
+        with profiler.span('ingest_dates', rows_in=len(df)) as span:
+            df = self.ingest_dates(df)
+            span.rows_out = len(df)
+        with profiler.span('assign_tx_id', rows_in=len(df)) as span:
+            df = self.assign_tx_id(df, dup_offsets=dup_offsets)
+            span.rows_out = len(df)
+        with profiler.span('merchant', rows_in=len(df)) as span:
+            df['Merchant'] = DESCRIPTIONS.lookup(df['Description'], 'merchant')
+            if isinstance(df['Description'].dtype, pd.CategoricalDtype):
+                # Back to plain values (the dtype the loader read them as)
+                df['Description'] = df['Description'].astype(df['Description'].cat.categories.dtype)
+            span.rows_out = len(df)
+        return df[self.canonical_cols].copy()
 
-                # Government Services
-                if 'government' in main or 'tax' in sub or 'dmv' in sub:
-                    return 'Government Services'
+    def ingest(self, path: str, firm: str) -> pd.DataFrame:
+        return self.ingest_cached(path, firm)[0]
 
-                # Interest
-                if 'interest' in main:
-                    return 'Interest'
+    def ingest_cached(self, path: str, firm: str) -> tuple[pd.DataFrame, bool | None]:
+        """
+        ingest() through the statement cache.
 
-                # Department Stores
-                if 'department' in main or 'department store' in sub:
-                    return 'Department Stores'
+        Returns (df, hit): hit is True/False for a cache hit/miss and None
+        when no cache is configured.
+        """
+        cache = self.statement_cache
+        if cache is None:
+            return self.parse(path, firm), None
+
+        with self.profiler.span('statement_cache') as span:
+            key = cache.key(path, firm)
+            df = cache.get(key)
+            if span:
+                span.bytes_read = os.path.getsize(path)
+                span.rows_out = None if df is None else len(df)
+        if df is not None:
+            return df, True
+
+        df = self.parse(path, firm)
+        cache.put(key, df)
+        return df, False
+
+    def parse(self, path: str, firm: str) -> pd.DataFrame:
+        """Parse one statement into canonical rows (no caching)."""
+        firm = firm.strip().upper()
+        profiler = self.profiler
 
-                # Warehouse Clubs
-                if 'warehouse' in main or 'warehouse club' in sub:
-                    return 'Warehouse Clubs'
+        # AMEX loader
+        def load_amex_xlsx(xlsx_path: str) -> pd.DataFrame:
+            # Data Loading (streaming; header detection happens while reading)
+            with profiler.span('read_xlsx') as span:
+                df = self.read_amex_xlsx(xlsx_path)
+                if span:
+                    span.rows_out = len(df)
+                    span.bytes_read = os.path.getsize(xlsx_path)
 
-                # Merchandise (general retail)
-                if 'merchandise & supplies' in main:
-                    return 'Merchandise'
+            # Make sure date and amount are in correct types
+            with profiler.span('normalize_types', rows_in=len(df)) as span:
+                df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
+                df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+                span.rows_out = len(df)
 
-                # Default
-                return 'Unknown Source'  # fallback
+            # --- Remove non-spend rows (payments/autopay) ---
+            # We keep statement credits/refunds as negative Amounts, but we drop *payments*
+            # because they are not spending and will inflate credits/net metrics.
+            with profiler.span('payment_filter', rows_in=len(df)) as span:
+                # Dictionary-encode descriptions once; the regex runs per distinct string
+                df['Description'] = DESCRIPTIONS.encode(df['Description'])
+                df = df[~DESCRIPTIONS.lookup(df['Description'], 'amex_payment')].copy().reset_index(drop=True)
+                span.rows_out = len(df)
+
+            with profiler.span('category_map', rows_in=len(df)) as span:
+                # --- Split hierarchical AMEX category (Main-Sub) ---
+                df[['category_main', 'category_sub']] = (
+                    df['Category'].astype(str)
+                    .str.split('-', n=1, expand=True)
+                )
 
-            df['Category'] = df.apply(
-                lambda r: amex_to_discover(r['category_main'], r['category_sub']),
-                axis=1
-            )
-            df = df[df['Category'].notna()].copy()
+                # --- Map AMEX categories to Discover-style flat categories ---
+                # Rule table lives in core.categories; evaluated once per distinct (main, sub) pair.
+                df['Category'] = AMEX_CATEGORY_MAPPER.map_series(df['category_main'], df['category_sub'])
+                df = df[df['Category'].notna()].copy()
+                span.rows_out = len(df)
 
             # --- Canonicalize: add Source and tx_id ---
             df['Source'] = 'AMEX'
@@ -192,88 +406,38 @@ class Ingestion:
             """Load Discover statement from CSV (new format)."""
 
             # Data Loading (read raw rows first to allow header detection)
-            raw = pd.read_csv(csv_path, header=None, dtype=str)
+            with profiler.span('read_csv') as span:
+                raw = pd.read_csv(csv_path, header=None, dtype=str)
+                if span:
+                    span.rows_out = len(raw)
+                    span.bytes_read = os.path.getsize(csv_path)
 
             # --- Detect header row (first column contains something like 'Trans. Date') ---
-            first_col_norm = (
-                raw.iloc[:, 0]
-                .astype(str)
-                .str.strip()
-                .str.lower()
-                .str.replace(r"[^a-z0-9]+", "", regex=True)
-            )
-
-            header_candidates = raw.index[
-                first_col_norm.isin(['transdate', 'transactiondate', 'transactdate'])
-            ].tolist()
-
-            if not header_candidates:
-                raise ValueError(
-                    "Could not find Discover header row. Expected first column header like 'Trans. Date'."
+            with profiler.span('detect_header', rows_in=len(raw)) as span:
+                first_col_norm = (
+                    raw.iloc[:, 0]
+                    .astype(str)
+                    .str.strip()
+                    .str.lower()
+                    .str.replace(r"[^a-z0-9]+", "", regex=True)
                 )
 
-            header_id = header_candidates[0]
-            col = raw.loc[header_id, :].tolist()
-            df = raw.loc[header_id + 1:, :].copy()
-            df.columns = col
-
-            # Normalize column names (strip) and build a normalized lookup
-            df.columns = [str(c).strip() for c in df.columns]
-            col_norm_map = {
-                str(c).strip(): re.sub(r"[^a-z0-9]+", "", str(c).strip().lower())
-                for c in df.columns
-            }
-
-            def _pick(norm_targets):
-                for orig, norm in col_norm_map.items():
-                    if norm in norm_targets:
-                        return orig
-                return None
-
-            # Discover exports commonly include: Trans. Date, Post Date, Description, Amount, Category
-            date_col = _pick({'transdate', 'transactiondate', 'transactdate'})
-            desc_col = _pick({'description'})
-            amt_col = _pick({'amount'})
-            cat_col = _pick({'category'})
-
-            missing = [name for name, col in [("Date", date_col), ("Description", desc_col), ("Amount", amt_col), ("Category", cat_col)] if col is None]
-            if missing:
-                raise ValueError(
-                    f"Discover CSV missing required columns: {missing}. Available columns: {list(df.columns)}"
-                )
-
-            # --- Select and rename columns to canonical names ---
-            df = df[[date_col, desc_col, amt_col, cat_col]].copy()
-            df.columns = ['Date', 'Description', 'Amount', 'Category']
-
-            # --- Type normalization ---
-            df['Date'] = pd.to_datetime(df['Date'], format='mixed', errors='coerce')
-            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-
-            # --- Remove non-spend rows (Payments and Credits) ---
-            df = df[
-                ~df['Category'].astype(str).str.contains('Payments and Credits', case=False, na=False)
-            ].copy()
-
-            # --- Remove payment rows that are sometimes categorized differently ---
-            payment_pat = r"\b(autopay|payment|online\s+payment|directpay|bill\s+pay|thank\s+you)\b"
-            df = df[
-                ~df['Description'].astype(str).str.contains(payment_pat, case=False, na=False, regex=True)
-            ].copy()
+                header_candidates = raw.index[
+                    first_col_norm.isin(self.discover_date_headers)
+                ].tolist()
 
-            # --- Remove promo statement credits (data-layer cleanup) ---
-            # Examples: "$100 STATEMENT CREDIT ...", "$100 REFER A FRIEND CREDIT"
-            # These are not payments, but promotional credits that can distort credit metrics.
-            promo_credit_pat = r"\b(statement\s+credit|refer\s+a\s+friend\s+credit)\b"
-            df = df[
-                ~df['Description'].astype(str).str.contains(promo_credit_pat, case=False, na=False, regex=True)
-            ].copy()
+                if not header_candidates:
+                    raise ValueError(
+                        "Could not find Discover header row. Expected first column header like 'Trans. Date'."
+                    )
 
-            # --- Canonicalize: add Source and tx_id ---
-            df['Source'] = 'DISCOVER'
-            df = df.reset_index(drop=True)
+                header_id = header_candidates[0]
+                col = raw.loc[header_id, :].tolist()
+                df = raw.loc[header_id + 1:, :].copy()
+                df.columns = col
+                span.rows_out = len(df)
 
-            return df
+            return self.normalize_discover(df)
 
         # Dispatch
         if firm == 'AMEX':
@@ -282,17 +446,114 @@ class Ingestion:
             df = load_discover_csv(path)
         else:
             raise ValueError(f"Unsupported firm: {firm}")
-        
-        df = self.ingest_dates(df)
-        df = self.assign_tx_id(df)
-        df = df[self.canonical_cols].copy()
-        return df
+
+        return self._finish(df)
 
     # ------------------------------
     # orchestration
     # ------------------------------
-    def add_data(self, path: str, firm: str) -> dict:
-        new_tx = self.ingest(path, firm)
-        stats = self.storage.merge_and_save(new_tx)
+    def add_data(self, path: str, firm: str, chunksize: int | None = None) -> dict:
+        """
+        Ingest one statement and merge it into storage.
+
+        chunksize: stream Discover CSVs in chunks of this many rows, merging
+        each chunk as it is parsed (bounded memory). Ignored for AMEX.
+
+        With profiling enabled on the storage, stats['profile'] lists the
+        per-stage timings and row counts of this call (see core.profiling).
+        """
+        self.profiler.reset()
+        if chunksize and firm.strip().upper() == 'DISCOVER':
+            stats = None
+            for chunk in self.iter_discover_csv(path, chunksize=chunksize):
+                chunk_stats = self.storage.merge_and_save(chunk)
+                if stats is None:
+                    stats = dict(chunk_stats, chunks=0)
+                else:
+                    for k in ['incoming_rows', 'inserted', 'skipped']:
+                        stats[k] += chunk_stats[k]
+                    stats['final_rows'] = chunk_stats['final_rows']
+                stats['chunks'] += 1
+            if stats is None:
+                stats = dict(self.storage.merge_and_save(pd.DataFrame(columns=self.canonical_cols)), chunks=0)
+        else:
+            new_tx, cache_hit = self.ingest_cached(path, firm)
+            stats = self.storage.merge_and_save(new_tx)
+            if cache_hit is not None:
+                stats['statement_cache_hit'] = cache_hit
+                stats['statement_cache'] = self.statement_cache.stats()
+
+        self._attach_profile(stats, op='add_data', path=path, firm=firm.strip().upper())
+        print('New data has been processed')
+        return stats
+
+    def _attach_profile(self, stats: dict, **context) -> None:
+        profiler = self.profiler
+        if not profiler.enabled:
+            return
+        stats['profile'] = profiler.summary()
+        profiler.emit(**context)
+
+    def add_many(self, paths_and_firms: list[tuple[str, str]], workers: int | None = None) -> dict:
+        """
+        Parse many statements in a process pool and commit them with a single
+        storage merge (tx_id dedup runs across the whole batch).
+
+        Each per-file entry reports how many of its rows were inserted and
+        skipped (a row duplicated across files counts for the first file).
+        A file that fails to parse is reported in its per-file entry and
+        does not abort the batch.
+        """
+        self.profiler.reset()
+        workers = workers or os.cpu_count() or 1
+        files = [
+            {'path': path, 'firm': firm, 'rows': 0, 'inserted': 0, 'skipped': 0, 'cache_hit': None, 'error': None}
+            for path, firm in paths_and_firms
+        ]
+        frames = [None] * len(files)
+
+        if workers == 1:
+            for i, f in enumerate(files):
+                try:
+                    frames[i], f['cache_hit'] = self.ingest_cached(f['path'], f['firm'])
+                except Exception as e:
+                    f['error'] = f'{type(e).__name__}: {e}'
+        else:
+            cache = self.statement_cache
+            cache_args = (cache.cache_dir, cache.max_bytes) if cache is not None else None
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_parse_statement, f['path'], f['firm'], self.storage.data_dir, cache_args): i
+                    for i, f in enumerate(files)
+                }
+                for fut in as_completed(futures):
+                    i = futures[fut]
+                    try:
+                        frames[i], files[i]['cache_hit'] = fut.result()
+                    except Exception as e:
+                        files[i]['error'] = f'{type(e).__name__}: {e}'
+
+        for f, df in zip(files, frames):
+            if df is not None:
+                f['rows'] = len(df)
+
+        parsed = [(i, df) for i, df in enumerate(frames) if df is not None]
+        batch = (
+            pd.concat([df for _, df in parsed], ignore_index=True) if parsed
+            else pd.DataFrame(columns=self.canonical_cols)
+        )
+        # Label each batch row with its file so the merge can split its counts
+        owner = np.repeat([i for i, _ in parsed], [len(df) for _, df in parsed]).astype('int64')
+        stats = self.storage.merge_and_save(batch, owner=owner)
+        for i, n in enumerate(stats.pop('inserted_by_owner')):
+            files[i]['inserted'] = n
+        for f in files:
+            f['skipped'] = f['rows'] - f['inserted']
+        stats['files'] = files
+        stats['failed_files'] = sum(f['error'] is not None for f in files)
+        if self.statement_cache is not None:
+            stats['statement_cache_hits'] = sum(f['cache_hit'] is True for f in files)
+        # With workers > 1 the parse stages run in child processes and only the merge is profiled
+        self._attach_profile(stats, op='add_many', files=len(files))
         print('New data has been processed')
-        return stats
\ No newline at end of file
+        return stats
@@ -0,0 +1,195 @@
+import contextlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from core.ingestion import Ingestion
+from core.profiling import PipelineProfiler
+
+
+class IngestJob:
+    """One queued statement: where it is in the pipeline and how each stage went."""
+
+    stages = ['parse', 'commit']
+
+    def __init__(
+        self,
+        path: str,
+        firm: str,
+        name: str | None = None,
+        cleanup: bool = False,
+        profile: bool = False,
+        profile_log: str | None = None,
+    ):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.path = path
+        self.firm = firm.strip().upper()
+        self.name = name or os.path.basename(path)
+        # Delete `path` when the job finishes (uploads written to temp files)
+        self.cleanup = cleanup
+        # Profile this job only (its own PipelineProfiler); profile_log appends JSON lines
+        self.profile = profile
+        self.profile_log = profile_log
+
+        self.status = 'queued'  # queued | running | done | failed
+        self.stage = None
+        # status per stage: pending | waiting | running | done | failed | skipped
+        self.progress = {s: {'status': 'pending', 'seconds': None, 'rows': None} for s in self.stages}
+        self.stats = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def snapshot(self) -> dict:
+        return {
+            'job_id': self.job_id,
+            'name': self.name,
+            'firm': self.firm,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': {s: dict(p) for s, p in self.progress.items()},
+            'stats': self.stats,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class IngestQueue:
+    """Background statement ingestion for the UI.
+
+    submit() returns a job id immediately; a thread pool of `workers`
+    parses statements concurrently (through the statement cache) and
+    commits them to storage one at a time, so merges never interleave.
+    status()/jobs() return snapshots that a page can poll.
+
+    submit(profile=True) records that job's stages into a profiler of its
+    own (stats['profile']), so other jobs and the storage's profiler are
+    unaffected. Jobs without one record into the storage profiler: while
+    that is enabled, they run one at a time so each job's stats['profile']
+    only holds its own spans.
+
+    Finished jobs are kept for status queries, up to `max_history`.
+    Storage listeners (load cache, spend cube, models) run inside each
+    commit as with Agent.add_data.
+    """
+
+    def __init__(self, ingestion: Ingestion, workers: int = 2, max_history: int = 100):
+        self.ingestion = ingestion
+        self.storage = ingestion.storage
+        self.max_history = max_history
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='ingest')
+        self._jobs = OrderedDict()  # job_id -> IngestJob, in submit order
+        self._lock = threading.Lock()
+        self._commit_lock = threading.Lock()
+
+    def submit(
+        self,
+        path: str,
+        firm: str,
+        name: str | None = None,
+        cleanup: bool = False,
+        profile: bool = False,
+        profile_log: str | None = None,
+    ) -> str:
+        if firm.strip().upper() not in ('AMEX', 'DISCOVER'):
+            raise ValueError(f"Unsupported firm: {firm}")
+        job = IngestJob(path, firm, name=name, cleanup=cleanup, profile=profile, profile_log=profile_log)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim_locked()
+        self._pool.submit(self._run, job)
+        return job.job_id
+
+    def status(self, job_id: str) -> dict | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job is not None else None
+
+    def jobs(self, job_ids: list[str] | None = None) -> list[dict]:
+        """Snapshots in submit order (all jobs, or the given ids that are still known)."""
+        with self._lock:
+            if job_ids is None:
+                return [job.snapshot() for job in self._jobs.values()]
+            return [self._jobs[i].snapshot() for i in job_ids if i in self._jobs]
+
+    def active(self) -> int:
+        with self._lock:
+            return sum(job.status in ('queued', 'running') for job in self._jobs.values())
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _trim_locked(self) -> None:
+        finished = [i for i, job in self._jobs.items() if job.status in ('done', 'failed')]
+        for job_id in finished[:max(len(self._jobs) - self.max_history, 0)]:
+            del self._jobs[job_id]
+
+    # ------------------------------
+    # worker
+    # ------------------------------
+    def _set(self, job: IngestJob, stage: str, **progress) -> None:
+        with self._lock:
+            job.stage = stage
+            job.progress[stage].update(progress)
+
+    def _run(self, job: IngestJob) -> None:
+        with self._lock:
+            job.status = 'running'
+            job.started_at = time.time()
+        own = PipelineProfiler(enabled=True, jsonl_path=job.profile_log) if job.profile else None
+        # Otherwise spans go to the storage's one profiler: while it is enabled, jobs run one at a time
+        shared = own is None and self.ingestion.profiler.enabled
+        stage = None
+        try:
+            with (
+                self.storage.profiling(own) if own is not None else contextlib.nullcontext(),
+                self._commit_lock if shared else contextlib.nullcontext(),
+            ):
+                if shared:
+                    self.ingestion.profiler.reset()
+
+                stage = 'parse'
+                self._set(job, stage, status='running')
+                t0 = time.perf_counter()
+                df, cache_hit = self.ingestion.ingest_cached(job.path, job.firm)
+                self._set(job, stage, status='done', seconds=time.perf_counter() - t0, rows=len(df))
+
+                stage = 'commit'
+                self._set(job, stage, status='waiting')
+                with contextlib.nullcontext() if shared else self._commit_lock:
+                    self._set(job, stage, status='running')
+                    t0 = time.perf_counter()
+                    stats = self.storage.merge_and_save(df)
+                self._set(job, stage, status='done', seconds=time.perf_counter() - t0, rows=stats.get('inserted'))
+
+                if cache_hit is not None:
+                    stats['statement_cache_hit'] = cache_hit
+                if own is not None or shared:
+                    self.ingestion._attach_profile(stats, op='ingest_job', path=job.name, firm=job.firm)
+            with self._lock:
+                job.stats = stats
+                job.status = 'done'
+        except Exception as e:
+            with self._lock:
+                job.error = f'{type(e).__name__}: {e}'
+                job.status = 'failed'
+                if stage is not None:
+                    job.progress[stage]['status'] = 'failed'
+                for p in job.progress.values():
+                    if p['status'] == 'pending':
+                        p['status'] = 'skipped'
+        finally:
+            with self._lock:
+                job.stage = None
+                job.finished_at = time.time()
+            if job.cleanup:
+                try:
+                    os.remove(job.path)
+                except OSError:
+                    pass
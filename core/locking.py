@@ -0,0 +1,106 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only serializes threads of this process
+    fcntl = None
+
+
+class FileLock:
+    """Advisory lock on a file, shared by every process that opens the same path.
+
+    exclusive() (or acquire()/release()) blocks until this instance holds
+    the lock; it is reentrant within the owning thread (nested writes take
+    it once). shared_probe() is the non-blocking check for readers: it
+    yields False while any holder (this or another process) is writing.
+
+    Uses flock(2), so holders on the same host serialize; without fcntl the
+    lock degrades to a per-instance thread lock.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._owner = None
+        self._depth = 0
+        self._fd = None
+
+    def _open(self) -> int:
+        try:
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            # First writer of a new store creates its directory
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if not self._thread_lock.acquire(blocking):
+            return False
+        if self._depth == 0:
+            fd = self._open()
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            except BaseException:
+                os.close(fd)
+                self._thread_lock.release()
+                raise
+            self._fd, self._owner = fd, threading.get_ident()
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd, self._owner = self._fd, None, None
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        self._thread_lock.release()
+
+    @contextmanager
+    def exclusive(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def held(self) -> bool:
+        """True if the calling thread holds the lock."""
+        return self._owner == threading.get_ident()
+
+    @contextmanager
+    def shared_probe(self):
+        """Yield True if no writer holds the lock (held shared for the block), else False.
+
+        Never waits: readers use the block to take a quick consistent look
+        at the files (e.g. stat them), not to read them.
+        """
+        if fcntl is None:
+            yield self._owner is None
+            return
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        except FileNotFoundError:
+            # No directory yet, so nobody has written here
+            yield True
+            return
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
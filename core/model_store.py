@@ -0,0 +1,296 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.predict import BudgetPredictor, _feature_arrays, _started
+from core.storage import Storage
+
+
+class ModelStore:
+    """Persisted next-month models for one store, refit only where the data changed.
+
+    Keeps the month x key spend panel, the fitted ridge models and prefix
+    sums of their per-month normal-equation statistics (see
+    BudgetPredictor._row_stats), persisted next to the store as
+    <name>.model.npz with a <name>.model.json sidecar recording the storage
+    fingerprint and parameters they match.
+
+    Follows storage writes through Storage.subscribe like SpendCube: a merge
+    adds the inserted rows to the panel and marks the first month it
+    touched; a full rewrite rebuilds the panel. predict() then refits from
+    that month onwards only (appending the latest month re-sums one or two
+    rows) and otherwise returns the cached forecast. If the store changed
+    behind its back, the panel is rebuilt from storage and fully refit.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        by: str | list[str] = 'Category',
+        feature: list[str] | tuple = ('lag_1', 'roll3_mean'),
+        alpha: float = 1.0,
+        val_months: int = 3,
+    ):
+        self.storage = storage
+        self.by = by
+        self.feature = list(feature)
+        self.alpha = alpha
+        self.val_months = val_months
+        stem = os.path.join(storage.data_dir, os.path.splitext(storage.filename)[0])
+        self.model_path = stem + '.model.npz'
+        self.meta_path = stem + '.model.json'
+
+        self.predictor = BudgetPredictor()
+        self._panel = None        # month x key spend
+        self._fingerprint = None
+        self._stats = None        # prefix sums: stats[t] = sum of row stats over months < t
+        self._stats_alpha = None  # alpha the current coefficients were solved with
+        self._dirty_from = None   # first panel row whose models are stale (None: clean)
+        self._prediction = None
+        self.counters = {'cached': 0, 'incremental': 0, 'full': 0}
+        storage.subscribe(self)
+
+    @property
+    def _by_cols(self) -> list[str]:
+        return [self.by] if isinstance(self.by, str) else list(self.by)
+
+    # ------------------------------
+    # build / persist
+    # ------------------------------
+    def _params(self) -> dict:
+        return {'by': self._by_cols, 'feature': self.feature, 'val_months': self.val_months}
+
+    def _save(self) -> None:
+        with self.storage._pinned(self._fingerprint) as current:
+            if current:
+                self._write()
+            # else: the store moved on (or is being written); keep the state in memory only
+
+    def _write(self) -> None:
+        panel = self._panel
+        p = self.predictor
+        arrays = {'panel': panel.to_numpy(dtype='float64')}
+        if self._stats is not None:
+            arrays.update(
+                stats=self._stats,
+                coef=p.coef_.to_numpy(),
+                intercept=p.intercept_.to_numpy(),
+                n_train=p.n_train_.to_numpy(),
+                n_val=p.validation_['n_val'].to_numpy(),
+                mae=p.validation_['mae'].to_numpy(),
+            )
+        tmp_path = f'{self.model_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, self.model_path)
+        st = os.stat(self.model_path)
+
+        meta = {
+            'fingerprint': self._fingerprint,
+            'params': self._params(),
+            'alpha': self._stats_alpha,
+            'dirty_from': self._dirty_from,
+            'first_month': str(panel.index[0]) if len(panel) else None,
+            'keys': [list(k) if isinstance(k, tuple) else k for k in panel.columns.tolist()],
+            # The arrays file this sidecar describes (readers check it)
+            'file': [st.st_size, st.st_mtime_ns],
+        }
+        tmp_path = f'{self.meta_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _load_persisted(self, fingerprint: list) -> bool:
+        """Adopt the persisted state if it matches `fingerprint` and these parameters."""
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            if meta['fingerprint'] != fingerprint or meta['params'] != self._params():
+                return False
+            with open(self.model_path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if [st.st_size, st.st_mtime_ns] != meta['file']:
+                    # Arrays replaced after this sidecar was read
+                    return False
+                with np.load(f) as data:
+                    arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return False
+
+        by_cols = self._by_cols
+        if len(by_cols) == 1:
+            keys = pd.Index(meta['keys'], name=by_cols[0])
+        else:
+            keys = pd.MultiIndex.from_tuples([tuple(k) for k in meta['keys']], names=by_cols)
+        values = arrays['panel']
+        index = (
+            pd.period_range(meta['first_month'], periods=len(values), freq='M', name='month')
+            if meta['first_month'] else pd.PeriodIndex([], freq='M', name='month')
+        )
+        self._panel = pd.DataFrame(values, index=index, columns=keys)
+        self._fingerprint = fingerprint
+        self._dirty_from = meta['dirty_from']
+        self._prediction = None
+
+        if 'stats' in arrays:
+            p = self.predictor
+            p.feature_, p.alpha_ = list(self.feature), meta['alpha']
+            p.coef_ = pd.DataFrame(arrays['coef'], index=keys, columns=p.feature_)
+            p.intercept_ = pd.Series(arrays['intercept'], index=keys)
+            p.n_train_ = pd.Series(arrays['n_train'], index=keys)
+            p.validation_ = pd.DataFrame({'n_val': arrays['n_val'], 'mae': arrays['mae']}, index=keys)
+            self._stats, self._stats_alpha = arrays['stats'], meta['alpha']
+        else:
+            self._stats = self._stats_alpha = None
+            self._dirty_from = 0
+        return True
+
+    def rebuild(self) -> pd.DataFrame:
+        """Rebuild the panel from storage; the next predict() refits every month."""
+        fingerprint = self.storage._fingerprint()
+        df = self.storage.load_transactions(columns=['Date', 'Amount', *self._by_cols])
+        self._panel = self.predictor.build_monthly_panel(df, by=self.by)
+        self._fingerprint = fingerprint
+        self._stats = self._stats_alpha = None
+        self._dirty_from = 0
+        self._prediction = None
+        return self._panel
+
+    def _sync(self) -> None:
+        current = self.storage._fingerprint()
+        if self._panel is not None and self._fingerprint == current:
+            return
+        if not self._load_persisted(current):
+            self.rebuild()
+
+    # ------------------------------
+    # refit
+    # ------------------------------
+    def _refit(self) -> None:
+        panel, p = self._panel, self.predictor
+        keys = panel.columns
+        T, K, P = len(panel), len(keys), len(self.feature)
+
+        values = np.vstack([panel.to_numpy(dtype='float64'), np.full((1, K), np.nan)])
+        features = _feature_arrays(values, self.feature)
+        X = np.stack([features[f] for f in self.feature], axis=-1)
+        valid = _started(values) & ~np.isnan(values) & ~np.isnan(X).any(axis=-1)
+
+        # ---- prefix sums: keep rows before the first stale month, re-sum the rest ----
+        start = 0 if self._stats is None else min(self._dirty_from, T, len(self._stats) - 1)
+        stats = np.zeros((T + 1, K, P * P + 2 * P + 2))
+        if start:
+            stats[:start + 1] = self._stats[:start + 1]
+        stats[start + 1:] = stats[start] + np.cumsum(p._row_stats(X[start:T], values[start:T], valid[start:T]), axis=0)
+        self._stats = stats
+        self.counters['incremental' if start else 'full'] += 1
+
+        # ---- validation on the trailing months, then the final models ----
+        v0 = max(T - self.val_months, 0)
+        w, intercept, _ = p._solve_stats(stats[v0], P, self.alpha)
+        val = valid[v0:T]
+        with np.errstate(invalid='ignore'):
+            err = np.abs(intercept + np.einsum('tkp,kp->tk', np.nan_to_num(X[v0:T]), w) - values[v0:T])
+        n_val = val.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mae = np.where(n_val > 0, np.where(val, err, 0.0).sum(axis=0) / n_val, np.nan)
+
+        w, intercept, n = p._solve_stats(stats[T], P, self.alpha)
+        p.feature_, p.alpha_ = list(self.feature), self.alpha
+        p.coef_ = pd.DataFrame(w, index=keys, columns=p.feature_)
+        p.intercept_ = pd.Series(intercept, index=keys)
+        p.n_train_ = pd.Series(n, index=keys)
+        p.validation_ = pd.DataFrame({'n_val': n_val, 'mae': mae}, index=keys)
+        self._stats_alpha = self.alpha
+        self._dirty_from = None
+
+    def predict(self) -> pd.DataFrame:
+        """Next-month forecast per key (BudgetPredictor.predict_next_month format)."""
+        self._sync()
+        if self._dirty_from is None and self._stats_alpha != self.alpha:
+            # Same statistics, different penalty: re-solve everything
+            self._dirty_from = len(self._panel)
+        if self._dirty_from is None and self._prediction is not None:
+            self.counters['cached'] += 1
+            return self._prediction
+
+        if self._dirty_from is not None:
+            self._refit()
+            self._save()
+
+        panel = self._panel
+        if not len(panel):
+            self._prediction = self.predictor._forecast(panel.columns, None, np.empty((0, len(self.feature))), np.empty(0))
+            return self._prediction
+        values = panel.to_numpy(dtype='float64')
+        next_row = np.vstack([values, np.full((1, values.shape[1]), np.nan)])
+        features = _feature_arrays(next_row, self.feature)
+        x_next = np.stack([features[f][-1] for f in self.feature], axis=-1)
+        self._prediction = self.predictor._forecast(panel.columns, panel.index[-1] + 1, x_next, values[-1])
+        return self._prediction
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+    # ------------------------------
+    # storage listener
+    # ------------------------------
+    def on_insert(self, rows: pd.DataFrame, fp_before: list, fp_after: list) -> None:
+        if self._panel is None or self._fingerprint != fp_before:
+            if not self._load_persisted(fp_before):
+                # Out of sync before this write (or never built); next predict rebuilds
+                self._panel = self._fingerprint = None
+                return
+
+        delta = self.predictor.build_monthly_panel(rows, by=self.by)
+        if delta.empty or not len(delta.columns):
+            self._fingerprint = fp_after
+            self._save()
+            return
+
+        panel = self._panel
+        if len(panel):
+            months = pd.period_range(min(panel.index[0], delta.index[0]), max(panel.index[-1], delta.index[-1]), freq='M', name='month')
+        else:
+            months = delta.index
+        keys = panel.columns.union(delta.columns)
+        if isinstance(keys, pd.MultiIndex):
+            keys.names = panel.columns.names
+        else:
+            keys.name = panel.columns.name
+        merged = (
+            panel.reindex(index=months, columns=keys, fill_value=0.0)
+            + delta.reindex(index=months, columns=keys, fill_value=0.0)
+        )
+
+        if self._stats is not None and not keys.equals(panel.columns):
+            self._align_models(keys)
+        # Rows shift if history was added before the first month: refit everything
+        first_touched = 0 if len(panel) and months[0] != panel.index[0] else months.get_loc(delta.index[0])
+        self._dirty_from = first_touched if self._dirty_from is None else min(self._dirty_from, first_touched)
+        self._panel = merged
+        self._fingerprint = fp_after
+        self._prediction = None
+        self._save()
+
+    def _align_models(self, keys: pd.Index) -> None:
+        """Widen the model state to `keys`; new keys have no history before this insert."""
+        p = self.predictor
+        idx = keys.get_indexer(p.coef_.index)
+        stats = np.zeros((len(self._stats), len(keys), self._stats.shape[-1]))
+        stats[:, idx] = self._stats
+        self._stats = stats
+        p.coef_ = p.coef_.reindex(keys)
+        p.intercept_ = p.intercept_.reindex(keys)
+        p.n_train_ = p.n_train_.reindex(keys, fill_value=0)
+        p.validation_ = p.validation_.reindex(keys)
+
+    def on_rewrite(self, df: pd.DataFrame, fp_after: list) -> None:
+        self._panel = self.predictor.build_monthly_panel(df, by=self.by)
+        self._fingerprint = fp_after
+        self._stats = self._stats_alpha = None
+        self._dirty_from = 0
+        self._prediction = None
+        self._save()
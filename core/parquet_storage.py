@@ -0,0 +1,204 @@
+import os
+import re
+import shutil
+
+import pandas as pd
+
+from core.schema import to_canonical
+from core.storage import Storage
+
+
+class ParquetStorage(Storage):
+    """Columnar storage partitioned by Year/Month (requires pyarrow).
+
+    Layout:
+      <data_dir>/<name>/Year=YYYY/Month=MM/part-NNNNN.parquet
+
+    where <name> is `filename` without its extension.
+
+    merge_and_save() adds a new part file per touched month; compact()
+    folds each month back into a single sorted file. Part files appear
+    atomically and are never modified, so a reader's snapshot is just the
+    set of parts committed when it started (see Storage._snapshot).
+
+    Dtypes round-trip as stored: Date is datetime64, Amount float64,
+    Day/Month/Year small ints and Category/Source categoricals.
+
+    Same public API as Storage, plus:
+      - migrate_from_csv(csv_path=None)
+    """
+
+    partition_re = re.compile(r"^Year=(\d{4})$")
+
+    def __init__(self, data_dir: str = 'agent_data', filename: str = 'transactions.csv'):
+        super().__init__(data_dir, filename)
+        self.dataset_dir = os.path.join(self.data_dir, os.path.splitext(self.filename)[0])
+
+    # ------------------------------
+    # partitions
+    # ------------------------------
+    def _partitions(self) -> list[tuple[int, int, str]]:
+        """Return [(year, month, partition_dir)] sorted by (year, month)."""
+        parts = []
+        if not os.path.isdir(self.dataset_dir):
+            return parts
+        for year_dir in os.listdir(self.dataset_dir):
+            m = self.partition_re.match(year_dir)
+            if not m:
+                continue
+            year_path = os.path.join(self.dataset_dir, year_dir)
+            for month_dir in os.listdir(year_path):
+                if month_dir.startswith('Month='):
+                    parts.append((int(m.group(1)), int(month_dir[6:]), os.path.join(year_path, month_dir)))
+        return sorted(parts)
+
+    @staticmethod
+    def _part_files(part_dir: str) -> list[str]:
+        return sorted(
+            os.path.join(part_dir, f) for f in os.listdir(part_dir) if f.endswith('.parquet')
+        )
+
+    def _to_storage_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        if 'Amount' in df.columns:
+            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce').astype('float64')
+        for c, dtype in [('Day', 'Int8'), ('Month', 'Int8'), ('Year', 'Int16')]:
+            if c in df.columns:
+                df[c] = pd.to_numeric(df[c], errors='coerce').astype(dtype)
+        for c in ['Category', 'Source']:
+            if c in df.columns:
+                df[c] = df[c].astype('category')
+        return df
+
+    def _read_part(self, path: str, read_cols: list) -> pd.DataFrame:
+        try:
+            return pd.read_parquet(path, columns=read_cols)
+        except ValueError:
+            # Part written before a column was added (e.g. Merchant): derive it
+            df = self._derive_columns(pd.read_parquet(path))
+            for c in read_cols:
+                if c not in df.columns:
+                    df[c] = None
+            return df[read_cols]
+
+    # ------------------------------
+    # public API
+    # ------------------------------
+    def load_transactions(self, columns: list | None = None, start=None, end=None) -> pd.DataFrame:
+        cols = self._project(columns)
+        read_cols = cols if start is None and end is None else list(dict.fromkeys(cols + ['Date']))
+        start_ts, end_ts = self._date_bounds(start, end)
+
+        for attempt in range(3):
+            try:
+                frames = self._read_committed(self._snapshot(), read_cols, start_ts, end_ts)
+                break
+            except FileNotFoundError:
+                # The dataset was rewritten while we read it: take the new version
+                if attempt == 2:
+                    raise
+
+        if not frames:
+            return self._to_storage_dtypes(pd.DataFrame(columns=cols))
+
+        df = pd.concat(frames, ignore_index=True)
+        df = self._filter_dates(df, start, end)
+        # concat of categoricals with different dictionaries falls back to object
+        df = self._to_storage_dtypes(df[cols]).reset_index(drop=True)
+        return df
+
+    def _read_committed(self, snapshot: list, read_cols: list, start_ts, end_ts) -> list[pd.DataFrame]:
+        committed = {rel: inode for rel, _, _, inode in snapshot}
+        frames = []
+        for year, month, part_dir in self._partitions():
+            # Partition pruning on the Year=/Month= directory names
+            if year == 0:
+                if start_ts is not None or end_ts is not None:
+                    continue
+            else:
+                month_start = pd.Timestamp(year=year, month=month, day=1)
+                month_end = month_start + pd.offsets.MonthBegin(1)
+                if start_ts is not None and month_end <= start_ts:
+                    continue
+                if end_ts is not None and month_start > end_ts:
+                    continue
+            for path in self._part_files(part_dir):
+                inode = committed.get(os.path.relpath(path, self.data_dir))
+                if inode is None:
+                    # Added by a merge that has not committed yet
+                    continue
+                if os.stat(path).st_ino != inode:
+                    raise FileNotFoundError(path)
+                frames.append(self._read_part(path, read_cols))
+        return frames
+
+    def save_transactions(self, df: pd.DataFrame) -> None:
+        """Persist canonical transactions, rewriting the whole dataset."""
+        df = self._to_storage_dtypes(self._derive_columns(to_canonical(df))[self.canonical_cols])
+
+        # Write to a sibling directory, then swap it in
+        tmp_dir = self.dataset_dir + '.tmp'
+        old_dir = self.dataset_dir + '.old'
+        with self._writing():
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            with self.profiler.span('write', rows_in=len(df)) as span:
+                self._write_partitions(df, tmp_dir)
+
+                if os.path.isdir(self.dataset_dir):
+                    os.replace(self.dataset_dir, old_dir)
+                os.replace(tmp_dir, self.dataset_dir)
+                shutil.rmtree(old_dir, ignore_errors=True)
+                if span:
+                    span.rows_out = len(df)
+                    span.bytes_written = self._data_bytes()
+            self._after_rewrite(df)
+
+    def reset_file(self) -> None:
+        with self._writing():
+            shutil.rmtree(self.dataset_dir, ignore_errors=True)
+            os.makedirs(self.dataset_dir, exist_ok=True)
+            self._after_rewrite(pd.DataFrame(columns=self.canonical_cols))
+
+    # ------------------------------
+    # append-only segments
+    # ------------------------------
+    def _write_partitions(self, df: pd.DataFrame, root: str) -> None:
+        """Write each month of `df` as a new part file under `root`."""
+        # Rows without a valid Date go to the Year=0000/Month=00 partition
+        years = df['Date'].dt.year.fillna(0).astype(int)
+        months = df['Date'].dt.month.fillna(0).astype(int)
+        for (year, month), part in df.groupby([years, months], sort=True):
+            part_dir = os.path.join(root, f'Year={int(year):04d}', f'Month={int(month):02d}')
+            os.makedirs(part_dir, exist_ok=True)
+            seq = len(self._part_files(part_dir))
+            path = os.path.join(part_dir, f'part-{seq:05d}.parquet')
+            # Readers list part files: only complete ones may carry the .parquet name
+            part.to_parquet(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+
+    def _append_rows(self, df: pd.DataFrame) -> None:
+        self._write_partitions(self._to_storage_dtypes(df[self.canonical_cols]), self.dataset_dir)
+
+    def _upgrade_schema(self) -> None:
+        # Old part files are read through _read_part; new parts carry every column
+        pass
+
+    def _data_files(self) -> list[str]:
+        return [path for _, _, part_dir in self._partitions() for path in self._part_files(part_dir)]
+
+    def migrate_from_csv(self, csv_path: str | None = None) -> int:
+        """One-shot import of an existing CSV store. Returns the number of rows written."""
+        csv_path = csv_path or self.tx_path
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(csv_path)
+
+        src = Storage(os.path.dirname(csv_path) or '.', os.path.basename(csv_path))
+        df = src.load_transactions()
+        df = df.sort_values(['Date', 'Amount'], ascending=[True, False]).reset_index(drop=True)
+        self.save_transactions(df)
+        return len(df)
@@ -0,0 +1,487 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from core.schema import is_compact
+
+
+# ------------------------------
+# Feature arrays
+# ------------------------------
+_LAG = re.compile(r"^lag_(\d+)$")
+_ROLL = re.compile(r"^roll(\d+)_mean$")
+
+
+def _feature_arrays(values: np.ndarray, names: list[str]) -> dict[str, np.ndarray]:
+    """'lag_{k}' / 'roll{w}_mean' for a month x key spend matrix.
+
+    Row t only uses rows before t, so a trailing all-NaN forecast row gets
+    its features from the observed months.
+    """
+    out = {}
+    csum = None
+    for name in names:
+        lag, roll = _LAG.match(name), _ROLL.match(name)
+        if lag:
+            k = int(lag.group(1))
+            arr = np.full_like(values, np.nan)
+            arr[k:] = values[:len(values) - k]
+        elif roll:
+            w = int(roll.group(1))
+            if csum is None:
+                # Prefix sums over every row but the last (never an input)
+                csum = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values[:-1], axis=0)])
+            arr = np.full_like(values, np.nan)
+            arr[w:] = (csum[w:] - csum[:-w]) / w
+        else:
+            raise ValueError(f"Unknown feature: {name}. Use 'lag_<k>' or 'roll<w>_mean'")
+        out[name] = arr
+    return out
+
+
+def _started(y: np.ndarray) -> np.ndarray:
+    # A key's history starts at its first month with activity; the zeros before it are not data
+    return np.maximum.accumulate(np.nan_to_num(y) != 0, axis=0)
+
+
+# ------------------------------
+# Backtest workers
+# ------------------------------
+# Per-process state: the spend matrix (a view on shared memory in pool
+# workers) and its features, built once per worker by the initializer.
+_BACKTEST = {}
+
+
+def _init_backtest_state(spend: np.ndarray, features: list[str], shm=None) -> None:
+    _BACKTEST.clear()
+    _BACKTEST.update(_feature_arrays(spend, features))
+    _BACKTEST['spend'] = spend
+    _BACKTEST['started'] = _started(spend)
+    # Keep the mapping alive as long as the view is used
+    _BACKTEST['shm'] = shm
+
+
+def _init_backtest_worker(shm_name: str, shape: tuple, features: list[str]) -> None:
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _init_backtest_state(np.ndarray(shape, dtype='float64', buffer=shm.buf), features, shm)
+
+
+def _backtest_fold(cutoff: int, feature: list[str], alphas: list[float]):
+    """Train on months before `cutoff`, score the one-step forecast of `cutoff`.
+
+    Returns (scored, abs_err, ape, ape_scored): per key whether the fold
+    counts, then per alpha x key absolute and absolute-percentage errors
+    (the latter only where the actual is non-zero).
+    """
+    y = _BACKTEST['spend'][:cutoff + 1]
+    X = np.stack([_BACKTEST[f][:cutoff + 1] for f in feature], axis=-1)
+    valid = _BACKTEST['started'][:cutoff + 1] & ~np.isnan(X).any(axis=-1)
+    train = valid.copy()
+    train[cutoff] = False
+
+    eq = BudgetPredictor._normal_equations(X, y, train)
+    actual = y[cutoff]
+    scored = valid[cutoff] & (eq[-1] > 0)
+    ape_scored = scored & (actual != 0)
+
+    abs_err = np.zeros((len(alphas), len(actual)))
+    ape = np.zeros_like(abs_err)
+    for i, alpha in enumerate(alphas):
+        w, intercept = BudgetPredictor._ridge_weights(*eq, alpha)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            err = np.abs(intercept + np.einsum('kp,kp->k', np.nan_to_num(X[cutoff]), w) - actual)
+            abs_err[i] = np.where(scored, err, 0.0)
+            ape[i] = np.where(ape_scored, err / np.abs(actual), 0.0)
+    return scored, abs_err, ape, ape_scored
+
+
+class BudgetPredictor:
+    """Next-month spend per category (or merchant, profile, ...), all series at once.
+
+    Pipeline:
+      panel = p.build_monthly_panel(df)          # month x key spend matrix
+      frame = p.make_features(panel)             # + lag / rolling-mean features
+      p.fit_ridge(frame, feature=['lag_1', 'roll3_mean'], alpha=1.0, val_months=3)
+      pred = p.predict_next_month(frame)
+
+    Every key gets its own ridge model, but the models are solved together:
+    features are array shifts over the whole month x key matrix and the
+    normal equations of all keys are stacked into one batched solve.
+    """
+
+    def __init__(self):
+        self.feature_ = None
+        self.alpha_ = None
+        self.coef_ = None        # DataFrame: key x feature
+        self.intercept_ = None   # Series: key
+        self.n_train_ = None     # Series: months each model was fit on
+        self.validation_ = None  # DataFrame: key x [n_val, mae]
+
+    # ------------------------------
+    # Panel + features
+    # ------------------------------
+    def build_monthly_panel(self, df: pd.DataFrame, by: str | list[str] = 'Category') -> pd.DataFrame:
+        """Monthly net spend as a dense month x key matrix (one pivot).
+
+        Rows are every month between the first and last transaction (months
+        without activity are 0), columns are the distinct values of `by`
+        (a MultiIndex when `by` is a list). Amounts follow the report
+        convention: spend positive, refunds negative, netted per month.
+        """
+        by_cols = [by] if isinstance(by, str) else list(by)
+        if df.empty:
+            return pd.DataFrame(
+                index=pd.PeriodIndex([], freq='M', name='month'),
+                columns=pd.Index([], name=by) if isinstance(by, str) else pd.MultiIndex.from_arrays([[]] * len(by_cols), names=by_cols),
+                dtype='float64',
+            )
+
+        # Compact frames carry integer cents
+        cents = is_compact(df)
+        amount = pd.to_numeric(df['AmountCents' if cents else 'Amount'], errors='coerce').to_numpy(dtype='float64')
+        months = pd.to_datetime(df['Date'], errors='coerce').to_numpy().astype('datetime64[M]')
+        ok = ~np.isnat(months) & ~np.isnan(amount)
+
+        k_codes, columns = self._factorize_keys([df[c].array[ok] for c in by_cols], by_cols)
+
+        m = months[ok].astype('int64')
+        first = int(m.min()) if len(m) else 0
+        n_months = int(m.max()) - first + 1 if len(m) else 0
+        n_keys = len(columns)
+
+        values = np.bincount(
+            (m - first) * n_keys + k_codes, weights=amount[ok], minlength=n_months * n_keys
+        ).reshape(n_months, n_keys)
+        if cents:
+            values = values / 100
+
+        index = pd.period_range(pd.Period(np.datetime64(first, 'M'), 'M'), periods=n_months, freq='M', name='month')
+        return pd.DataFrame(values, index=index, columns=columns)
+
+    @staticmethod
+    def _factorize_keys(arrays: list, names: list[str]) -> tuple[np.ndarray, pd.Index]:
+        """Row codes into the sorted distinct key tuples, without building per-row tuples.
+
+        Each column is factorized on its own (missing values become
+        'Uncategorized'), the integer codes are combined mixed-radix and
+        factorized once more to keep only the combinations that occur.
+        """
+        levels, combined = [], np.zeros(len(arrays[0]), dtype='int64')
+        for values in arrays:
+            codes, uniques = pd.factorize(values)
+            # Categoricals factorize on their codes; the (few) uniques become a plain Index
+            uniques = pd.Index(np.asarray(uniques, dtype=object))
+            if (codes < 0).any():
+                if 'Uncategorized' in uniques:
+                    codes[codes < 0] = uniques.get_loc('Uncategorized')
+                else:
+                    codes[codes < 0] = len(uniques)
+                    uniques = uniques.append(pd.Index(['Uncategorized']))
+            combined = combined * len(uniques) + codes
+            levels.append(uniques)
+
+        row_codes, present = pd.factorize(combined)
+        level_codes = []
+        for uniques in reversed(levels):
+            level_codes.append(present % len(uniques))
+            present = present // len(uniques)
+        level_codes.reverse()
+
+        if len(levels) == 1:
+            columns = pd.Index(levels[0].take(level_codes[0]), name=names[0])
+        else:
+            columns = pd.MultiIndex(levels=levels, codes=level_codes, names=names)
+        # Codes are in order of appearance: sort the (few) columns and remap the rows
+        order = columns.argsort()
+        if (order != np.arange(len(order))).any():
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            row_codes, columns = rank[row_codes], columns.take(order)
+        return row_codes, columns
+
+    def make_features(self, panel: pd.DataFrame, lags=(1,), windows=(3,)) -> pd.DataFrame:
+        """Panel + trailing features, one column block per feature.
+
+        Columns are (feature, key): 'spend', then 'lag_{k}' for k in `lags`
+        (e.g. lags=(1, 12) adds a seasonal lag) and 'roll{w}_mean' for w in
+        `windows`, all computed from earlier months only. One extra row is appended for the month after the panel
+        (spend NaN) holding the features predict_next_month uses.
+        """
+        values = panel.to_numpy(dtype='float64')
+        # Panel plus the forecast month
+        values = np.vstack([values, np.full((1, values.shape[1]), np.nan)])
+        index = panel.index.append(pd.PeriodIndex([panel.index[-1] + 1], name=panel.index.name)) if len(panel) else panel.index
+
+        blocks = {'spend': values}
+        blocks.update(_feature_arrays(values, [f'lag_{k}' for k in lags] + [f'roll{w}_mean' for w in windows]))
+
+        columns = pd.MultiIndex.from_tuples(
+            [(name, *(key if isinstance(key, tuple) else (key,))) for name in blocks for key in panel.columns],
+            names=['feature', *panel.columns.names],
+        )
+        data = np.hstack(list(blocks.values())) if len(index) else np.empty((0, len(columns)))
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    # ------------------------------
+    # Batched ridge
+    # ------------------------------
+    @staticmethod
+    def _arrays(frame: pd.DataFrame, feature: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        y = frame['spend'].to_numpy(dtype='float64')                                              # T x K
+        X = np.stack([frame[f].to_numpy(dtype='float64') for f in feature], axis=-1)              # T x K x P
+        valid = _started(y) & ~np.isnan(y) & ~np.isnan(X).any(axis=-1)
+        return X, y, valid
+
+    @staticmethod
+    def _normal_equations(X: np.ndarray, y: np.ndarray, mask: np.ndarray):
+        """Per-key centered normal equations over the rows in `mask`.
+
+        Returns (A, b, x_mean, y_mean, n) with A = Xc'Xc (K x P x P) and
+        b = Xc'yc (K x P); they do not depend on alpha, so an alpha grid
+        reuses them.
+        """
+        n = mask.sum(axis=0)                                                                      # K
+        m = mask[..., None]
+        Xm = np.where(m, X, 0.0)
+        ym = np.where(mask, y, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = Xm.sum(axis=0) / n[:, None]                                                  # K x P
+            y_mean = ym.sum(axis=0) / n                                                           # K
+
+        Xc = np.where(m, X - x_mean, 0.0)
+        yc = np.where(mask, y - y_mean, 0.0)
+        A = np.einsum('tkp,tkq->kpq', Xc, Xc)                                                     # K x P x P
+        b = np.einsum('tkp,tk->kp', Xc, yc)                                                       # K x P
+        return A, b, x_mean, y_mean, n
+
+    @staticmethod
+    def _ridge_weights(A, b, x_mean, y_mean, n, alpha: float) -> tuple[np.ndarray, np.ndarray]:
+        """Solve (A + alpha*I) w = b for every key in one batched call; intercept unpenalized."""
+        A = A + alpha * np.eye(A.shape[-1])
+        solve = np.linalg.solve if alpha > 0 else (lambda A, b: np.linalg.pinv(A) @ b)
+        w = solve(A, b[..., None])[..., 0]                                                        # K x P
+        intercept = y_mean - np.einsum('kp,kp->k', np.nan_to_num(x_mean), w)
+        # Keys without rows get NaN intercepts
+        return w, np.where(n > 0, intercept, np.nan)
+
+    @staticmethod
+    def _row_stats(X: np.ndarray, y: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """Per-row, per-key sufficient statistics [1, x, y, xx', xy] (zero outside `mask`).
+
+        Shape T x K x (P*P + 2P + 2). Summing them over any set of rows gives
+        that set's normal equations, so prefix sums let a model be refit
+        from a given month onwards without revisiting earlier months.
+        """
+        Xm = np.where(mask[..., None], X, 0.0)
+        ym = np.where(mask, y, 0.0)
+        xx = (Xm[..., :, None] * Xm[..., None, :]).reshape(*Xm.shape[:-1], X.shape[-1] ** 2)
+        return np.concatenate([mask[..., None].astype('float64'), Xm, ym[..., None], xx, Xm * ym[..., None]], axis=-1)
+
+    @classmethod
+    def _solve_stats(cls, stats: np.ndarray, n_features: int, alpha: float):
+        """Ridge per key from summed _row_stats (K x S); same result as _solve on those rows."""
+        P = n_features
+        n = stats[:, 0]
+        sx, sy = stats[:, 1:1 + P], stats[:, 1 + P]
+        sxx = stats[:, 2 + P:2 + P + P * P].reshape(-1, P, P)
+        sxy = stats[:, 2 + P + P * P:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            x_mean = sx / n[:, None]
+            y_mean = sy / n
+        xm, ym = np.nan_to_num(x_mean), np.nan_to_num(y_mean)
+        A = sxx - n[:, None, None] * xm[:, :, None] * xm[:, None, :]
+        b = sxy - n[:, None] * xm * ym[:, None]
+        w, intercept = cls._ridge_weights(A, b, x_mean, y_mean, n, alpha)
+        return w, intercept, n.astype('int64')
+
+    @classmethod
+    def _solve(cls, X: np.ndarray, y: np.ndarray, mask: np.ndarray, alpha: float):
+        """Ridge per key on the rows in `mask` (centered, so the intercept is not penalized)."""
+        A, b, x_mean, y_mean, n = cls._normal_equations(X, y, mask)
+        w, intercept = cls._ridge_weights(A, b, x_mean, y_mean, n, alpha)
+        return w, intercept, n
+
+    def fit_ridge(
+        self,
+        frame: pd.DataFrame,
+        feature: list[str] | tuple = ('lag_1', 'roll3_mean'),
+        alpha: float = 1.0,
+        val_months: int = 3,
+    ) -> pd.DataFrame:
+        """Fit one ridge model per key; returns the per-key validation scores.
+
+        The last `val_months` observed months are held out to score each
+        model (validation_: n_val, mae), then the models are refit on all
+        months for prediction. Rows where a feature is undefined or the key
+        has no history yet are skipped.
+        """
+        if alpha < 0:
+            raise ValueError(f"alpha must be >= 0, got {alpha}")
+        missing = [f for f in feature if f not in frame.columns.get_level_values('feature')]
+        if missing:
+            raise ValueError(f"Missing features: {missing}. Build them with make_features")
+
+        X, y, valid = self._arrays(frame, feature)
+        keys = frame['spend'].columns
+
+        # ---- validation on the trailing observed months ----
+        n_obs = int((~np.isnan(y).all(axis=1)).sum())
+        held_out = (np.arange(len(y)) >= n_obs - val_months)[:, None]
+        w, intercept, _ = self._solve(X, y, valid & ~held_out, alpha)
+        val = valid & held_out
+        with np.errstate(invalid='ignore'):
+            pred = intercept + np.einsum('tkp,kp->tk', np.nan_to_num(X), w)
+            err = np.where(val, np.abs(pred - np.nan_to_num(y)), 0.0)
+            n_val = val.sum(axis=0)
+            mae = np.where(n_val > 0, err.sum(axis=0) / np.maximum(n_val, 1), np.nan)
+        self.validation_ = pd.DataFrame({'n_val': n_val, 'mae': mae}, index=keys)
+
+        # ---- final models on every observed month ----
+        w, intercept, n = self._solve(X, y, valid, alpha)
+        self.feature_ = list(feature)
+        self.alpha_ = alpha
+        self.coef_ = pd.DataFrame(w, index=keys, columns=self.feature_)
+        self.intercept_ = pd.Series(intercept, index=keys)
+        self.n_train_ = pd.Series(n, index=keys)
+        return self.validation_
+
+    def predict_next_month(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Forecast for the month after the panel, one row per key.
+
+        Keys without a usable model (too little history) fall back to last
+        month's spend; `method` says which was used.
+        """
+        if self.coef_ is None:
+            raise RuntimeError("Call fit_ridge before predict_next_month")
+
+        keys = frame['spend'].columns
+        if not len(frame):
+            return self._forecast(keys, None, np.empty((0, len(self.feature_))), np.empty(0))
+
+        x_next = np.stack([frame[f].to_numpy(dtype='float64')[-1] for f in self.feature_], axis=-1)  # K x P
+        last = frame['spend'].to_numpy(dtype='float64')[-2] if len(frame) > 1 else np.zeros(len(keys))
+        return self._forecast(keys, frame.index[-1], x_next, last)
+
+    def _forecast(self, keys: pd.Index, month, x_next: np.ndarray, last: np.ndarray) -> pd.DataFrame:
+        if not len(keys):
+            return pd.DataFrame(columns=[*keys.names, 'month', 'predicted_spend', 'method'])
+
+        coef = self.coef_.reindex(keys).to_numpy()
+        intercept = self.intercept_.reindex(keys).to_numpy()
+
+        ridge = intercept + np.einsum('kp,kp->k', np.nan_to_num(x_next), np.nan_to_num(coef))
+        usable = ~np.isnan(ridge) & ~np.isnan(x_next).any(axis=1)
+
+        out = keys.to_frame(index=False)
+        out['month'] = str(month)
+        out['predicted_spend'] = np.where(usable, ridge, last)
+        out['method'] = np.where(usable, 'ridge', 'last_month')
+        return out.sort_values('predicted_spend', ascending=False, ignore_index=True)
+
+    # ------------------------------
+    # Walk-forward backtest
+    # ------------------------------
+    def backtest(
+        self,
+        panel: pd.DataFrame,
+        feature_sets=(('lag_1', 'roll3_mean'),),
+        alphas=(0.1, 1.0, 10.0),
+        n_cutoffs: int = 12,
+        min_train_months: int = 6,
+        workers: int | None = None,
+    ) -> pd.DataFrame:
+        """Walk-forward evaluation of every cutoff x alpha x feature set.
+
+        For each of the last `n_cutoffs` months (keeping at least
+        `min_train_months` before it) the models are trained on the earlier
+        months only and scored on that month's one-step forecast. Returns
+        one row per key x feature set x alpha: folds (cutoffs scored), mae,
+        and mape (mean |error| / |actual| over folds with non-zero actual).
+
+        Folds (one per cutoff x feature set; alphas share the normal
+        equations) run in a process pool of `workers` (default: all CPUs).
+        The month x key panel is placed in shared memory once and every
+        worker builds its features from it, so tasks only carry indices.
+        """
+        feature_sets = [list(fs) for fs in feature_sets]
+        alphas = [float(a) for a in alphas]
+        if any(a < 0 for a in alphas):
+            raise ValueError(f"alphas must be >= 0, got {alphas}")
+        features = list(dict.fromkeys(f for fs in feature_sets for f in fs))
+        # Fail on unknown names before starting workers
+        _feature_arrays(np.zeros((1, 1)), features)
+
+        spend = np.ascontiguousarray(panel.to_numpy(dtype='float64'))
+        keys = panel.columns
+        cutoffs = list(range(max(min_train_months, len(spend) - n_cutoffs), len(spend)))
+        tasks = [(cutoff, j) for cutoff in cutoffs for j in range(len(feature_sets))]
+
+        n_keys = len(keys)
+        scored = np.zeros((len(feature_sets), n_keys), dtype='int64')
+        ape_scored = np.zeros_like(scored)
+        err_sum = np.zeros((len(feature_sets), len(alphas), n_keys))
+        ape_sum = np.zeros_like(err_sum)
+
+        def collect(j, result):
+            s, err, ape, s_ape = result
+            scored[j] += s
+            ape_scored[j] += s_ape
+            err_sum[j] += err
+            ape_sum[j] += ape
+
+        workers = min(workers or os.cpu_count() or 1, max(len(tasks), 1))
+        if workers == 1:
+            _init_backtest_state(spend, features)
+            try:
+                for cutoff, j in tasks:
+                    collect(j, _backtest_fold(cutoff, feature_sets[j], alphas))
+            finally:
+                _BACKTEST.clear()
+        else:
+            shm = shared_memory.SharedMemory(create=True, size=max(spend.nbytes, 1))
+            try:
+                np.ndarray(spend.shape, dtype='float64', buffer=shm.buf)[:] = spend
+                with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=_init_backtest_worker,
+                    initargs=(shm.name, spend.shape, features),
+                ) as pool:
+                    futures = {
+                        pool.submit(_backtest_fold, cutoff, feature_sets[j], alphas): j
+                        for cutoff, j in tasks
+                    }
+                    for fut in as_completed(futures):
+                        collect(futures[fut], fut.result())
+            finally:
+                shm.close()
+                shm.unlink()
+
+        # ---- tidy per key x feature set x alpha ----
+        frames = []
+        for j, fs in enumerate(feature_sets):
+            for i, alpha in enumerate(alphas):
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    out = keys.to_frame(index=False)
+                    out['feature_set'] = '+'.join(fs)
+                    out['alpha'] = alpha
+                    out['folds'] = scored[j]
+                    out['mae'] = np.where(scored[j] > 0, err_sum[j, i] / scored[j], np.nan)
+                    out['mape'] = np.where(ape_scored[j] > 0, ape_sum[j, i] / ape_scored[j], np.nan)
+                frames.append(out)
+        if not frames:
+            return pd.DataFrame(columns=[*keys.names, 'feature_set', 'alpha', 'folds', 'mae', 'mape'])
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def backtest_summary(results: pd.DataFrame) -> pd.DataFrame:
+        """Mean MAE / MAPE across keys per feature set x alpha, best first."""
+        scored = results[results['folds'] > 0]
+        return (
+            scored.groupby(['feature_set', 'alpha'], as_index=False)
+                  .agg(keys=('mae', 'size'), mae=('mae', 'mean'), mape=('mape', 'mean'))
+                  .sort_values('mae', ignore_index=True)
+        )
@@ -0,0 +1,259 @@
+import json
+import os
+import re
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, Sequence
+
+import pandas as pd
+
+from core.agent import STORAGE_BACKENDS, shared_agent
+from core.locking import FileLock
+from core.report import FinanceReport
+from core.storage import Storage
+
+# FinanceReport methods run_batch can call on every shard, plus 'predict'
+REPORT_TASKS = ['spend_summary', 'monthly_spend_by_category', 'query', 'totals', 'rolling_spend']
+BATCH_TASKS = REPORT_TASKS + ['predict']
+
+
+class ProfileStore:
+    """Many households' transaction stores (one shard per profile) under one root.
+
+    Layout:
+      <root>/catalog.json        profile -> shard entry
+      <root>/<profile>/          the profile's data_dir (store, cube, models, ...)
+
+    A catalog entry records the shard's path (relative to root), backend,
+    filename, row count, data version and when it was last updated. Entries
+    follow writes made through storage()/agent() in this process; writes
+    from elsewhere are picked up by refresh() (and by run_batch, which
+    reports every shard's current version). The catalog is rewritten
+    atomically under <root>/catalog.lock, so processes can share a root.
+
+    run_batch() runs a FinanceReport method or the budget prediction on
+    every shard in a process pool and yields each result as its shard
+    finishes.
+    """
+
+    name_re = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+    def __init__(self, root: str = 'profiles', filename: str = 'transactions.csv', backend: str = 'csv'):
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unsupported storage backend: {backend}. Choose from {list(STORAGE_BACKENDS)}")
+        self.root = root
+        self.filename = filename
+        self.backend = backend
+        self.catalog_path = os.path.join(root, 'catalog.json')
+        self.lock = FileLock(os.path.join(root, 'catalog.lock'))
+        self._storages = {}
+        self._subscribed = weakref.WeakSet()
+
+    # ------------------------------
+    # catalog
+    # ------------------------------
+    def catalog(self) -> dict:
+        """{profile: {'path', 'backend', 'filename', 'rows', 'data_version', 'updated'}}."""
+        try:
+            with open(self.catalog_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def profiles(self) -> list[str]:
+        return sorted(self.catalog())
+
+    def _update_catalog(self, entries: dict, remove: Sequence[str] = ()) -> None:
+        """Merge entries into the catalog file (read-modify-write under the lock)."""
+        with self.lock.exclusive():
+            catalog = self.catalog()
+            for profile, entry in entries.items():
+                catalog[profile] = {**catalog.get(profile, {}), **entry}
+            for profile in remove:
+                catalog.pop(profile, None)
+            tmp = f'{self.catalog_path}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(catalog, f, indent=2, sort_keys=True)
+            os.replace(tmp, self.catalog_path)
+
+    @staticmethod
+    def _shard_state(storage: Storage) -> dict:
+        return {
+            'rows': storage.summary()['rows'],
+            'data_version': storage.data_version(),
+            'updated': pd.Timestamp.now().isoformat(timespec='seconds'),
+        }
+
+    def create(self, profile: str, backend: str | None = None) -> Storage:
+        """Register a profile (no-op if it exists) and return its storage."""
+        if not self.name_re.match(profile):
+            raise ValueError(f"Invalid profile name: {profile!r} (letters, digits, '_', '-', '.')")
+        backend = backend or self.backend
+        if backend not in STORAGE_BACKENDS:
+            raise ValueError(f"Unsupported storage backend: {backend}. Choose from {list(STORAGE_BACKENDS)}")
+        entry = self.catalog().get(profile)
+        if entry is None:
+            os.makedirs(os.path.join(self.root, profile), exist_ok=True)
+            storage = STORAGE_BACKENDS[backend](os.path.join(self.root, profile), self.filename)
+            entry = {'path': profile, 'backend': backend, 'filename': self.filename, **self._shard_state(storage)}
+            self._update_catalog({profile: entry})
+        return self.storage(profile)
+
+    def remove(self, profile: str) -> None:
+        """Drop a profile from the catalog (its files are left in place)."""
+        self._storages.pop(profile, None)
+        self._update_catalog({}, remove=[profile])
+
+    def refresh(self, profiles: list[str] | None = None) -> dict:
+        """Re-read row count and data version of the given (default: all) shards."""
+        catalog = self.catalog()
+        profiles = list(catalog) if profiles is None else profiles
+        entries = {p: self._shard_state(self._open(p, catalog[p])) for p in profiles}
+        if entries:
+            self._update_catalog(entries)
+        return self.catalog()
+
+    # ------------------------------
+    # shards
+    # ------------------------------
+    def _open(self, profile: str, entry: dict) -> Storage:
+        return STORAGE_BACKENDS[entry['backend']](os.path.join(self.root, entry['path']), entry['filename'])
+
+    def _entry(self, profile: str) -> dict:
+        entry = self.catalog().get(profile)
+        if entry is None:
+            raise KeyError(f"Unknown profile: {profile!r}")
+        return entry
+
+    def _follow(self, profile: str, storage: Storage) -> Storage:
+        if storage not in self._subscribed:
+            storage.subscribe(_CatalogOnWrite(self, profile, storage))
+            self._subscribed.add(storage)
+        return storage
+
+    def storage(self, profile: str) -> Storage:
+        """The profile's Storage; writes through it keep the catalog entry current."""
+        storage = self._storages.get(profile)
+        if storage is None:
+            storage = self._storages[profile] = self._open(profile, self._entry(profile))
+        return self._follow(profile, storage)
+
+    def agent(self, profile: str):
+        """The process-wide Agent for a profile (see core.agent.shared_agent)."""
+        entry = self._entry(profile)
+        agent = shared_agent(os.path.join(self.root, entry['path']), entry['filename'], entry['backend'])
+        self._follow(profile, agent.storage)
+        return agent
+
+    # ------------------------------
+    # batch over all shards
+    # ------------------------------
+    def run_batch(
+        self,
+        task: str,
+        profiles: list[str] | None = None,
+        workers: int | None = None,
+        **params,
+    ) -> Iterator[dict]:
+        """Run `task` on every shard, yielding results as shards finish.
+
+        task is a FinanceReport method (REPORT_TASKS, called with
+        **params; spend_summary reads from the store) or 'predict'
+        (next-month forecast from the shard's persisted models). Yields
+        {'profile', 'task', 'result', 'error', 'rows', 'data_version',
+        'seconds'} in completion order; a failing shard reports its error
+        and does not stop the batch. Shards are spread over `workers`
+        processes (default: one per CPU), so a nightly run over many
+        profiles takes as long as the longest CPU's share of them. The
+        catalog is updated with every shard's row count and data version
+        once the batch ends.
+        """
+        if task not in BATCH_TASKS:
+            raise ValueError(f"Unsupported task: {task}. Choose from {BATCH_TASKS}")
+        catalog = self.catalog()
+        profiles = sorted(catalog) if profiles is None else list(profiles)
+        unknown = [p for p in profiles if p not in catalog]
+        if unknown:
+            raise KeyError(f"Unknown profiles: {unknown}")
+        jobs = {
+            p: (catalog[p]['backend'], os.path.join(self.root, catalog[p]['path']), catalog[p]['filename'])
+            for p in profiles
+        }
+        # Checked eagerly above; the shards run as the caller consumes results
+        return self._stream(task, jobs, workers, params)
+
+    def _stream(self, task: str, jobs: dict, workers: int | None, params: dict) -> Iterator[dict]:
+        seen = {}
+        try:
+            workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+            if workers == 1:
+                for profile, shard in jobs.items():
+                    result = _run_shard(*shard, task, params)
+                    seen[profile] = result
+                    yield {'profile': profile, **result}
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = {pool.submit(_run_shard, *shard, task, params): p for p, shard in jobs.items()}
+                    try:
+                        for fut in as_completed(futures):
+                            profile = futures.pop(fut)
+                            result = fut.result()
+                            seen[profile] = result
+                            yield {'profile': profile, **result}
+                    finally:
+                        # The caller stopped early: don't start the remaining shards
+                        pool.shutdown(cancel_futures=True)
+        finally:
+            # Also when the caller stops early: record what the finished shards reported
+            now = pd.Timestamp.now().isoformat(timespec='seconds')
+            entries = {
+                p: {'rows': r['rows'], 'data_version': r['data_version'], 'updated': now}
+                for p, r in seen.items() if r['data_version'] is not None
+            }
+            if entries:
+                self._update_catalog(entries)
+
+
+def _run_shard(backend: str, data_dir: str, filename: str, task: str, params: dict) -> dict:
+    """Worker: open one shard and run a batch task on it."""
+    t0 = time.perf_counter()
+    out = {'task': task, 'result': None, 'error': None, 'rows': None, 'data_version': None}
+    try:
+        storage = STORAGE_BACKENDS[backend](data_dir, filename)
+        out['rows'] = storage.summary()['rows']
+        out['data_version'] = storage.data_version()
+        if task == 'predict':
+            from core.model_store import ModelStore
+            out['result'] = ModelStore(storage).predict()
+        else:
+            if task == 'spend_summary':
+                params = {'df': None, **params}
+            out['result'] = getattr(FinanceReport(storage), task)(**params)
+    except Exception as e:
+        out['error'] = f'{type(e).__name__}: {e}'
+    out['seconds'] = time.perf_counter() - t0
+    return out
+
+
+class _CatalogOnWrite:
+    """Storage listener that keeps one profile's catalog entry current."""
+
+    def __init__(self, profiles: ProfileStore, profile: str, storage: Storage):
+        self.profiles = profiles
+        self.profile = profile
+        self.storage = storage
+
+    def _record(self, fp_after: list) -> None:
+        # The summary record is updated before listeners run, so this is cheap
+        self.profiles._update_catalog({self.profile: {
+            'rows': self.storage.summary()['rows'],
+            'data_version': json.dumps(fp_after),
+            'updated': pd.Timestamp.now().isoformat(timespec='seconds'),
+        }})
+
+    def on_insert(self, rows, fp_before, fp_after) -> None:
+        self._record(fp_after)
+
+    def on_rewrite(self, df, fp_after) -> None:
+        self._record(fp_after)
@@ -0,0 +1,117 @@
+import json
+import time
+from datetime import datetime, timezone
+
+
+class Span:
+    """One timed pipeline stage. Set rows_out / bytes_* inside the block."""
+
+    __slots__ = ('stage', 'rows_in', 'rows_out', 'bytes_read', 'bytes_written', 'seconds', '_profiler', '_t0')
+
+    def __init__(self, profiler, stage: str, rows_in: int | None = None):
+        self._profiler = profiler
+        self.stage = stage
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = None
+        self.bytes_written = None
+        self.seconds = None
+
+    def __enter__(self):
+        self._profiler._spans.append(self)
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self._t0
+        return False
+
+    def as_dict(self) -> dict:
+        return {
+            'stage': self.stage,
+            'seconds': self.seconds,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+        }
+
+
+class _NullSpan:
+    """Shared no-op span handed out while profiling is off.
+
+    Falsy, so call sites guard any extra measurement work with `if span:`.
+    """
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class PipelineProfiler:
+    """Per-stage wall time, rows in/out and bytes read/written.
+
+    Off by default: span() then returns NULL_SPAN and nothing is recorded.
+
+        with profiler.span('payment_filter', rows_in=len(df)) as span:
+            df = df[mask]
+            span.rows_out = len(df)
+
+    A stage that runs several times (e.g. once per chunk) is reported once
+    by summary(), with times, rows and bytes summed and `calls` counted.
+    If jsonl_path is set, emit() appends one JSON line per stage.
+    """
+
+    def __init__(self, enabled: bool = False, jsonl_path: str | None = None):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self._spans = []
+
+    def span(self, stage: str, rows_in: int | None = None):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, stage, rows_in)
+
+    def reset(self) -> None:
+        self._spans = []
+
+    def records(self) -> list[dict]:
+        """Raw spans in start order."""
+        return [s.as_dict() for s in self._spans]
+
+    def summary(self) -> list[dict]:
+        """Spans aggregated by stage, in order of first appearance."""
+        out = {}
+        for s in self._spans:
+            row = out.get(s.stage)
+            if row is None:
+                out[s.stage] = dict(s.as_dict(), calls=1)
+                continue
+            row['calls'] += 1
+            for k in ['seconds', 'rows_in', 'rows_out', 'bytes_read', 'bytes_written']:
+                v = getattr(s, k)
+                if v is not None:
+                    row[k] = v if row[k] is None else row[k] + v
+        return list(out.values())
+
+    def emit(self, **context) -> None:
+        """Append summary() as JSON lines, each tagged with `context`."""
+        if not self.enabled or not self.jsonl_path:
+            return
+        ts = datetime.now(timezone.utc).isoformat(timespec='milliseconds')
+        with open(self.jsonl_path, 'a') as f:
+            for row in self.summary():
+                f.write(json.dumps(dict(context, ts=ts, **row), default=str) + '\n')
@@ -1,81 +1,282 @@
+from typing import Sequence
+
 from core.storage import Storage
+from core.cache import QueryCache
+from core.cube import SpendCube
+from core.schema import is_compact
+import numpy as np
 import pandas as pd
 
+# Bucket sizes spend_summary(max_points=...) picks from, finest first
+RESOLUTIONS = [('day', 'D'), ('week', 'W'), ('month', 'M'), ('quarter', 'Q'), ('year', 'Y')]
+
+# FinanceReport.query vocabulary
+QUERY_DIMENSIONS = ['Category', 'Source', 'Merchant', 'Year', 'Month', 'weekday']
+QUERY_MEASURES = ['spend', 'refunds', 'net', 'count']
+QUERY_GRANULARITIES = ['day', 'week', 'month', 'quarter', 'year']
+
 
 class FinanceReport:
 
-    def __init__(self, storage: Storage):
+    def __init__(self, storage: Storage, use_cube: bool = True, query_cache_size: int = 64):
         self.storage = storage
-    
-    def monthly_spend_by_category(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        if df.empty:
-            return pd.DataFrame(columns=['month', 'Category', 'spend'])
+        # day x Category x Source aggregate, kept in sync with storage writes
+        self.cube = SpendCube(storage) if use_cube else None
+        # query() results, keyed by data version + normalized parameters
+        self.query_cache = QueryCache(query_cache_size)
+
+    # ------------------------------
+    # query engine
+    # ------------------------------
+    def query(
+        self,
+        dimensions: Sequence[str] = (),
+        measures: Sequence[str] = ('spend',),
+        filters: dict | None = None,
+        date_range: tuple | None = None,
+        granularity: str | None = None,
+        df: pd.DataFrame | None = None,
+    ) -> pd.DataFrame:
+        """Aggregate `measures` grouped by a time bucket and `dimensions`.
+
+        Returns [<granularity>, *dimensions, *measures], one row per group
+        that has at least one transaction, sorted by the group columns.
+
+          dimensions:  any of Category, Source, Merchant, Year, Month
+                       (calendar ints) and weekday (0 = Monday). A missing
+                       Category/Source/Merchant is its own group, NaN.
+          measures:    spend (positive Amount), refunds (|negative Amount|),
+                       net (spend - refunds), count (rows).
+          filters:     {dimension: value or list of values}; None matches
+                       a missing value.
+          date_range:  (start, end) inclusive days, either may be None.
+          granularity: None or day/week/month/quarter/year; adds a column
+                       of that name holding each bucket's first day
+                       (weeks start on Monday).
+
+        Rows without a valid Date or Amount are ignored. Queries that only
+        touch Category/Source run on the spend cube, others load just the
+        columns they need for the window (on SQLite the database groups
+        them by day instead). If df is given it is aggregated instead of
+        the store.
+
+        All groups are computed in one pass: every group column becomes
+        integer codes, the codes are combined mixed-radix into one key and
+        each measure is a bincount over it. Results from the store are kept
+        in self.query_cache until the data version changes; every call gets
+        its own copy.
+        """
+        dimensions, measures = list(dimensions), list(measures)
+        unknown = [d for d in dimensions if d not in QUERY_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unsupported dimensions: {unknown}. Choose from {QUERY_DIMENSIONS}")
+        unknown = [m for m in measures if m not in QUERY_MEASURES]
+        if unknown or not measures:
+            raise ValueError(f"Unsupported measures: {unknown or measures}. Choose from {QUERY_MEASURES}")
+        if granularity is not None and granularity not in QUERY_GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}. Choose from {QUERY_GRANULARITIES}")
+        filters = {
+            c: tuple(sorted(set(v if isinstance(v, (list, tuple, set)) else [v]), key=repr))
+            for c, v in sorted((filters or {}).items())
+        }
+        unknown = [c for c in filters if c not in QUERY_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unsupported filters: {unknown}. Choose from {QUERY_DIMENSIONS}")
+        start, end = date_range if date_range is not None else (None, None)
+        start_ts = None if start is None else pd.to_datetime(start).floor('D')
+        end_ts = None if end is None else pd.to_datetime(end).floor('D')
+
+        key = None
+        if df is None:
+            key = (
+                self.storage.data_version(), tuple(dimensions), tuple(measures),
+                tuple(filters.items()), start_ts, end_ts, granularity,
+            )
+            cached = self.query_cache.get(key)
+            if cached is not None:
+                return cached
+
+        facts, cents = self._query_facts(df, set(dimensions) | set(filters), start_ts, end_ts)
+        result = self._aggregate(facts, dimensions, measures, filters, granularity)
+        if cents:
+            for m in measures:
+                if m != 'count':
+                    result[m] = result[m] / 100
+
+        if key is not None:
+            self.query_cache.put(key, result)
+        return result
+
+    def _query_facts(self, df: pd.DataFrame | None, columns: set, start_ts, end_ts) -> tuple[pd.DataFrame, bool]:
+        """Rows to aggregate: ['day', *label columns, 'spend', 'refunds', 'count'].
 
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-        df = df.dropna(subset=['Date', 'Amount'])
+        Returns (facts, cents): cents is True when spend/refunds are integer
+        cents (compact frames), to be converted after summing.
+        """
+        labels = [c for c in ('Category', 'Source', 'Merchant') if c in columns]
+        if df is None and self.cube is not None and 'Merchant' not in labels:
+            cube = self.cube.window(start_ts, end_ts)
+            cube = cube[cube['count'] > 0]
+            return cube[['day', *labels, 'spend', 'refunds', 'count']], False
+
+        if df is None and hasattr(self.storage, 'query_facts'):
+            # The backend groups by day itself (SQLite)
+            return self.storage.query_facts(labels, start_ts, end_ts), False
+        if df is None:
+            end = None if end_ts is None else end_ts + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+            df = self.storage.load_transactions(columns=['Date', 'Amount', *labels], start=start_ts, end=end)
+        cents = is_compact(df)
+        amount = pd.to_numeric(df['AmountCents'] if cents else df['Amount'], errors='coerce')
+        day = pd.to_datetime(df['Date'], errors='coerce').dt.floor('D')
+        keep = day.notna() & amount.notna()
+        if start_ts is not None:
+            keep &= day >= start_ts
+        if end_ts is not None:
+            keep &= day <= end_ts
+        amount = amount[keep].astype('float64')
+        facts = pd.DataFrame({'day': day[keep]})
+        for c in labels:
+            facts[c] = df.loc[keep, c]
+        facts['spend'] = amount.clip(lower=0)
+        facts['refunds'] = (-amount).clip(lower=0)
+        facts['count'] = np.ones(len(facts), dtype=np.int64)
+        return facts, cents
+
+    @staticmethod
+    def _aggregate(facts: pd.DataFrame, dimensions: list, measures: list, filters: dict, granularity: str | None) -> pd.DataFrame:
+        days = facts['day'].to_numpy().astype('datetime64[D]')
+        day_num = days.astype(np.int64)
+        months = days.astype('datetime64[M]').astype(np.int64)   # months since 1970-01
+
+        def column(name: str):
+            if name == 'weekday':
+                return (day_num + 3) % 7  # 1970-01-01 was a Thursday
+            if name == 'Year':
+                return months // 12 + 1970
+            if name == 'Month':
+                return months % 12 + 1
+            return facts[name].astype(object).to_numpy()
 
-        if df.empty:
-            return pd.DataFrame(columns=['month', 'Category', 'spend'])
+        keep = np.ones(len(facts), dtype=bool)
+        for name, values in filters.items():
+            col = pd.Series(column(name))
+            match = col.isin([v for v in values if v is not None])
+            if None in values:
+                match |= col.isna()
+            keep &= match.to_numpy()
 
-        df['month'] = df['Date'].dt.to_period('M').astype(str)
-        df['spend'] = df['Amount']
+        group_cols, arrays = list(dimensions), [column(d) for d in dimensions]
+        if granularity is not None:
+            if granularity == 'day':
+                start = days
+            elif granularity == 'week':
+                start = days - (day_num + 3) % 7
+            elif granularity == 'month':
+                start = months.astype('datetime64[M]').astype('datetime64[D]')
+            elif granularity == 'quarter':
+                start = (months - months % 3).astype('datetime64[M]').astype('datetime64[D]')
+            else:
+                start = days.astype('datetime64[Y]').astype('datetime64[D]')
+            group_cols.insert(0, granularity)
+            arrays.insert(0, start)
 
-        monthly = (
-            df.groupby(['month', 'Category'], as_index=False)['spend']
-            .sum()
+        # Mixed-radix key over the sorted codes of every group column
+        combined = np.zeros(int(keep.sum()), dtype=np.int64)
+        levels = []
+        for values in arrays:
+            codes, uniques = pd.factorize(values[keep], sort=True, use_na_sentinel=False)
+            combined = combined * max(len(uniques), 1) + codes
+            levels.append(uniques)
+        present, row_codes = np.unique(combined, return_inverse=True)
+
+        out = {}
+        for name, uniques in reversed(list(zip(group_cols, levels))):
+            size = max(len(uniques), 1)
+            out[name] = np.asarray(uniques).take(present % size) if len(present) else np.asarray(uniques)[:0]
+            present = present // size
+        result = pd.DataFrame({name: out[name] for name in group_cols})
+        if granularity is not None:
+            result[granularity] = result[granularity].astype('datetime64[ns]')
+        for name in ('Year', 'Month', 'weekday'):
+            if name in result.columns:
+                result[name] = result[name].astype(np.int64)
+
+        sums = {
+            m: np.bincount(row_codes, weights=facts[m].to_numpy(dtype='float64')[keep], minlength=len(result))
+            for m in ('spend', 'refunds', 'count')
+        }
+        for m in measures:
+            if m == 'net':
+                result[m] = sums['spend'] - sums['refunds']
+            elif m == 'count':
+                result[m] = sums['count'].round().astype(np.int64)
+            else:
+                result[m] = sums[m]
+        return result
+
+    # ------------------------------
+    # standard reports
+    # ------------------------------
+    def monthly_spend_by_category(self, df: pd.DataFrame | None = None) -> pd.DataFrame:
+        """Net Amount per (month, Category), months as 'YYYY-MM', biggest first within a month."""
+        monthly = self.query(['Category'], ['net'], granularity='month', df=df)
+        monthly = monthly[monthly['Category'].notna()]
+        return (
+            pd.DataFrame({
+                'month': monthly['month'].dt.strftime('%Y-%m'),
+                'Category': monthly['Category'],
+                'spend': monthly['net'],
+            })
             .sort_values(['month', 'spend'], ascending=[True, False])
+            .reset_index(drop=True)
         )
 
-        return monthly
-    
     def spend_summary(
         self,
-        df: pd.DataFrame,
+        df: pd.DataFrame | None,
         start,
         end,
-        fill_missing_days: bool = True
+        fill_missing_days: bool = True,
+        max_points: int | None = None,
+        method: str = 'bucket',
     ) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
         Return (spend_by_category, spend_per_day) within [start, end] inclusive.
 
+        If df is None the window is answered by query() from the spend cube
+        in O(days in range) (or from the window's columns without a cube);
+        otherwise df is aggregated.
+
+        max_points bounds the length of spend_per_day (for charts and
+        tables over long ranges). spend_per_day then also carries
+        'bucket_start' / 'bucket_end' (the inclusive days each row covers)
+        and attrs['resolution'] says what a row is:
+          - method='bucket': spend summed per day, week (Mon-Sun), month,
+            quarter or year, the finest that fits; 'day' is the bucket
+            start, clipped to the range
+          - method='lttb': the daily points that best keep the line's
+            shape (see downsample_lttb); each row is one real day
+
         Global Amount contract:
           - spend  = positive Amount
           - refund = negative Amount
         """
-        df = df.copy()
-
-
         # Inclusive date range (normalize to day boundaries)
         start_ts = pd.to_datetime(start).floor('D')
         end_ts = pd.to_datetime(end).floor('D') + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
 
-        df = df[(df['Date'] >= start_ts) & (df['Date'] <= end_ts)]
-
-        # Spend only (exclude refunds/credits)
-        df = df[df['Amount'] > 0].copy()
-
-        # Category
-        df['Category'] = df['Category'].fillna('Uncategorized').astype(str)
-
-        # ---- spend by category ----
-        by_category = (
-            df.groupby('Category', as_index=False)['Amount']
-              .sum()
-              .rename(columns={'Amount': 'spend'})
-              .reset_index(drop=True)
-        )
+        by_category = self.query(['Category'], ['spend'], date_range=(start_ts, end_ts), df=df)
+        by_category = by_category[by_category['spend'] > 0]
+        if by_category['Category'].isna().any():
+            by_category = (
+                by_category.assign(Category=by_category['Category'].fillna('Uncategorized'))
+                           .groupby('Category', as_index=False)['spend']
+                           .sum()
+            )
+        by_category = by_category.assign(Category=by_category['Category'].astype(str)).reset_index(drop=True)
 
-        # ---- spend per day ----
-        df['day'] = df['Date'].dt.floor('D')
-        by_day = (
-            df.groupby('day', as_index=False)['Amount']
-              .sum()
-              .rename(columns={'Amount': 'spend'})
-              .sort_values('day')
-              .reset_index(drop=True)
-        )
+        by_day = self.query([], ['spend'], date_range=(start_ts, end_ts), granularity='day', df=df)
+        by_day = by_day[by_day['spend'] > 0].reset_index(drop=True)
 
         if fill_missing_days:
             all_days = pd.date_range(start=start_ts.floor('D'), end=end_ts.floor('D'), freq='D')
@@ -86,5 +287,198 @@ class FinanceReport:
                       .reset_index()
             )
 
+        if max_points is not None:
+            by_day = self._downsample_days(by_day, start_ts, end_ts, max_points, method, fill_missing_days)
+
         return by_category, by_day
-        
\ No newline at end of file
+
+    def totals(self, start=None, end=None) -> dict:
+        """Gross spend, credits and net for [start, end] inclusive (open-ended if None)."""
+        start_ts = None if start is None else pd.to_datetime(start).floor('D')
+        end_ts = None if end is None else pd.to_datetime(end).floor('D') + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+
+        if self.cube is not None:
+            cube = self.cube.window(start_ts, end_ts)
+            gross, credits = float(cube['spend'].sum()), float(cube['refunds'].sum())
+        else:
+            df = self.storage.load_transactions(columns=['Date', 'Amount'], start=start_ts, end=end_ts)
+            amount = pd.to_numeric(df['Amount'], errors='coerce').dropna()
+            gross, credits = float(amount[amount > 0].sum()), float(-amount[amount < 0].sum())
+        return {'gross_spend': gross, 'credits': credits, 'net': gross - credits}
+
+    # ------------------------------
+    # chart resolution
+    # ------------------------------
+    @staticmethod
+    def _downsample_days(by_day: pd.DataFrame, start_ts, end_ts, max_points: int, method: str, fill: bool) -> pd.DataFrame:
+        if method == 'lttb':
+            out = downsample_lttb(by_day, max_points, x='day', y='spend')
+            out.attrs['resolution'] = 'day'
+            return out
+        if method != 'bucket':
+            raise ValueError(f"Unsupported method: {method}. Choose from ['bucket', 'lttb']")
+        if max_points < 1:
+            raise ValueError(f"max_points must be at least 1, got {max_points}")
+
+        first, last = start_ts.floor('D'), end_ts.floor('D')
+        for resolution, freq in RESOLUTIONS:
+            periods = pd.period_range(first, last, freq=freq)
+            if len(periods) <= max_points:
+                break
+
+        if resolution == 'day':
+            out = by_day.assign(bucket_start=by_day['day'], bucket_end=by_day['day'])
+        else:
+            sums = by_day.groupby(by_day['day'].dt.to_period(freq))['spend'].sum()
+            # Without filling, only buckets with at least one spend day are returned
+            sums = sums.reindex(periods, fill_value=0) if fill else sums.reindex(periods).dropna()
+            bucket_start = pd.Series(sums.index.start_time.normalize()).clip(lower=first)
+            bucket_end = pd.Series(sums.index.end_time.normalize()).clip(upper=last)
+            out = pd.DataFrame({
+                'day': bucket_start,
+                'spend': sums.to_numpy(dtype='float64'),
+                'bucket_start': bucket_start,
+                'bucket_end': bucket_end,
+            })
+        out = out.reset_index(drop=True)
+        out.attrs['resolution'] = resolution
+        return out
+
+    # ------------------------------
+    # rolling windows
+    # ------------------------------
+    def rolling_spend(
+        self,
+        windows: Sequence[int] = (7, 30, 90, 365),
+        by: Sequence[str] = ('Category', 'Source'),
+        start=None,
+        end=None,
+        measure: str = 'spend',
+    ) -> pd.DataFrame:
+        """Trailing-window totals for every day and group, tidy for charting.
+
+        Returns ['day', *by, 'window', measure]: for each day in [start, end]
+        (default: the stored date range), the sum of `measure` over the
+        `window` days ending on that day, inclusive. Days before start still
+        count towards the windows. `by` may be any subset of Category/Source
+        ([] for one overall series); a missing value is labelled
+        'Uncategorized' / 'Unknown'.
+
+        measure: 'spend' (positive Amount), 'refunds', 'net' (spend -
+        refunds) or 'count'.
+
+        One prefix sum over a dense day x group matrix; each window is then a
+        single subtraction of shifted rows, so the cost is O(days x groups)
+        plus the size of the output.
+        """
+        by = list(by)
+        if measure not in ('spend', 'refunds', 'net', 'count'):
+            raise ValueError(f"Unsupported measure: {measure}. Choose from ['spend', 'refunds', 'net', 'count']")
+        unknown = [c for c in by if c not in ('Category', 'Source')]
+        if unknown:
+            raise ValueError(f"Unsupported group columns: {unknown}. Choose from ['Category', 'Source']")
+        windows = sorted({int(w) for w in windows})
+        if not windows or windows[0] < 1:
+            raise ValueError(f"windows must be positive day counts, got {windows}")
+
+        out_cols = ['day', *by, 'window', measure]
+        if self.cube is not None:
+            cube = self.cube.frame()
+        else:
+            cube = SpendCube.aggregate(self.storage.load_transactions(columns=['Date', 'Amount', 'Category', 'Source']))
+        if cube.empty:
+            return pd.DataFrame(columns=out_cols)
+
+        values = (cube['spend'] - cube['refunds']) if measure == 'net' else cube[measure]
+        values = values.to_numpy(dtype='float64')
+
+        # ---- dense day x group matrix ----
+        days = cube['day'].to_numpy().astype('datetime64[D]')
+        first = days.min()
+        last = days.max() if end is None else max(days.max(), np.datetime64(pd.to_datetime(end).floor('D').date(), 'D'))
+        n_days = int((last - first).astype(np.int64)) + 1
+        day_idx = (days - first).astype(np.int64)
+
+        if by:
+            labels = cube[by].astype(object).copy()
+            if 'Category' in by:
+                labels['Category'] = labels['Category'].fillna('Uncategorized')
+            if 'Source' in by:
+                labels['Source'] = labels['Source'].fillna('Unknown')
+            groups = labels.groupby(by, sort=True).ngroup().to_numpy()
+            keys = labels.drop_duplicates().sort_values(by).reset_index(drop=True)
+        else:
+            groups = np.zeros(len(cube), dtype=np.int64)
+            keys = pd.DataFrame(index=[0])
+        n_groups = len(keys)
+
+        dense = np.bincount(day_idx * n_groups + groups, weights=values, minlength=n_days * n_groups)
+        csum = np.vstack([np.zeros((1, n_groups)), np.cumsum(dense.reshape(n_days, n_groups), axis=0)])
+
+        # ---- output rows: days in [start, end] ----
+        lo = 0 if start is None else max(int((np.datetime64(pd.to_datetime(start).floor('D').date(), 'D') - first).astype(np.int64)), 0)
+        hi = n_days
+        if end is not None:
+            hi = min(int((np.datetime64(pd.to_datetime(end).floor('D').date(), 'D') - first).astype(np.int64)) + 1, n_days)
+        if hi <= lo:
+            return pd.DataFrame(columns=out_cols)
+
+        t = np.arange(lo, hi)
+        blocks = [csum[t + 1] - csum[np.maximum(t + 1 - w, 0)] for w in windows]   # each (days x groups)
+        n_out = len(t)
+
+        out = pd.DataFrame({
+            'day': np.tile(np.repeat(first + t, n_groups), len(windows)).astype('datetime64[ns]'),
+        })
+        for c in by:
+            out[c] = np.tile(keys[c].to_numpy(), n_out * len(windows))
+        out['window'] = np.repeat(windows, n_out * n_groups)
+        out[measure] = np.concatenate([b.ravel() for b in blocks])
+        if measure == 'count':
+            out[measure] = out[measure].round().astype(np.int64)
+        return out
+
+
+
+def downsample_lttb(df: pd.DataFrame, max_points: int, x: str = 'day', y: str = 'spend') -> pd.DataFrame:
+    """Keep at most max_points rows of a line series, preserving its shape.
+
+    Largest-Triangle-Three-Buckets: the first and last rows are kept and
+    the rows between are split into max_points - 2 equal buckets; from
+    each bucket the row forming the largest triangle with the previously
+    kept row and the next bucket's mean is kept. `df` must be sorted by
+    `x` (datetime or numeric). Adds 'bucket_start' / 'bucket_end', the
+    first and last `x` of the bucket each kept row stands for.
+    """
+    if max_points < 3:
+        raise ValueError(f"max_points must be at least 3 for LTTB, got {max_points}")
+    df = df.reset_index(drop=True)
+    n = len(df)
+    if n <= max_points:
+        return df.assign(bucket_start=df[x], bucket_end=df[x])
+
+    xs = df[x]
+    xv = (xs - xs.iloc[0]) / pd.Timedelta(days=1) if pd.api.types.is_datetime64_any_dtype(xs) else xs
+    xv = np.asarray(xv, dtype='float64')
+    yv = df[y].to_numpy(dtype='float64')
+
+    # Bucket k is rows edges[k]:edges[k + 1]; the first and last buckets hold one row each
+    edges = np.empty(max_points + 1, dtype=np.int64)
+    edges[0] = 0
+    edges[1:max_points] = 1 + (np.arange(max_points - 1) * (n - 2)) // (max_points - 2)
+    edges[max_points] = n
+
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for k in range(1, max_points - 1):
+        lo, hi, nxt = edges[k], edges[k + 1], edges[k + 2]
+        cx, cy = xv[hi:nxt].mean(), yv[hi:nxt].mean()
+        area = np.abs((xv[a] - cx) * (yv[lo:hi] - yv[a]) - (xv[a] - xv[lo:hi]) * (cy - yv[a]))
+        a = lo + int(area.argmax())
+        keep[k] = a
+
+    out = df.iloc[keep].reset_index(drop=True)
+    out['bucket_start'] = xs.iloc[edges[:-1]].to_numpy()
+    out['bucket_end'] = xs.iloc[edges[1:] - 1].to_numpy()
+    return out
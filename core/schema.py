@@ -0,0 +1,119 @@
+import pandas as pd
+import pyarrow as pa
+
+from core.categories import AMEX_CATEGORY_RULES, AMEX_DEFAULT_CATEGORY
+
+
+# ------------------------------
+# Shared dictionaries
+# ------------------------------
+# Codes of known values never change; unseen values are appended after them
+# (sorted), so frames loaded at different times share category codes.
+CATEGORY_DICTIONARY = list(dict.fromkeys(
+    [target for target, _, _ in AMEX_CATEGORY_RULES if target is not None]
+    + [
+        AMEX_DEFAULT_CATEGORY,
+        # Discover-only categories
+        'Automotive',
+        'Home Improvement',
+        'Medical Services',
+        'Services',
+        'Uncategorized',
+    ]
+))
+
+SOURCE_DICTIONARY = ['AMEX', 'DISCOVER']
+
+TX_ID_TYPE = pa.binary(20)
+
+# Compact schema: tx_id as 20-byte binary, AmountCents replaces Amount
+COMPACT_COLS = ['tx_id', 'Date', 'Day', 'Month', 'Year', 'AmountCents', 'Category', 'Description', 'Source', 'Merchant']
+
+
+def is_compact(df: pd.DataFrame) -> bool:
+    return 'AmountCents' in df.columns
+
+
+def _categorical(values: pd.Series, dictionary: list) -> pd.Series:
+    extra = sorted(set(values.dropna().astype(str).unique()) - set(dictionary))
+    return pd.Categorical(values.astype(object), categories=dictionary + extra)
+
+
+def encode_tx_ids(tx_ids: pd.Series) -> pd.Series:
+    """40-char hex sha1 ids -> fixed 20-byte binary column.
+
+    Ids of other shapes (manual entries, missing ids) have no 20-byte form:
+    if any is present the column stays as object strings.
+    """
+    ids = tx_ids.astype(object)
+    if not tx_ids.astype(str).str.fullmatch(r'[0-9a-f]{40}', na=False).all():
+        return ids
+    buf = pa.py_buffer(bytes.fromhex(''.join(ids.tolist())))
+    arr = pa.FixedSizeBinaryArray.from_buffers(TX_ID_TYPE, len(ids), [None, buf])
+    return pd.Series(arr, index=tx_ids.index, dtype=pd.ArrowDtype(TX_ID_TYPE))
+
+
+def decode_tx_ids(tx_ids: pd.Series) -> pd.Series:
+    """20-byte binary column -> 40-char hex sha1 ids (object columns pass through)."""
+    if tx_ids.dtype != pd.ArrowDtype(TX_ID_TYPE):
+        return tx_ids.astype(object)
+    hexed = b''.join(tx_ids.tolist()).hex()
+    return pd.Series([hexed[i:i + 40] for i in range(0, len(hexed), 40)], index=tx_ids.index, dtype=object)
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Canonical frame -> compact in-memory representation.
+
+    - tx_id: 20-byte binary (pyarrow fixed_size_binary), or object if an id
+      is not a hex sha1 (see encode_tx_ids)
+    - Category/Source: categoricals over the shared dictionaries
+    - Description/Merchant: categorical (merchant strings repeat heavily)
+    - Day/Month/Year: small nullable ints
+    - AmountCents: nullable int64 cents (exact sums, no float drift)
+    """
+    if is_compact(df):
+        return df
+
+    out = pd.DataFrame(index=df.index)
+    if 'tx_id' in df.columns:
+        out['tx_id'] = encode_tx_ids(df['tx_id'])
+    if 'Date' in df.columns:
+        out['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    for c, dtype in [('Day', 'Int8'), ('Month', 'Int8'), ('Year', 'Int16')]:
+        if c in df.columns:
+            out[c] = pd.to_numeric(df[c], errors='coerce').astype(dtype)
+    if 'Amount' in df.columns:
+        amount = pd.to_numeric(df['Amount'], errors='coerce')
+        out['AmountCents'] = (amount * 100).round().astype('Int64')
+    if 'Category' in df.columns:
+        out['Category'] = _categorical(df['Category'], CATEGORY_DICTIONARY)
+    if 'Description' in df.columns:
+        out['Description'] = df['Description'].astype('category')
+    if 'Source' in df.columns:
+        out['Source'] = _categorical(df['Source'], SOURCE_DICTIONARY)
+    if 'Merchant' in df.columns:
+        out['Merchant'] = df['Merchant'].astype('category')
+    return out
+
+
+def to_canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Compact frame -> canonical dtypes (no-op for canonical frames)."""
+    if not is_compact(df):
+        return df
+
+    out = pd.DataFrame(index=df.index)
+    for c in df.columns:
+        if c == 'tx_id':
+            out['tx_id'] = decode_tx_ids(df['tx_id'])
+        elif c == 'AmountCents':
+            out['Amount'] = df['AmountCents'].astype('float64') / 100
+        elif c in ('Category', 'Description', 'Source', 'Merchant'):
+            out[c] = df[c].astype(object)
+        else:
+            out[c] = df[c]
+    return out
+
+
+def memory_per_row(df: pd.DataFrame) -> float:
+    """Deep memory footprint in bytes per row."""
+    return float(df.memory_usage(deep=True, index=False).sum()) / max(len(df), 1)
@@ -0,0 +1,266 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from core.descriptions import DESCRIPTIONS
+from core.schema import to_canonical
+from core.storage import Storage
+
+
+class SQLiteStorage(Storage):
+    """Embedded SQLite storage for canonical transactions.
+
+    Table `transactions` with:
+      - UNIQUE index on tx_id (dedup via INSERT OR IGNORE)
+      - index on Date
+      - composite index on (Date, Category)
+
+    Date is stored as ISO text ('YYYY-MM-DD HH:MM:SS') so range predicates
+    use the Date indexes.
+
+    The database's own WAL journal gives readers snapshots and serializes
+    inserts; writers still hold the store lock (see Storage) around each
+    write and its listener updates so derived files follow commit order.
+
+    Same public API as Storage, plus query_facts(labels, start, end), which
+    pushes the date window and the per-day aggregation of
+    FinanceReport.query down to the database when no spend cube is used.
+    """
+
+    sql_types = {
+        'tx_id': 'TEXT NOT NULL',
+        'Date': 'TEXT',
+        'Day': 'INTEGER',
+        'Month': 'INTEGER',
+        'Year': 'INTEGER',
+        'Amount': 'REAL',
+        'Category': 'TEXT',
+        'Description': 'TEXT',
+        'Source': 'TEXT',
+        'Merchant': 'TEXT',
+    }
+
+    def __init__(self, data_dir: str = 'agent_data', filename: str = 'transactions.csv'):
+        super().__init__(data_dir, filename)
+        self.db_path = os.path.join(self.data_dir, os.path.splitext(self.filename)[0] + '.sqlite')
+        # Database and schema are created on the first connection
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    # ------------------------------
+    # connection / schema
+    # ------------------------------
+    def _connect(self) -> sqlite3.Connection:
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    os.makedirs(self.data_dir, exist_ok=True)
+                    self._init_schema()
+                    self._schema_ready = True
+        return self._open()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _init_schema(self) -> None:
+        cols = ', '.join(f'"{c}" {self.sql_types[c]}' for c in self.canonical_cols)
+        with closing(self._open()) as conn, conn:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS transactions ({cols})')
+            conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS ux_transactions_tx_id ON transactions (tx_id)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_transactions_date ON transactions (Date)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_transactions_date_category ON transactions (Date, Category)')
+            conn.execute('CREATE TABLE IF NOT EXISTS meta (generation INTEGER NOT NULL)')
+            if conn.execute('SELECT COUNT(*) FROM meta').fetchone()[0] == 0:
+                conn.execute('INSERT INTO meta (generation) VALUES (0)')
+            if self._add_missing_columns(conn):
+                self._bump_generation(conn)
+
+    def _add_missing_columns(self, conn: sqlite3.Connection) -> bool:
+        """Bring a database created before a canonical column existed up to date."""
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(transactions)')}
+        missing = [c for c in self.canonical_cols if c not in existing]
+        for c in missing:
+            conn.execute(f'ALTER TABLE transactions ADD COLUMN "{c}" {self.sql_types[c]}')
+
+        if 'Merchant' in missing:
+            # Derive once per distinct description, then fill with one joined UPDATE
+            descriptions = pd.Series([row[0] for row in conn.execute(
+                'SELECT DISTINCT Description FROM transactions WHERE Description IS NOT NULL'
+            )], dtype=object)
+            merchants = DESCRIPTIONS.lookup(descriptions, 'merchant')
+            conn.execute('CREATE TEMP TABLE merchant_map (Description TEXT PRIMARY KEY, Merchant TEXT)')
+            conn.executemany('INSERT INTO merchant_map VALUES (?, ?)', zip(descriptions.tolist(), merchants.tolist()))
+            conn.execute(
+                'UPDATE transactions SET Merchant = '
+                '(SELECT Merchant FROM merchant_map m WHERE m.Description = transactions.Description)'
+            )
+            conn.execute('DROP TABLE merchant_map')
+        return bool(missing)
+
+    def _to_rows(self, df: pd.DataFrame) -> list[tuple]:
+        df = self._derive_columns(to_canonical(df))[self.canonical_cols].copy()
+        df['Date'] = pd.to_datetime(df['Date'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S')
+        df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None))
+
+    def _insert(self, conn: sqlite3.Connection, rows: list[tuple]) -> int:
+        cols = ', '.join(f'"{c}"' for c in self.canonical_cols)
+        params = ', '.join('?' for _ in self.canonical_cols)
+        before = conn.total_changes
+        conn.executemany(f'INSERT OR IGNORE INTO transactions ({cols}) VALUES ({params})', rows)
+        return conn.total_changes - before
+
+    def _where_dates(self, start, end) -> tuple[str, list]:
+        """SQL predicate + params for an inclusive [start, end] day window."""
+        start_ts, end_ts = self._date_bounds(start, end)
+        clauses, params = [], []
+        if start_ts is not None:
+            clauses.append('Date >= ?')
+            params.append(start_ts.strftime('%Y-%m-%d %H:%M:%S'))
+        if end_ts is not None:
+            clauses.append('Date < ?')
+            params.append((end_ts.floor('D') + pd.Timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S'))
+        return (' AND '.join(clauses) or '1=1'), params
+
+    # ------------------------------
+    # public API
+    # ------------------------------
+    def load_transactions(self, columns: list | None = None, start=None, end=None) -> pd.DataFrame:
+        cols = self._project(columns)
+        where, params = self._where_dates(start, end)
+        select = ', '.join(f'"{c}"' for c in cols)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                f'SELECT {select} FROM transactions WHERE {where} ORDER BY Date, Amount DESC',
+                conn, params=params,
+            )
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+        if 'Amount' in df.columns:
+            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+        return df
+
+    def save_transactions(self, df: pd.DataFrame) -> None:
+        """Replace all stored transactions in a single transaction."""
+        with self._writing():
+            with closing(self._connect()) as conn, conn:
+                conn.execute('DELETE FROM transactions')
+                self._insert(conn, self._to_rows(df))
+                self._bump_generation(conn)
+            self._after_rewrite(df)
+
+    def merge_and_save(self, new_df: pd.DataFrame, owner: np.ndarray | None = None) -> dict:
+        """Insert new transactions; duplicates on tx_id are ignored by the unique index.
+
+        `owner` labels rows as in Storage.merge_and_save.
+        """
+        # Row conversion is the expensive part: do it before taking the lock
+        rows = self._to_rows(new_df)
+        with self._writing():
+            fp_before = self._fingerprint()
+            with closing(self._connect()) as conn, conn:
+                before = conn.execute('SELECT COUNT(*) FROM transactions').fetchone()[0]
+                max_rowid = conn.execute('SELECT COALESCE(MAX(rowid), 0) FROM transactions').fetchone()[0]
+                with self.profiler.span('insert', rows_in=len(new_df)) as span:
+                    size_before = self._data_bytes() if span else 0
+                    inserted = self._insert(conn, rows)
+                    if inserted:
+                        self._bump_generation(conn)
+                    if span:
+                        span.rows_out = inserted
+                        span.bytes_written = self._data_bytes() - size_before
+
+            if inserted:
+                # Rows that survived INSERT OR IGNORE are exactly those past the old max rowid
+                with closing(self._connect()) as conn:
+                    added = pd.read_sql_query('SELECT * FROM transactions WHERE rowid > ?', conn, params=[max_rowid])
+                added['Date'] = pd.to_datetime(added['Date'], errors='coerce')
+                self._after_insert(added, fp_before)
+
+        counts = []
+        if owner is not None and inserted:
+            # INSERT OR IGNORE keeps the first row per tx_id (tx_id is the first column)
+            tx_ids = pd.Series([r[0] for r in rows])
+            is_new = (tx_ids.isin(added['tx_id']) & ~tx_ids.duplicated()).to_numpy()
+            counts = np.bincount(np.asarray(owner)[is_new]).tolist()
+        return self._owner_stats({
+            'existing_rows': before,
+            'incoming_rows': len(new_df),
+            'final_rows': before + inserted,
+            'inserted': inserted,
+            'skipped': len(new_df) - inserted,
+        }, owner, counts)
+
+    def compact(self) -> None:
+        """Rows are always returned in (Date, Amount) order; just reclaim space."""
+        with self._writing():
+            with closing(self._connect()) as conn:
+                conn.execute('VACUUM')
+                conn.execute('ANALYZE')
+
+    def reset_file(self) -> None:
+        with self._writing():
+            with closing(self._connect()) as conn, conn:
+                conn.execute('DELETE FROM transactions')
+                self._bump_generation(conn)
+            self._after_rewrite(pd.DataFrame(columns=self.canonical_cols))
+
+    def _data_files(self) -> list[str]:
+        return [p for p in [self.db_path, self.db_path + '-wal'] if os.path.exists(p)]
+
+    def _fingerprint(self) -> list:
+        # File stats are unreliable under WAL (checkpoints touch the db file),
+        # so every write bumps a generation counter instead
+        with closing(self._connect()) as conn:
+            return [['generation', conn.execute('SELECT generation FROM meta').fetchone()[0]]]
+
+    def _write_commit_record(self) -> None:
+        # Readers get snapshots from SQLite itself
+        pass
+
+    @staticmethod
+    def _bump_generation(conn: sqlite3.Connection) -> None:
+        conn.execute('UPDATE meta SET generation = generation + 1')
+
+    def _rebuild_index(self, tx_ids: pd.Series) -> None:
+        # The UNIQUE index on tx_id replaces the sidecar index
+        pass
+
+    # ------------------------------
+    # pushed-down queries
+    # ------------------------------
+    def query_facts(self, labels: list[str], start=None, end=None) -> pd.DataFrame:
+        """Per-day totals for FinanceReport.query: ['day', *labels, 'spend', 'refunds', 'count'].
+
+        One row per (day, *labels) with a valid Date and Amount within
+        [start, end] inclusive; grouping and sums run in the database.
+        """
+        unknown = [c for c in labels if c not in self.canonical_cols]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}. Canonical columns: {self.canonical_cols}")
+        where, params = self._where_dates(start, end)
+        cols = ''.join(f', "{c}"' for c in labels)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(
+                f"""
+                SELECT substr(Date, 1, 10) AS day{cols},
+                       SUM(MAX(Amount, 0)) AS spend,
+                       SUM(MAX(-Amount, 0)) AS refunds,
+                       COUNT(*) AS count
+                FROM transactions
+                WHERE {where} AND Date IS NOT NULL AND Amount IS NOT NULL
+                GROUP BY {', '.join(str(i) for i in range(1, len(labels) + 2))}
+                ORDER BY 1
+                """,
+                conn, params=params,
+            )
+        df['day'] = pd.to_datetime(df['day'])
+        return df
@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+
+class StatementCache:
+    """On-disk cache of parsed statements, keyed by file content.
+
+    A statement's canonical frame (Ingestion.ingest output) is a pure
+    function of its bytes and firm, so re-uploading the same file can skip
+    parsing. Entries are Parquet files named by
+    sha256(content) + firm + PARSER_VERSION; bump PARSER_VERSION whenever
+    parsing or tx_id rules change so stale entries stop matching.
+
+    The directory is bounded to `max_bytes` with LRU eviction: hits touch
+    the entry's mtime and puts evict the least recently used files.
+    """
+
+    PARSER_VERSION = 2
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 2**20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # The directory is created by the first put()
+
+    def key(self, path: str, firm: str) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        return f'{h.hexdigest()}-{firm.strip().upper()}-v{self.PARSER_VERSION}'
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.parquet')
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        path = self._path(key)
+        try:
+            df = pd.read_parquet(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return df
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        path = self._path(key)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        os.makedirs(self.cache_dir, exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        out = []
+        if not os.path.isdir(self.cache_dir):
+            return out
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.parquet'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            out.append((st.st_mtime, st.st_size, path))
+        return out
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        # Oldest first; the newest entry survives even if it alone exceeds the bound
+        for _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+            }
@@ -1,84 +1,742 @@
 import pandas as pd
 import numpy as np
+import hashlib
+import io
+import json
 import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from core.descriptions import DESCRIPTIONS
+from core.locking import FileLock
+from core.profiling import PipelineProfiler
+from core.schema import to_canonical, to_compact
 
 
 class Storage:
     """CSV-backed storage for canonical transactions.
 
     Canonical columns:
-      ['tx_id', 'Date', 'Day', 'Month', 'Year', 'Amount', 'Category', 'Description', 'Source']
+      ['tx_id', 'Date', 'Day', 'Month', 'Year', 'Amount', 'Category', 'Description', 'Source', 'Merchant']
+
+    Merchant is derived from Description (core.descriptions); stores
+    written before it existed get it filled in on load and on the next write.
+
+    Many processes may write the same store at once: writers serialize on
+    an advisory lock (<name>.lock) and merges go through a write-ahead log
+    (see merge_and_save). Readers never wait for the lock; they see the
+    last committed version of the files (see _snapshot).
 
     Public API:
-      - load_transactions()
+      - load_transactions(columns=None, start=None, end=None)
+      - load_compact(columns=None, start=None, end=None)
       - save_transactions(df)
-      - merge_and_save(new_df)
+      - merge_and_save(new_df, owner=None)
+      - compact()
       - reset_file()
+      - data_version()
+      - summary()
     """
 
     def __init__(self, data_dir: str = 'agent_data', filename: str = 'transactions.csv'):
         self.data_dir = data_dir
         self.filename = filename
 
-        self.canonical_cols = ['tx_id', 'Date', 'Day', 'Month', 'Year', 'Amount', 'Category', 'Description', 'Source']
+        self.canonical_cols = ['tx_id', 'Date', 'Day', 'Month', 'Year', 'Amount', 'Category', 'Description', 'Source', 'Merchant']
 
-        os.makedirs(self.data_dir, exist_ok=True)
+        # Nothing touches the filesystem until first use: data_dir is created by the first write
         self.tx_path = os.path.join(self.data_dir, self.filename)
 
-    def load_transactions(self) -> pd.DataFrame:
-        if os.path.exists(self.tx_path):
-            df = pd.read_csv(self.tx_path)
+        stem = os.path.join(self.data_dir, os.path.splitext(self.filename)[0])
+        # Held by whichever process is changing the store (any backend)
+        self.lock = FileLock(stem + '.lock')
+        # Pending merges, one file per merge_and_save call (CSV / Parquet)
+        self.wal_dir = stem + '.wal'
+        # Data file stats as of the last commit, for readers during a write
+        self.commit_path = stem + '.commit.json'
+
+        # Derived structures (e.g. SpendCube) that follow writes
+        self._listeners = []
+        # Totals record (see summary()); read from disk on first use
+        self._summary = None
+
+        # Stage instrumentation; disabled unless the owner turns it on
+        self.profiler = PipelineProfiler()
+        # Per-thread override set by profiling()
+        self._thread_profiler = threading.local()
+
+    def load_transactions(self, columns: list | None = None, start=None, end=None) -> pd.DataFrame:
+        """Load canonical transactions.
+
+        columns: optional projection (canonical order is kept).
+        start/end: optional inclusive date range, normalized to day boundaries.
+        """
+        cols = self._project(columns)
+
+        snapshot = self._snapshot()
+        if snapshot:
+            # Date is always read when a date range is requested
+            read_cols = cols if start is None and end is None else list(dict.fromkeys(cols + ['Date']))
+            # Description is needed to derive Merchant for stores that predate it
+            file_cols = read_cols + ['Description'] if 'Merchant' in read_cols else read_cols
+            with self._open_committed(snapshot) as f:
+                df = pd.read_csv(f, usecols=lambda c: c in file_cols)
+            df = self._derive_columns(df)
             # Ensure all canonical columns exist, filling missing with NaN
-            for c in self.canonical_cols:
+            for c in read_cols:
                 if c not in df.columns:
                     df[c] = np.nan
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
-            df = df[self.canonical_cols].copy()
+            if 'Date' in df.columns:
+                df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+            if 'Amount' in df.columns:
+                df['Amount'] = pd.to_numeric(df['Amount'], errors='coerce')
+            df = self._filter_dates(df, start, end)
+            df = df[cols].copy()
             return df
 
-        return pd.DataFrame(columns=self.canonical_cols)
+        return pd.DataFrame(columns=cols)
+
+    def load_compact(self, columns: list | None = None, start=None, end=None) -> pd.DataFrame:
+        """load_transactions() in the compact in-memory schema (see core.schema)."""
+        return to_compact(self.load_transactions(columns=columns, start=start, end=end))
+
+    @staticmethod
+    def _derive_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """Add derived canonical columns (Merchant) that `df` lacks but can compute."""
+        if 'Merchant' not in df.columns and 'Description' in df.columns:
+            df = df.copy()
+            df['Merchant'] = DESCRIPTIONS.lookup(df['Description'], 'merchant')
+        return df
+
+    def _project(self, columns: list | None) -> list:
+        if columns is None:
+            return list(self.canonical_cols)
+        unknown = [c for c in columns if c not in self.canonical_cols]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}. Canonical columns: {self.canonical_cols}")
+        return [c for c in self.canonical_cols if c in columns]
+
+    @staticmethod
+    def _date_bounds(start, end) -> tuple:
+        start_ts = pd.to_datetime(start).floor('D') if start is not None else None
+        end_ts = (pd.to_datetime(end).floor('D') + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+                  if end is not None else None)
+        return start_ts, end_ts
+
+    def _filter_dates(self, df: pd.DataFrame, start, end) -> pd.DataFrame:
+        if start is None and end is None:
+            return df
+        start_ts, end_ts = self._date_bounds(start, end)
+        mask = pd.Series(True, index=df.index)
+        if start_ts is not None:
+            mask &= df['Date'] >= start_ts
+        if end_ts is not None:
+            mask &= df['Date'] <= end_ts
+        return df[mask]
 
     def save_transactions(self, df: pd.DataFrame) -> None:
-        """Persist canonical transactions."""
-        df = df.copy()
+        """Persist canonical transactions (full rewrite) and rebuild the tx_id index."""
+        df = self._derive_columns(to_canonical(df)).copy()
         df = df[self.canonical_cols].copy()
         df['Date'] = df['Date'].astype(str)
-        # leverage tmp to prevent collapsing
-        tmp_path = self.tx_path + '.tmp'
-        df.to_csv(tmp_path, index=False)
-        os.replace(tmp_path, self.tx_path)
+        with self._writing():
+            with self.profiler.span('write', rows_in=len(df)) as span:
+                # leverage tmp to prevent collapsing
+                tmp_path = self.tx_path + '.tmp'
+                df.to_csv(tmp_path, index=False)
+                os.replace(tmp_path, self.tx_path)
+                if span:
+                    span.rows_out = len(df)
+                    span.bytes_written = self._data_bytes()
+            self._after_rewrite(df)
 
-    def merge_and_save(self, new_df: pd.DataFrame) -> dict:
-        """Merge new transactions, dedupe by tx_id, and persist."""
-        existing = self.load_transactions()
+    def merge_and_save(self, new_df: pd.DataFrame, owner: np.ndarray | None = None) -> dict:
+        """Append transactions whose tx_id is not stored yet.
 
-        before = len(existing)
-        incoming = len(new_df)
+        Dedup is checked against the persisted tx_id index, so the cost is
+        O(incoming) rather than O(history). New rows are appended to the
+        store unsorted; call compact() to restore (Date, Amount) order.
 
-        combined = pd.concat([existing, new_df], ignore_index=True)
-        combined = combined.drop_duplicates(subset=['tx_id'], keep='first')
-        combined = combined.sort_values(['Date', 'Amount'], ascending=[True, False]).reset_index(drop=True)
+        Safe to run from many processes at once. Without the lock, rows are
+        canonicalized, deduplicated against the committed index and written
+        to the write-ahead log as one file; the caller then takes the lock
+        and folds every pending log file into the store in one commit
+        (other writers' files included), or finds that a concurrent writer
+        already did and picks up its result.
 
-        after = len(combined)
-        inserted_est = after - before
-        skipped_est = incoming - max(inserted_est, 0)
+        `owner` optionally labels each row of new_df with a small int (e.g.
+        the statement it came from); the stats then include
+        'inserted_by_owner', the rows inserted per label (a duplicate
+        counts for its first row).
+        """
+        profiler = self.profiler
+        incoming = len(new_df)
+        with profiler.span('dedup', rows_in=incoming) as span:
+            new_df = self._derive_columns(to_canonical(new_df))[self.canonical_cols]
+            if owner is not None:
+                # Travels with the rows into the log file; _apply_wal counts it
+                new_df = new_df.assign(_owner=np.asarray(owner, dtype='int64'))
+            new_df = new_df.drop_duplicates(subset=['tx_id'], keep='first')
+            index = self._committed_index()
+            if index is not None:
+                new_df = new_df[~self._index_contains(index, self._tx_keys(new_df['tx_id']))]
+            span.rows_out = len(new_df)
 
-        self.save_transactions(combined)
+        if new_df.empty and index is not None:
+            # Nothing new against the committed store: no log entry, no lock
+            existing = sum(len(seg) for seg in index)
+            return self._owner_stats({
+                'existing_rows': existing,
+                'incoming_rows': incoming,
+                'final_rows': existing,
+                'inserted': 0,
+                'skipped': incoming,
+            }, owner, [])
 
-        return {
-            'existing_rows': before,
+        with profiler.span('wal_append', rows_in=len(new_df)):
+            name = self._wal_append(new_df)
+        with self._writing():
+            applied = self._apply_wal(own=name).get(name) or self._take_wal_result(name)
+
+        return self._owner_stats({
+            'existing_rows': applied['existing_rows'],
             'incoming_rows': incoming,
-            'final_rows': after,
-            'inserted_estimate': inserted_est,
-            'skipped_estimate': skipped_est
-        }
-    
+            'final_rows': applied['final_rows'],
+            'inserted': applied['inserted'],
+            'skipped': incoming - applied['inserted'],
+        }, owner, applied.get('inserted_by_owner', []))
+
+    @staticmethod
+    def _owner_stats(stats: dict, owner: np.ndarray | None, counts: list) -> dict:
+        """Add 'inserted_by_owner' (one count per label 0..max(owner)) when rows were labelled."""
+        if owner is not None:
+            n = int(np.max(owner)) + 1 if len(owner) else 0
+            stats['inserted_by_owner'] = (list(counts) + [0] * n)[:n]
+        return stats
+
+    def compact(self) -> None:
+        """Restore (Date, Amount) sort order and merge appended segments."""
+        with self._writing():
+            # Pending merges (e.g. from a writer that died) go in first
+            self._apply_wal()
+            with self.profiler.span('load') as span:
+                df = self.load_transactions()
+                span.rows_out = len(df)
+            with self.profiler.span('sort', rows_in=len(df)) as span:
+                df = df.sort_values(['Date', 'Amount'], ascending=[True, False]).reset_index(drop=True)
+                span.rows_out = len(df)
+            self.save_transactions(df)
+
     def reset_file(self) -> None:
         # Create an empty canonical DataFrame
         empty_df = pd.DataFrame(columns=self.canonical_cols)
 
         # Persist as a brand-new transactions.csv
-        tmp_path = self.tx_path + '.tmp'
-        empty_df.to_csv(tmp_path, index=False)
-        os.replace(tmp_path, self.tx_path)
\ No newline at end of file
+        with self._writing():
+            tmp_path = self.tx_path + '.tmp'
+            empty_df.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, self.tx_path)
+            self._after_rewrite(empty_df)
+
+    def _upgrade_schema(self) -> None:
+        """Rewrite a CSV store whose header predates the current canonical columns."""
+        if not os.path.exists(self.tx_path) or os.path.getsize(self.tx_path) == 0:
+            return
+        with open(self.tx_path, newline='') as f:
+            header = f.readline().strip().split(',')
+        if header != self.canonical_cols:
+            self.save_transactions(self.load_transactions())
+
+    # ------------------------------
+    # profiling
+    # ------------------------------
+    @property
+    def profiler(self) -> PipelineProfiler:
+        """The profiler stages record into: this thread's profiling() one, else the store's."""
+        profiler = getattr(self._thread_profiler, 'profiler', None)
+        return self._profiler if profiler is None else profiler
+
+    @profiler.setter
+    def profiler(self, profiler: PipelineProfiler) -> None:
+        self._profiler = profiler
+
+    @contextmanager
+    def profiling(self, profiler: PipelineProfiler):
+        """Record this thread's stages into `profiler` (e.g. one ingest job's), leaving other threads alone."""
+        previous = getattr(self._thread_profiler, 'profiler', None)
+        self._thread_profiler.profiler = profiler
+        try:
+            yield profiler
+        finally:
+            self._thread_profiler.profiler = previous
+
+    # ------------------------------
+    # write listeners
+    # ------------------------------
+    def subscribe(self, listener) -> None:
+        """Register an object notified after writes.
+
+        Listeners implement:
+          - on_insert(rows, fp_before, fp_after): `rows` were appended
+          - on_rewrite(df, fp_after): the store was replaced by `df`
+        where fp_* are data fingerprints (see _fingerprint).
+        """
+        self._listeners.append(listener)
+
+    def _after_insert(self, rows: pd.DataFrame, fp_before: list) -> None:
+        fp_after = self._fingerprint()
+        with self.profiler.span('summary', rows_in=len(rows)):
+            self._update_summary(rows, fp_before, fp_after)
+        with self.profiler.span('listeners', rows_in=len(rows)):
+            # A listener may subscribe another one (e.g. a lazily built ModelStore)
+            for listener in list(self._listeners):
+                listener.on_insert(rows, fp_before, fp_after)
+
+    def _after_rewrite(self, df: pd.DataFrame) -> None:
+        with self.profiler.span('index_rebuild', rows_in=len(df)):
+            self._rebuild_index(df['tx_id'])
+        fp_after = self._fingerprint()
+        with self.profiler.span('summary', rows_in=len(df)):
+            self._save_summary(self._summarize(df), fp_after)
+        with self.profiler.span('listeners', rows_in=len(df)):
+            for listener in list(self._listeners):
+                listener.on_rewrite(df, fp_after)
+
+    # ------------------------------
+    # summary record
+    # ------------------------------
+    # Row count, date range and amount totals (overall and per Source),
+    # persisted as <name>.summary.json with the fingerprint it matches.
+    # Merges add the inserted rows' totals; rewrites recompute it from the
+    # new frame. Amounts are kept as integer cents so repeated merges do not
+    # accumulate float error.
+    @property
+    def summary_path(self) -> str:
+        return os.path.join(self.data_dir, os.path.splitext(self.filename)[0] + '.summary.json')
+
+    @staticmethod
+    def _totals(cents: np.ndarray) -> dict:
+        return {
+            'rows': int(len(cents)),
+            'gross_cents': int(cents[cents > 0].sum()),
+            'credit_cents': int(-cents[cents < 0].sum()),
+        }
+
+    @classmethod
+    def _summarize(cls, df: pd.DataFrame) -> dict:
+        """Summary record of canonical rows."""
+        dates = pd.to_datetime(df['Date'], errors='coerce').dropna() if len(df) else pd.Series(dtype='datetime64[ns]')
+        amount = pd.to_numeric(df['Amount'], errors='coerce') if len(df) else pd.Series(dtype='float64')
+        valid = amount.notna().to_numpy()
+        cents = np.round(amount.to_numpy(dtype='float64') * 100)
+        cents = np.where(valid, cents, 0).astype(np.int64)
+
+        record = cls._totals(cents)
+        record['rows'] = int(len(df))
+        record['min_date'] = dates.min().strftime('%Y-%m-%d') if len(dates) else None
+        record['max_date'] = dates.max().strftime('%Y-%m-%d') if len(dates) else None
+
+        by_source = {}
+        if len(df):
+            sources = df['Source'].astype(object).where(df['Source'].notna(), 'Unknown').astype(str).to_numpy()
+            for src in np.unique(sources):
+                by_source[src] = cls._totals(cents[sources == src])
+        record['by_source'] = by_source
+        return record
+
+    @staticmethod
+    def _combine(a: dict, b: dict) -> dict:
+        def add(x: dict, y: dict) -> dict:
+            return {k: x.get(k, 0) + y.get(k, 0) for k in ['rows', 'gross_cents', 'credit_cents']}
+
+        out = add(a, b)
+        mins = [d for d in (a['min_date'], b['min_date']) if d]
+        maxs = [d for d in (a['max_date'], b['max_date']) if d]
+        out['min_date'] = min(mins) if mins else None
+        out['max_date'] = max(maxs) if maxs else None
+        out['by_source'] = {
+            src: add(a['by_source'].get(src, {}), b['by_source'].get(src, {}))
+            for src in sorted(set(a['by_source']) | set(b['by_source']))
+        }
+        return out
+
+    def _load_summary(self) -> tuple[dict | None, list | None]:
+        if self._summary is not None:
+            return self._summary
+        try:
+            with open(self.summary_path) as f:
+                meta = json.load(f)
+            return meta['summary'], meta['fingerprint']
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def _save_summary(self, record: dict, fingerprint: list) -> None:
+        if not os.path.isdir(self.data_dir):
+            # Nothing stored yet: keep it in memory rather than create the store
+            self._summary = (record, fingerprint)
+            return
+        # Readers rebuilding a stale summary may race each other
+        tmp_path = f'{self.summary_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'summary': record}, f)
+        os.replace(tmp_path, self.summary_path)
+        self._summary = (record, fingerprint)
+
+    def _update_summary(self, rows: pd.DataFrame, fp_before: list, fp_after: list) -> None:
+        record, fingerprint = self._load_summary()
+        if record is None or fingerprint != fp_before:
+            # Out of sync before this write; summary() rebuilds it on demand
+            self._summary = None
+            return
+        self._save_summary(self._combine(record, self._summarize(rows)), fp_after)
+
+    def summary(self) -> dict:
+        """Store-wide totals without loading the table (rebuilt only if stale).
+
+        Amount convention: > 0 is spend, < 0 is a credit/refund/payment.
+        Returns rows, min_date/max_date (Timestamps, None when empty),
+        gross_spend, credits, net and by_source {source: {rows,
+        gross_spend, credits, net}}.
+        """
+        current = self._fingerprint()
+        record, fingerprint = self._load_summary()
+        if record is None or fingerprint != current:
+            df = self.load_transactions(columns=['Date', 'Amount', 'Source'])
+            record = self._summarize(df)
+            self._save_summary(record, current)
+
+        def amounts(t: dict) -> dict:
+            gross, credits = t['gross_cents'] / 100, t['credit_cents'] / 100
+            return {'rows': t['rows'], 'gross_spend': gross, 'credits': credits, 'net': (t['gross_cents'] - t['credit_cents']) / 100}
+
+        out = amounts(record)
+        out['min_date'] = pd.Timestamp(record['min_date']) if record['min_date'] else None
+        out['max_date'] = pd.Timestamp(record['max_date']) if record['max_date'] else None
+        out['by_source'] = {src: amounts(t) for src, t in record['by_source'].items()}
+        return out
+
+    # ------------------------------
+    # append-only segments
+    # ------------------------------
+    def _append_rows(self, df: pd.DataFrame) -> None:
+        df = df[self.canonical_cols].copy()
+        df['Date'] = df['Date'].astype(str)
+        write_header = not os.path.exists(self.tx_path) or os.path.getsize(self.tx_path) == 0
+        df.to_csv(self.tx_path, mode='a', header=write_header, index=False)
+
+    def _data_files(self) -> list[str]:
+        """Files holding the stored rows (used to detect a stale index)."""
+        return [self.tx_path] if os.path.exists(self.tx_path) else []
+
+    def _data_bytes(self) -> int:
+        return sum(os.path.getsize(p) for p in self._data_files())
+
+    def data_version(self) -> str:
+        """Cheap token that changes whenever the stored rows change."""
+        return json.dumps(self._fingerprint())
+
+    def _fingerprint(self) -> list:
+        return [entry[:3] for entry in self._snapshot()]
+
+    # ------------------------------
+    # write lock / committed snapshots
+    # ------------------------------
+    # Every change to the store happens inside _writing(), which holds the
+    # advisory lock and brackets the change with a commit record: the data
+    # file stats (plus inode) before and after. Readers never take the lock.
+    # If nobody is writing they use the files as they are; while a writer is
+    # mid-commit they use the commit record, i.e. the version from before
+    # the write, and read only that much of each file (CSV appends beyond
+    # the recorded size and Parquet parts not in the record are skipped).
+    @contextmanager
+    def _writing(self):
+        if self.lock.held():
+            yield
+            return
+        with self.profiler.span('lock_wait'):
+            self.lock.acquire()
+        try:
+            self._write_commit_record()
+            yield
+        finally:
+            try:
+                self._write_commit_record()
+            finally:
+                self.lock.release()
+
+    def _file_stats(self) -> list:
+        stats = []
+        for path in self._data_files():
+            st = os.stat(path)
+            stats.append([os.path.relpath(path, self.data_dir), st.st_size, st.st_mtime_ns, st.st_ino])
+        return stats
+
+    def _write_commit_record(self) -> None:
+        # Only the lock holder writes it
+        tmp_path = self.commit_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self._file_stats(), f)
+        os.replace(tmp_path, self.commit_path)
+
+    def _snapshot(self) -> list:
+        """[[relpath, size, mtime_ns, inode]] of the last committed version of the data files."""
+        if self.lock.held():
+            return self._file_stats()
+        with self.lock.shared_probe() as quiescent:
+            if quiescent:
+                return self._file_stats()
+        try:
+            with open(self.commit_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # Store written before commit records existed
+            return self._file_stats()
+
+    @contextmanager
+    def _pinned(self, fingerprint: list):
+        """Yield True (holding the write lock) if the store is still at `fingerprint`.
+
+        Derived structures persisting state built from a snapshot (spend
+        cube, models) save it inside this block and only if it yields True,
+        so a concurrent commit is never paired with older data. Yields
+        False without waiting while another writer holds the lock.
+        """
+        if not self.lock.acquire(blocking=False):
+            yield False
+            return
+        try:
+            yield self._fingerprint() == fingerprint
+        finally:
+            self.lock.release()
+
+    def _open_committed(self, snapshot: list) -> io.BufferedReader:
+        """Binary reader over the committed prefix of a single-file store."""
+        rel, size, _, inode = snapshot[0]
+        f = open(os.path.join(self.data_dir, rel), 'rb')
+        if os.fstat(f.fileno()).st_ino != inode:
+            # Replaced (rewrite / compact) since the snapshot: that version is committed too
+            size = os.fstat(f.fileno()).st_size
+        return io.BufferedReader(_Prefix(f, size))
+
+    # ------------------------------
+    # write-ahead log
+    # ------------------------------
+    # <name>.wal/<time_ns>-<pid>-<rand>.pkl holds one merge_and_save call's
+    # deduplicated rows. The lock holder folds all pending files into the
+    # store in log order and leaves a <same name>.json result for each one
+    # it applied on behalf of another writer; that writer reads and removes
+    # it. A log file is only deleted after its result is written, so a
+    # crash at any point leaves the rows to be applied (and deduplicated
+    # against the index) by the next writer or compact().
+    wal_result_ttl = 24 * 3600  # seconds an unclaimed result is kept
+
+    def _wal_append(self, df: pd.DataFrame) -> str:
+        os.makedirs(self.wal_dir, exist_ok=True)
+        name = f'{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        path = os.path.join(self.wal_dir, name + '.pkl')
+        df.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return name
+
+    def _apply_wal(self, own: str | None = None) -> dict:
+        """Commit every pending log file (caller holds the lock). Returns {name: stats}.
+
+        `own` is the caller's log file: its result is returned, not written.
+        """
+        if not os.path.isdir(self.wal_dir):
+            return {}
+        names = sorted(f[:-4] for f in os.listdir(self.wal_dir) if f.endswith('.pkl'))
+        if not names:
+            return {}
+
+        profiler = self.profiler
+        frames = [pd.read_pickle(os.path.join(self.wal_dir, n + '.pkl')) for n in names]
+        batch = pd.concat(frames, ignore_index=True)[self.canonical_cols]
+        owner = np.repeat(np.arange(len(names)), [len(f) for f in frames])
+
+        self._upgrade_schema()
+        fp_before = self._fingerprint()
+        with profiler.span('index_load') as span:
+            index = self._load_index()
+            before = sum(len(seg) for seg in index)
+            span.rows_out = before
+
+        with profiler.span('wal_dedup', rows_in=len(batch)) as span:
+            # Against the store, then across log files (earliest wins)
+            keys = self._tx_keys(batch['tx_id'])
+            is_new = ~self._index_contains(index, keys) & ~pd.Series(keys).duplicated().to_numpy()
+            inserted = batch[is_new]
+            span.rows_out = len(inserted)
+
+        if len(inserted):
+            with profiler.span('sort', rows_in=len(inserted)) as span:
+                inserted = inserted.sort_values(['Date', 'Amount'], ascending=[True, False])
+                span.rows_out = len(inserted)
+            with profiler.span('write', rows_in=len(inserted)) as span:
+                size_before = self._data_bytes() if span else 0
+                self._append_rows(inserted)
+                if span:
+                    span.rows_out = len(inserted)
+                    span.bytes_written = self._data_bytes() - size_before
+            with profiler.span('index_append', rows_in=len(inserted)):
+                self._append_index(keys[is_new])
+            self._after_insert(inserted, fp_before)
+
+        counts = np.bincount(owner[is_new], minlength=len(names))
+        bounds = np.cumsum([0] + [len(f) for f in frames])
+        results, existing = {}, before
+        for i, (name, n) in enumerate(zip(names, counts.tolist())):
+            results[name] = {'existing_rows': existing, 'final_rows': existing + n, 'inserted': n}
+            if '_owner' in frames[i].columns:
+                # Rows labelled by the writer (see merge_and_save): split its count by label
+                labels = frames[i]['_owner'].to_numpy()[is_new[bounds[i]:bounds[i + 1]]]
+                results[name]['inserted_by_owner'] = np.bincount(labels).tolist()
+            existing += n
+            if name != own:
+                self._write_wal_result(name, results[name])
+            os.remove(os.path.join(self.wal_dir, name + '.pkl'))
+        self._expire_wal_results()
+        return results
+
+    def _write_wal_result(self, name: str, stats: dict) -> None:
+        path = os.path.join(self.wal_dir, name + '.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(stats, f)
+        os.replace(path + '.tmp', path)
+
+    def _take_wal_result(self, name: str) -> dict:
+        path = os.path.join(self.wal_dir, name + '.json')
+        with open(path) as f:
+            stats = json.load(f)
+        os.remove(path)
+        return stats
+
+    def _expire_wal_results(self) -> None:
+        cutoff = time.time() - self.wal_result_ttl
+        for f in os.listdir(self.wal_dir):
+            path = os.path.join(self.wal_dir, f)
+            if f.endswith('.json') and os.path.getmtime(path) < cutoff:
+                os.remove(path)
+
+    def _committed_index(self) -> list[np.ndarray] | None:
+        """tx_id index segments of the committed store, or None if it is stale (no lock taken)."""
+        try:
+            with open(os.path.join(self.index_dir, 'meta.json')) as f:
+                meta = json.load(f)
+            if meta.get('version') != self.index_version or meta.get('fingerprint') != self._fingerprint():
+                return None
+            return [np.load(p, mmap_mode='r') for p in self._segment_paths()]
+        except (OSError, ValueError):
+            # Rebuilt underneath us
+            return None
+
+    # ------------------------------
+    # persistent tx_id index
+    # ------------------------------
+    # Sorted arrays of 20-byte sha1 digests, one .npy file per merge. Lookups
+    # are binary searches over memory-mapped segments; rebuilds and compact()
+    # fold them into a single segment. meta.json records the data fingerprint
+    # the index was built against so out-of-band edits trigger a rebuild, and
+    # the key format version so indexes written by older code are rebuilt once.
+    index_version = 2
+
+    @property
+    def index_dir(self) -> str:
+        return os.path.join(self.data_dir, os.path.splitext(self.filename)[0] + '.txidx')
+
+    @staticmethod
+    def _tx_keys(tx_ids: pd.Series) -> np.ndarray:
+        """20-byte index key per id, chosen per id so a key never depends on its batch."""
+        ids = tx_ids.astype(str)
+        is_hex = ids.str.fullmatch(r'[0-9a-f]{40}').fillna(False).to_numpy(dtype=bool)
+        keys = np.empty(len(ids), dtype='S20')
+        if is_hex.any():
+            keys[is_hex] = np.frombuffer(bytes.fromhex(''.join(ids[is_hex].tolist())), dtype='S20')
+        if not is_hex.all():
+            # Non-sha1 ids (e.g. hand-edited rows): index a digest of the id itself
+            keys[~is_hex] = [hashlib.sha1(i.encode('utf-8')).digest() for i in ids[~is_hex].tolist()]
+        return keys
+
+    def _segment_paths(self) -> list[str]:
+        if not os.path.isdir(self.index_dir):
+            return []
+        return sorted(
+            os.path.join(self.index_dir, f) for f in os.listdir(self.index_dir) if f.endswith('.npy')
+        )
+
+    def _load_index(self) -> list[np.ndarray]:
+        meta_path = os.path.join(self.index_dir, 'meta.json')
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = None
+
+        if meta is None or meta.get('version') != self.index_version or meta.get('fingerprint') != self._fingerprint():
+            self._rebuild_index(self.load_transactions(columns=['tx_id'])['tx_id'])
+
+        return [np.load(p, mmap_mode='r') for p in self._segment_paths()]
+
+    @staticmethod
+    def _index_contains(index: list[np.ndarray], keys: np.ndarray) -> np.ndarray:
+        found = np.zeros(len(keys), dtype=bool)
+        for seg in index:
+            if len(seg) == 0:
+                continue
+            pos = np.searchsorted(seg, keys)
+            pos[pos == len(seg)] = len(seg) - 1
+            found |= seg[pos] == keys
+        return found
+
+    def _write_segment(self, keys: np.ndarray, seq: int) -> None:
+        path = os.path.join(self.index_dir, f'seg-{seq:06d}.npy')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.sort(keys))
+        os.replace(tmp_path, path)
+
+    def _write_index_meta(self) -> None:
+        meta_path = os.path.join(self.index_dir, 'meta.json')
+        tmp_path = meta_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': self._fingerprint(), 'version': self.index_version}, f)
+        os.replace(tmp_path, meta_path)
+
+    def _append_index(self, keys: np.ndarray) -> None:
+        paths = self._segment_paths()
+        seq = int(os.path.basename(paths[-1])[4:10]) + 1 if paths else 0
+        self._write_segment(keys, seq)
+        self._write_index_meta()
+
+    def _rebuild_index(self, tx_ids: pd.Series) -> None:
+        shutil.rmtree(self.index_dir, ignore_errors=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._write_segment(np.unique(self._tx_keys(tx_ids.dropna())), 0)
+        self._write_index_meta()
+
+
+class _Prefix(io.RawIOBase):
+    """Read-only view of the first `size` bytes of an open binary file."""
+
+    def __init__(self, f, size: int):
+        self._f = f
+        self._left = size
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = min(len(b), self._left)
+        if n <= 0:
+            return 0
+        data = self._f.read(n)
+        b[:len(data)] = data
+        self._left -= len(data)
+        return len(data)
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
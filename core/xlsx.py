@@ -0,0 +1,171 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+
+# ------------------------------
+# Minimal streaming xlsx reader
+# ------------------------------
+# Reads cell values of the first worksheet straight from the sheet XML with
+# iterparse. Cells right of `max_col` are skipped before their value is
+# looked at, and each <row> is cleared once emitted, so memory stays flat and
+# only the wanted columns are converted. Values follow openpyxl's data_only
+# conversion (cached formula values, shared/inline strings, date-formatted
+# numbers as datetimes) plus pandas' rule that integral floats become ints.
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+
+def _text(elem) -> str:
+    # Rich text runs split a string over several <t>; phonetic runs (<rPh>) are not part of it
+    parts = []
+    for child in elem:
+        if child.tag == NS_MAIN + 't':
+            parts.append(child.text or '')
+        elif child.tag == NS_MAIN + 'r':
+            parts.extend(t.text or '' for t in child.iter(NS_MAIN + 't'))
+    return ''.join(parts)
+
+
+def _first_sheet_path(zf: zipfile.ZipFile) -> str:
+    workbook = ET.fromstring(zf.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{NS_MAIN}sheets/{NS_MAIN}sheet')
+    rels = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    target = next(
+        rel.get('Target') for rel in rels.iter(NS_PKG_REL + 'Relationship')
+        if rel.get('Id') == sheet.get(NS_REL + 'id')
+    )
+    return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+
+
+def _shared_strings(zf: zipfile.ZipFile) -> list[str]:
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return []
+    strings = []
+    with zf.open('xl/sharedStrings.xml') as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == NS_MAIN + 'si':
+                strings.append(_text(elem))
+                elem.clear()
+    return strings
+
+
+def _date_styles(zf: zipfile.ZipFile) -> set[int]:
+    """Indexes of cellXfs entries whose number format is a date/time format."""
+    if 'xl/styles.xml' not in zf.namelist():
+        return set()
+    styles = ET.fromstring(zf.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    for fmt in styles.iter(NS_MAIN + 'numFmt'):
+        formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+    xfs = styles.find(NS_MAIN + 'cellXfs')
+    if xfs is None:
+        return set()
+    return {
+        i for i, xf in enumerate(xfs.findall(NS_MAIN + 'xf'))
+        if is_date_format(formats.get(int(xf.get('numFmtId', 0))))
+    }
+
+
+def _epoch(zf: zipfile.ZipFile):
+    pr = ET.fromstring(zf.read('xl/workbook.xml')).find(NS_MAIN + 'workbookPr')
+    date1904 = pr is not None and pr.get('date1904') in ('1', 'true')
+    return CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+
+
+def _column_index(ref: str, cache: dict) -> int:
+    letters = ref.rstrip('0123456789')
+    idx = cache.get(letters)
+    if idx is None:
+        idx = 0
+        for ch in letters:
+            idx = idx * 26 + ord(ch) - 64
+        idx -= 1
+        cache[letters] = idx
+    return idx
+
+
+def _number(text: str):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+def iter_sheet_rows(path: str, min_row: int = 1, max_col: int | None = None):
+    """Yield (row_number, values, filled) for the first worksheet.
+
+    values is a list of up to `max_col` cell values (None for empty cells);
+    row numbers are 1-based and empty rows are yielded as []. filled tells
+    whether any cell of the row holds something, error cells and cells
+    right of `max_col` included (read_excel keeps such rows). Rows before
+    `min_row` are skipped unconverted.
+    """
+    with zipfile.ZipFile(path) as zf:
+        shared = _shared_strings(zf)
+        date_styles = _date_styles(zf)
+        epoch = _epoch(zf)
+        col_cache = {}
+
+        with zf.open(_first_sheet_path(zf)) as f:
+            last_row = 0
+            for _, elem in ET.iterparse(f):
+                if elem.tag != NS_MAIN + 'row':
+                    continue
+                row_number = int(elem.get('r', last_row + 1))
+                for gap in range(max(last_row + 1, min_row), row_number):
+                    yield gap, [], False
+                last_row = row_number
+                if row_number < min_row:
+                    elem.clear()
+                    continue
+
+                values = []
+                filled = False
+                col = -1
+                for c in elem.iter(NS_MAIN + 'c'):
+                    ref = c.get('r')
+                    col = _column_index(ref, col_cache) if ref else col + 1
+                    if max_col is not None and col >= max_col:
+                        if filled:
+                            break
+                        # Not converted, only checked for content
+                        v = c.find(NS_MAIN + 'v')
+                        filled = c.get('t') == 'inlineStr' or (v is not None and v.text is not None)
+                        continue
+
+                    t = c.get('t', 'n')
+                    if t == 'inlineStr':
+                        is_ = c.find(NS_MAIN + 'is')
+                        value = _text(is_) if is_ is not None else None
+                    else:
+                        v = c.find(NS_MAIN + 'v')
+                        text = v.text if v is not None else None
+                        if text is None:
+                            value = None
+                        elif t == 's':
+                            value = shared[int(text)]
+                        elif t == 'n':
+                            if int(c.get('s', 0)) in date_styles:
+                                value = from_excel(float(text), epoch)
+                            else:
+                                value = _number(text)
+                        elif t == 'b':
+                            value = text == '1'
+                        elif t == 'd':
+                            value = from_ISO8601(text)
+                        elif t == 'e':
+                            value = None
+                            filled = True
+                        else:  # 'str' (formula result)
+                            value = text
+
+                    if value is not None:
+                        values.extend([None] * (col - len(values)))
+                        values.append(value)
+                        filled = True
+                elem.clear()
+                yield row_number, values, filled
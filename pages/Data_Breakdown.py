@@ -1,27 +1,31 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-from core.agent import Agent
+from core.agent import shared_agent
+from core.report import downsample_lttb
 
 st.set_page_config(page_title="Data Breakdown", layout="wide")
 
 st.title("Data Breakdown")
 st.caption("Select a date range (inclusive). Shows spend by category and spend per day.")
 
-@st.cache_resource
-def get_agent():
-    return Agent()
+# Same process-wide Agent as Home
+agent = shared_agent()
 
-agent = get_agent()
+# Upper bound on rows sent to the browser per chart/table series
+CHART_POINTS = 400
 
-# --- Load transactions once ---
-df_all = agent.load_transactions()
+# --- Date range from the stored summary (no table load) ---
+summary = agent.summary(recent_days=None)
+
+cache_stats = agent.load_cache_stats()
+st.sidebar.caption(f"Load cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
 
 # --- Date range UI (inclusive) ---
 col1, col2, col3 = st.columns([1, 1, 1])
 
-min_date = df_all["Date"].min()
-max_date = df_all["Date"].max()
+min_date = summary["min_date"]
+max_date = summary["max_date"]
 
 with col1:
     start = st.date_input("Start date (inclusive)", value=min_date.date() if pd.notna(min_date) else None)
@@ -31,13 +35,25 @@ with col2:
 
 with col3:
     fill_missing_days = st.toggle("Fill missing days (0 spend)", value=True)
+    keep_daily_shape = st.toggle(
+        "Long ranges: keep daily points",
+        value=False,
+        help=f"Over {CHART_POINTS} days, show the {CHART_POINTS} daily points that best keep the line's shape "
+             "instead of summing per week/month.",
+    )
 
 # Guard: if user selects reversed range, swap (simple UX)
 if pd.to_datetime(start) > pd.to_datetime(end):
     start, end = end, start
 
 # --- Call your flex spend function ---
-by_category, by_day = agent.flex_spend_report(start, end, fill_missing_days=fill_missing_days)
+by_category, by_day = agent.flex_spend_report(
+    start, end,
+    fill_missing_days=fill_missing_days,
+    max_points=CHART_POINTS,
+    method="lttb" if keep_daily_shape else "bucket",
+)
+resolution = by_day.attrs.get("resolution", "day")
 
 # -----------------------------
 # Section 1: Spend by Category
@@ -68,7 +84,9 @@ with right:
 # -----------------------------
 # Section 2: Spend per Day
 # -----------------------------
-st.subheader("Daily Spend")
+st.subheader("Daily Spend" if resolution == "day" else f"Spend per {resolution.capitalize()}")
+if keep_daily_shape and len(by_day) and (by_day["bucket_start"] != by_day["bucket_end"]).any():
+    st.caption(f"Showing {len(by_day)} representative days of the range.")
 
 left2, right2 = st.columns([1, 1])
 
@@ -81,12 +99,106 @@ with right2:
             alt.Chart(by_day)
             .mark_line(point=True)
             .encode(
-                x=alt.X("day:T", title="Day"),
+                x=alt.X("day:T", title=resolution.capitalize()),
                 y=alt.Y("spend:Q", title="Spend"),
-                tooltip=[alt.Tooltip("day:T", title="Day"), alt.Tooltip("spend:Q", format=",.2f")]
+                tooltip=[
+                    alt.Tooltip("day:T", title="Day"),
+                    alt.Tooltip("bucket_start:T", title="From"),
+                    alt.Tooltip("bucket_end:T", title="To"),
+                    alt.Tooltip("spend:Q", format=",.2f"),
+                ]
             )
             .interactive()
         )
         st.altair_chart(chart_day, use_container_width=True)
     else:
-        st.info("No spend found in this date range.")
\ No newline at end of file
+        st.info("No spend found in this date range.")
+# -----------------------------
+# Section 3: Rolling Spend
+# -----------------------------
+st.subheader("Rolling Spend")
+st.caption("Trailing 7 / 30 / 90 / 365 day spend on each day (days before the start date count towards the windows).")
+
+rolling = agent.rolling_spend_report(start, end)
+if not rolling.empty:
+    # One line per window: keep each line's shape within the point budget
+    rolling = pd.concat(
+        [downsample_lttb(g, CHART_POINTS) for _, g in rolling.groupby("window", sort=True)],
+        ignore_index=True,
+    )
+
+if not rolling.empty:
+    chart_rolling = (
+        alt.Chart(rolling)
+        .mark_line()
+        .encode(
+            x=alt.X("day:T", title="Day"),
+            y=alt.Y("spend:Q", title="Spend"),
+            color=alt.Color("window:O", title="Window (days)"),
+            tooltip=[
+                alt.Tooltip("day:T", title="Day"),
+                alt.Tooltip("window:O", title="Window (days)"),
+                alt.Tooltip("spend:Q", format=",.2f"),
+            ]
+        )
+        .interactive()
+    )
+    st.altair_chart(chart_rolling, use_container_width=True)
+else:
+    st.info("No spend found in this date range.")
+
+# -----------------------------
+# Section 4: Custom Breakdown
+# -----------------------------
+st.subheader("Custom Breakdown")
+
+c1, c2, c3 = st.columns([1, 1, 1])
+with c1:
+    dimension = st.selectbox("Group by", ["Category", "Source", "Merchant", "weekday", "Month"])
+with c2:
+    granularity = st.selectbox("Per", ["(whole range)", "week", "month", "quarter", "year"])
+with c3:
+    measure = st.selectbox("Measure", ["spend", "refunds", "net", "count"])
+
+breakdown = agent.breakdown_report(
+    [dimension], [measure], start=start, end=end,
+    granularity=None if granularity == "(whole range)" else granularity,
+)
+
+if breakdown.empty:
+    st.info("No transactions found in this date range.")
+elif granularity == "(whole range)":
+    # Largest groups first; keep the bar chart readable for Merchant
+    top = breakdown.sort_values(measure, ascending=False).head(25)
+    st.altair_chart(
+        alt.Chart(top.astype({dimension: str}))
+        .mark_bar()
+        .encode(
+            x=alt.X(f"{measure}:Q", title=measure.capitalize()),
+            y=alt.Y(f"{dimension}:N", sort="-x", title=dimension),
+            tooltip=[f"{dimension}:N", alt.Tooltip(f"{measure}:Q", format=",.2f")],
+        ),
+        use_container_width=True,
+    )
+else:
+    # Only the biggest groups get their own line
+    keep = breakdown.groupby(dimension, dropna=False)[measure].sum().nlargest(10).index
+    lines = breakdown[breakdown[dimension].isin(keep)].astype({dimension: str})
+    st.altair_chart(
+        alt.Chart(lines)
+        .mark_line(point=True)
+        .encode(
+            x=alt.X(f"{granularity}:T", title=granularity.capitalize()),
+            y=alt.Y(f"{measure}:Q", title=measure.capitalize()),
+            color=alt.Color(f"{dimension}:N", title=dimension),
+            tooltip=[f"{dimension}:N", alt.Tooltip(f"{granularity}:T"), alt.Tooltip(f"{measure}:Q", format=",.2f")],
+        )
+        .interactive(),
+        use_container_width=True,
+    )
+
+query_stats = agent.query_cache_stats()
+st.sidebar.caption(
+    f"Report cache: {query_stats['hits']} hits / {query_stats['misses']} misses "
+    f"({query_stats['hit_rate']:.0%})"
+)
@@ -0,0 +1,24 @@
+import pytest
+
+from core.agent import STORAGE_BACKENDS
+from support import transactions
+
+
+@pytest.fixture
+def make_transactions():
+    """Factory for canonical frames: make_transactions(n, seed=0, start=..., days=..., tx_ids=None)."""
+    return transactions
+
+
+@pytest.fixture
+def make_storage(tmp_path):
+    """Factory for an empty store on tmp_path: make_storage(backend='csv', name='store', rows=0, seed=0).
+
+    rows > 0 merges that many make_transactions rows (from `seed`) first.
+    """
+    def make(backend: str = 'csv', name: str = 'store', rows: int = 0, seed: int = 0):
+        storage = STORAGE_BACKENDS[backend](str(tmp_path / name))
+        if rows:
+            storage.merge_and_save(transactions(rows, seed=seed))
+        return storage
+    return make
@@ -0,0 +1,198 @@
+"""Test data and helpers shared by the test modules (fixtures live in conftest.py)."""
+import hashlib
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from core.agent import STORAGE_BACKENDS
+
+BACKENDS = sorted(STORAGE_BACKENDS)
+
+DISCOVER_HEADER = ['Trans. Date', 'Post Date', 'Description', 'Amount', 'Category']
+AMEX_HEADER = ['Date', 'Description', 'Amount', 'Extended Details', 'Category']
+
+MERCHANTS = [
+    ('STARBUCKS STORE 1234 SEATTLE WA', 'Restaurant-Bar & Café', 'Restaurants'),
+    ('TRADER JOE S #552 QPS', 'Merchandise & Supplies-Groceries', 'Supermarkets'),
+    ('SHELL OIL 57442', 'Transportation-Fuel', 'Gasoline'),
+    ('UBER   TRIP HELP.UBER.COM', 'Transportation-Taxis & Coach', 'Travel/ Entertainment'),
+    ('AMAZON MKTPL*AB12CD', 'Merchandise & Supplies-Internet Purchase', 'Merchandise'),
+    ('NETFLIX.COM', 'Entertainment-Associations', 'Services'),
+]
+PAYMENT = ('INTERNET PAYMENT - THANK YOU', 'Payments-Payments', 'Payments and Credits')
+
+
+# ------------------------------
+# canonical frames
+# ------------------------------
+def transactions(
+    n: int = 100,
+    seed: int = 0,
+    start: str = '2024-01-01',
+    days: int = 60,
+    tx_ids: list | None = None,
+) -> pd.DataFrame:
+    """Canonical transactions: random days in [start, start + days), amounts, labels.
+
+    tx_ids defaults to 'id-<seed>-<i>', so frames with different seeds never
+    share ids. Category and Merchant include missing values.
+    """
+    rng = np.random.default_rng(seed)
+    if tx_ids is not None:
+        n = len(tx_ids)
+    dates = pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days * 24, n), unit='h')
+    return pd.DataFrame({
+        'tx_id': [f'id-{seed}-{i}' for i in range(n)] if tx_ids is None else list(tx_ids),
+        'Date': dates,
+        'Day': dates.day,
+        'Month': dates.month,
+        'Year': dates.year,
+        'Amount': rng.normal(20, 40, n).round(2),
+        'Category': rng.choice(np.array(['Dining', 'Groceries', None], dtype=object), n),
+        'Description': 'SHOP',
+        'Source': rng.choice(['DISCOVER', 'AMEX'], n),
+        'Merchant': rng.choice(np.array(['A', 'B', None], dtype=object), n),
+    })
+
+
+def statement_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """Parsed-statement rows before tx_id assignment (Date, Description, Amount, Category, Source)."""
+    rng = np.random.default_rng(seed)
+    descriptions = np.array([m[0] for m in MERCHANTS] + [' TRADER JOE S ', 'Netflix.com'], dtype=object)
+    dates = pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 5 * 365, n), unit='D')
+    amounts = np.round(rng.gamma(2.0, 25.0, n), 2)
+    amounts[rng.random(n) < 0.05] *= -1
+    return pd.DataFrame({
+        'Date': dates,
+        'Description': descriptions[rng.integers(0, len(descriptions), n)],
+        'Amount': amounts,
+        'Category': 'Merchandise',
+        'Source': np.where(rng.random(n) < 0.5, 'AMEX', 'DISCOVER'),
+    })
+
+
+def legacy_assign_tx_id(df: pd.DataFrame) -> pd.DataFrame:
+    """Row-wise tx_id builder the vectorized Ingestion.assign_tx_id replaced (the reference)."""
+    df = df.copy()
+
+    def make_base_key(row) -> str:
+        dt = pd.to_datetime(row['Date'], errors='coerce')
+        date_s = dt.strftime('%Y-%m-%d') if pd.notna(dt) else ''
+
+        amt = pd.to_numeric(row['Amount'], errors='coerce')
+        amt_s = f'{float(amt):.2f}' if pd.notna(amt) else ''
+
+        desc_val = row.get('Description', '')
+        if pd.isna(desc_val):
+            desc_val = ''
+        desc = re.sub(r"\s+", " ", str(desc_val).strip().lower())
+
+        source_val = row.get('Source', '')
+        if pd.isna(source_val):
+            source_val = ''
+        source = str(source_val).strip().upper()
+
+        return f"{source}|{date_s}|{amt_s}|{desc}"
+
+    df['_base_key'] = df.apply(make_base_key, axis=1)
+    df = df.sort_values(['_base_key'], kind='mergesort').reset_index(drop=True)
+    df['_dup_rank'] = df.groupby('_base_key').cumcount()
+    df['tx_id'] = (df['_base_key'] + '|' + df['_dup_rank'].astype(str)
+                   ).apply(lambda s: hashlib.sha1(s.encode('utf-8')).hexdigest())
+    return df.drop(columns=['_base_key', '_dup_rank'])
+
+
+# ------------------------------
+# statement files
+# ------------------------------
+def write_discover_csv(path, body: list[tuple]) -> str:
+    """Discover export with a preamble; body rows are (date, description, amount, category)."""
+    lines = ['Discover Card Statement,,,,', 'Account ending 1234,,,,', '', ','.join(DISCOVER_HEADER)]
+    lines += [f'{d},{d},{desc},{amt},{cat}' for d, desc, amt, cat in body]
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def write_amex_xlsx(path, body: list[list], preamble: list[list] | None = None, header: list | None = AMEX_HEADER) -> str:
+    """AMEX workbook: preamble rows, the header row, then body rows as given (cells may be any value)."""
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Transaction Details'
+    for row in preamble if preamble is not None else [['Transaction Details'], ['Prepared for', 'JANE DOE'], []]:
+        ws.append(row)
+    if header is not None:
+        ws.append(header)
+    for row in body:
+        ws.append(row)
+    wb.save(path)
+    return str(path)
+
+
+def write_statements(out_dir: str, rows: int, files: int = 4, seed: int = 0) -> list[tuple[str, str]]:
+    """`files` statements (AMEX and Discover alternating) with payments and exact duplicate charges.
+
+    Returns [(path, firm)] for Ingestion.add_many.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    out = []
+    for i in range(files):
+        rng = np.random.default_rng(seed + i)
+        n = rows // files
+        picks = rng.integers(0, len(MERCHANTS) + 1, n)
+        table = MERCHANTS + [PAYMENT]
+        dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+        amounts = np.round(rng.gamma(2.0, 25.0, n) + 1, 2)
+        amounts = np.where(picks == len(MERCHANTS), -amounts * 10, amounts)
+        body = [
+            (d.strftime('%m/%d/%Y'), table[p][0], float(a), table[p][1 if i % 2 == 0 else 2])
+            for d, p, a in zip(dates, picks, amounts)
+        ]
+        body += [body[j] for j in rng.integers(0, n, n // 20)]
+        if i % 2 == 0:
+            path = os.path.join(out_dir, f'amex_{i:03d}.xlsx')
+            write_amex_xlsx(path, [[d, desc, a, desc.title(), cat] for d, desc, a, cat in body])
+            out.append((path, 'AMEX'))
+        else:
+            path = os.path.join(out_dir, f'discover_{i:03d}.csv')
+            write_discover_csv(path, [(d, desc, f'{a:.2f}', cat) for d, desc, a, cat in body])
+            out.append((path, 'DISCOVER'))
+    return out
+
+
+# ------------------------------
+# multi-process workers
+# ------------------------------
+def ingest_worker(backend: str, data_dir: str, jobs: list, start, results) -> None:
+    """Writer process: add_data every (path, firm) once `start` is set; put the inserted total."""
+    from core.ingestion import Ingestion
+    from core.report import FinanceReport
+
+    sys.stdout = open(os.devnull, 'w')  # Ingestion prints per statement
+    storage = STORAGE_BACKENDS[backend](data_dir)
+    FinanceReport(storage)  # keep the spend cube following writes, as the app does
+    ingestion = Ingestion(storage)
+    start.wait()
+    results.put(sum(ingestion.add_data(path, firm)['inserted'] for path, firm in jobs))
+
+
+def snapshot_reader(backend: str, data_dir: str, stop, results) -> None:
+    """Reader process: load tx_ids until `stop`; put (reads, violations) seen in the snapshots."""
+    storage = STORAGE_BACKENDS[backend](data_dir)
+    reads, violations, last = 0, [], 0
+    while not stop.is_set():
+        ids = storage.load_transactions(columns=['tx_id'])['tx_id']
+        reads += 1
+        if ids.isna().any():
+            violations.append(f'read {reads}: missing tx_id (torn row)')
+        if ids.duplicated().any():
+            violations.append(f'read {reads}: {int(ids.duplicated().sum())} duplicated tx_ids')
+        if len(ids) < last:
+            violations.append(f'read {reads}: {len(ids)} rows after {last}')
+        last = len(ids)
+    results.put((reads, violations))
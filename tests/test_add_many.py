@@ -0,0 +1,44 @@
+import pytest
+
+from core.ingestion import Ingestion
+from support import BACKENDS, write_discover_csv
+
+
+def write_statement(path, rows):
+    return write_discover_csv(path, [(d, desc, amt, 'Merchandise') for d, desc, amt in rows])
+
+
+@pytest.fixture(params=BACKENDS)
+def ingestion(request, make_storage):
+    return Ingestion(make_storage(request.param))
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_add_many_reports_inserted_and_skipped_per_file(ingestion, tmp_path, workers):
+    shared = [('01/05/2024', 'AMAZON.COM', '19.99'), ('01/06/2024', 'TARGET', '7.25')]
+    first = write_statement(tmp_path / 'a.csv', shared + [('01/07/2024', 'SHELL OIL', '40.00')])
+    # Overlaps the first file and repeats a row within itself
+    second = write_statement(tmp_path / 'b.csv', shared + [('02/01/2024', 'NETFLIX', '15.49')] * 2)
+    # Already stored before the batch
+    stored = write_statement(tmp_path / 'c.csv', [('03/01/2024', 'SPOTIFY', '9.99')])
+    ingestion.add_data(stored, 'DISCOVER')
+
+    stats = ingestion.add_many(
+        [(first, 'DISCOVER'), (str(tmp_path / 'missing.csv'), 'DISCOVER'), (second, 'DISCOVER'), (stored, 'DISCOVER')],
+        workers=workers,
+    )
+
+    files = {f['path']: f for f in stats['files']}
+    assert (files[first]['rows'], files[first]['inserted'], files[first]['skipped']) == (3, 3, 0)
+    # Duplicate Netflix charges are distinct transactions (occurrence rank)
+    assert (files[second]['rows'], files[second]['inserted'], files[second]['skipped']) == (4, 2, 2)
+    assert (files[stored]['rows'], files[stored]['inserted'], files[stored]['skipped']) == (1, 0, 1)
+    missing = files[str(tmp_path / 'missing.csv')]
+    assert missing['error'] is not None and (missing['inserted'], missing['skipped']) == (0, 0)
+
+    assert sum(f['inserted'] for f in stats['files']) == stats['inserted'] == 5
+    assert sum(f['skipped'] for f in stats['files']) == stats['skipped']
+    assert 'inserted_by_owner' not in stats
+
+    again = ingestion.add_many([(first, 'DISCOVER'), (second, 'DISCOVER')], workers=workers)
+    assert [(f['inserted'], f['skipped']) for f in again['files']] == [(0, 3), (0, 4)]
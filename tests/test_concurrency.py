@@ -0,0 +1,79 @@
+import multiprocessing as mp
+import os
+
+import pandas as pd
+import pytest
+
+from core.cube import SpendCube
+from core.ingestion import Ingestion
+from core.report import FinanceReport
+from core.storage import Storage
+from support import BACKENDS, ingest_worker, snapshot_reader, write_statements
+
+WRITERS = 3
+
+
+@pytest.fixture(scope='module')
+def statements(tmp_path_factory):
+    """Small synthetic statements and every tx_id they produce."""
+    files = write_statements(str(tmp_path_factory.mktemp('statements')), 1_500, files=6)
+    parser_only = Ingestion(Storage(str(tmp_path_factory.mktemp('reference'))))
+    expected = set()
+    for path, firm in files:
+        expected.update(parser_only.ingest(path, firm)['tx_id'])
+    return files, expected
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_concurrent_writers(statements, make_storage, backend):
+    files, expected = statements
+    data_dir = make_storage(backend).data_dir
+    ctx = mp.get_context('spawn')
+    start, stop = ctx.Event(), ctx.Event()
+    results, reads = ctx.Queue(), ctx.Queue()
+
+    # Every statement goes to two writers, so duplicate tx_ids race each other
+    jobs = [[] for _ in range(WRITERS)]
+    for i, f in enumerate(files):
+        jobs[i % WRITERS].append(f)
+        jobs[(i + 1) % WRITERS].append(f)
+    procs = [ctx.Process(target=ingest_worker, args=(backend, data_dir, j, start, results)) for j in jobs]
+    reader = ctx.Process(target=snapshot_reader, args=(backend, data_dir, stop, reads))
+    for p in procs + [reader]:
+        p.start()
+    try:
+        start.set()
+        inserted = [results.get(timeout=300) for _ in procs]
+        for p in procs:
+            p.join(timeout=60)
+        stop.set()
+        _, violations = reads.get(timeout=60)
+        reader.join(timeout=60)
+    finally:
+        stop.set()
+        for p in procs + [reader]:
+            if p.is_alive():
+                p.terminate()
+    assert all(p.exitcode == 0 for p in procs + [reader])
+    assert not violations, violations[:5]
+
+    storage = make_storage(backend)
+    df = storage.load_transactions()
+    # No lost or duplicated rows, and the writers' counts add up
+    assert not df['tx_id'].duplicated().any()
+    assert set(df['tx_id']) == expected
+    assert sum(inserted) == len(df)
+
+    # Derived state agrees with the table
+    summary, table = storage.summary(), storage._summarize(df)
+    assert summary['rows'] == table['rows'] == len(df)
+    assert round(summary['gross_spend'], 2) == round(table['gross_cents'] / 100, 2)
+    assert round(summary['credits'], 2) == round(table['credit_cents'] / 100, 2)
+    cube = FinanceReport(storage).cube.frame()
+    pd.testing.assert_frame_equal(
+        cube.reset_index(drop=True), SpendCube.aggregate(df), check_exact=False, rtol=1e-9, check_dtype=False
+    )
+
+    # The write-ahead log is drained, and every writer picked up its result
+    if os.path.isdir(storage.wal_dir):
+        assert not os.listdir(storage.wal_dir), os.listdir(storage.wal_dir)
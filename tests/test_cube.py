@@ -0,0 +1,54 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core.cube import SpendCube
+from support import BACKENDS
+
+
+@pytest.fixture(params=BACKENDS)
+def storage(request, make_storage):
+    return make_storage(request.param)
+
+
+def assert_cube(actual, storage):
+    expected = SpendCube.aggregate(storage.load_transactions(columns=['Date', 'Amount', 'Category', 'Source']))
+    pd.testing.assert_frame_equal(
+        actual.reset_index(drop=True), expected, check_exact=False, rtol=1e-9, check_dtype=False
+    )
+
+
+def test_merges_append_deltas_that_match_a_rebuild(storage, make_transactions):
+    cube = SpendCube(storage)
+    storage.merge_and_save(make_transactions(200, seed=0, start='2024-01-01', days=20))
+    cube.frame()
+    # Later days, then days overlapping and preceding what is stored
+    for seed, start in [(1, '2024-02-01'), (2, '2024-01-10'), (3, '2023-12-20')]:
+        storage.merge_and_save(make_transactions(50, seed=seed, start=start, days=20))
+        assert_cube(cube.frame(), storage)
+
+    assert len(os.listdir(cube.delta_dir)) == 3
+    # A fresh reader rebuilds the cube from the base file plus the deltas
+    reloaded, fingerprint = SpendCube(storage)._load_persisted()
+    assert fingerprint == storage._fingerprint()
+    assert_cube(reloaded, storage)
+
+
+def test_rewrite_and_max_deltas_fold_deltas(storage, make_transactions):
+    cube = SpendCube(storage)
+    cube.max_deltas = 2
+    storage.merge_and_save(make_transactions(100, seed=0, start='2024-01-01', days=20))
+    cube.frame()
+    for seed in (1, 2):
+        storage.merge_and_save(make_transactions(10, seed=seed, start='2024-01-05', days=20))
+    assert len(os.listdir(cube.delta_dir)) == 2
+    storage.merge_and_save(make_transactions(10, seed=3, start='2024-01-05', days=20))
+    assert os.listdir(cube.delta_dir) == []
+    assert_cube(SpendCube(storage)._load_persisted()[0], storage)
+
+    storage.merge_and_save(make_transactions(10, seed=4, start='2024-03-01', days=20))
+    assert len(os.listdir(cube.delta_dir)) == 1
+    storage.save_transactions(storage.load_transactions())
+    assert os.listdir(cube.delta_dir) == []
+    assert_cube(cube.frame(), storage)
@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from core.ingestion import Ingestion
+from support import write_discover_csv
+
+# Body rows, in file order. Chunk boundaries (chunksize 2/3/4) fall between
+# duplicate charges, and next to payment / promo-credit / "Payments and Credits" rows.
+BODY = [
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/03/2024', 'INTERNET PAYMENT - THANK YOU', '-200.00', 'Payments and Credits'),
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/04/2024', 'DIRECTPAY FULL BALANCE', '-50.00', 'Awards and Rebate Credits'),
+    ('01/05/2024', '$100 STATEMENT CREDIT W/ PURCHASE', '-100.00', 'Awards and Rebate Credits'),
+    ('01/05/2024', 'AMAZON.COM', '19.99', 'Merchandise'),
+    ('01/05/2024', 'AMAZON.COM', '19.99', 'Merchandise'),
+    ('01/06/2024', 'AMAZON.COM', '-19.99', 'Merchandise'),
+    ('01/06/2024', '$100 REFER A FRIEND CREDIT', '-100.00', 'Awards and Rebate Credits'),
+    ('01/05/2024', 'AMAZON.COM', '19.99', 'Merchandise'),
+    ('01/07/2024', 'SHELL  OIL', '40.00', 'Gasoline'),
+    ('bad date', 'SHELL  OIL', 'n/a', 'Gasoline'),
+    ('01/07/2024', 'shell oil', '40.00', 'Gasoline'),
+]
+
+
+@pytest.fixture
+def statement(tmp_path):
+    return write_discover_csv(tmp_path / 'discover.csv', BODY)
+
+
+@pytest.fixture
+def ingestion(make_storage):
+    return Ingestion(make_storage())
+
+
+def canonical(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.astype({'Description': str}).sort_values('tx_id').reset_index(drop=True)
+    return df
+
+
+@pytest.mark.parametrize('chunksize', [1, 2, 3, 4, 100])
+def test_stream_matches_whole_file_loader(ingestion, statement, chunksize):
+    whole = ingestion.ingest(statement, 'DISCOVER')
+    chunks = list(ingestion.iter_discover_csv(statement, chunksize=chunksize))
+
+    assert all(len(c) <= chunksize for c in chunks)
+    streamed = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(canonical(streamed), canonical(whole), check_dtype=False)
+
+
+def test_payments_and_promos_dropped_and_duplicates_kept(ingestion, statement):
+    streamed = pd.concat(ingestion.iter_discover_csv(statement, chunksize=2), ignore_index=True)
+    descriptions = streamed['Description'].astype(str)
+    assert not descriptions.str.contains('PAYMENT|DIRECTPAY|STATEMENT CREDIT|REFER A FRIEND').any()
+    # Identical charges split across chunks keep distinct ranks, so distinct tx_ids
+    assert (descriptions == 'STARBUCKS #1').sum() == 3
+    assert (descriptions == 'AMAZON.COM').sum() == 4
+    assert streamed['tx_id'].is_unique
+
+
+def test_streamed_add_data_matches_whole_file(make_storage, statement):
+    whole = Ingestion(make_storage(name='whole'))
+    chunked = Ingestion(make_storage(name='chunked'))
+    whole.add_data(statement, 'DISCOVER')
+    chunked.add_data(statement, 'DISCOVER', chunksize=3)
+    a = whole.storage.load_transactions()
+    b = chunked.storage.load_transactions()
+    assert sorted(a['tx_id']) == sorted(b['tx_id'])
@@ -0,0 +1,32 @@
+import json
+
+from core.ingestion import Ingestion
+from core.jobs import IngestQueue
+from support import write_discover_csv
+
+BODY = [
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/05/2024', 'AMAZON.COM', '19.99', 'Merchandise'),
+]
+
+
+def test_profiling_is_per_job(make_storage, tmp_path):
+    storage = make_storage()
+    queue = IngestQueue(Ingestion(storage), workers=2)
+    log = tmp_path / 'profile.jsonl'
+    jan = write_discover_csv(tmp_path / 'jan.csv', BODY)
+    feb = write_discover_csv(tmp_path / 'feb.csv', [('02/01/2024', 'SHELL OIL', '30.00', 'Gasoline')])
+    plain = queue.submit(jan, 'DISCOVER')
+    profiled = queue.submit(feb, 'DISCOVER', profile=True, profile_log=str(log))
+    queue.shutdown()
+
+    stats = {job['job_id']: job['stats'] for job in queue.jobs()}
+    assert 'profile' not in stats[plain]
+    stages = {row['stage'] for row in stats[profiled]['profile']}
+    assert {'read_csv', 'assign_tx_id', 'lock_wait', 'listeners'} <= stages
+    # The store's own profiler was never switched on
+    assert not storage.profiler.enabled and not storage.profiler.records()
+
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert {line['stage'] for line in lines} == stages
+    assert {line['op'] for line in lines} == {'ingest_job'}
@@ -0,0 +1,19 @@
+import pandas as pd
+
+from core.cache import LoadCache
+
+
+def test_hits_hand_out_private_frames(make_storage):
+    storage = make_storage(rows=20)
+    stored = storage.load_transactions()
+    cache = LoadCache()
+
+    first = cache.load(storage)
+    first.loc[0, 'Amount'] = 999.0
+    first['Category'] = 'mutated'
+    first.drop(index=1, inplace=True)
+
+    second = cache.load(storage)
+    assert second is not first
+    assert cache.stats()['hits'] == 1
+    pd.testing.assert_frame_equal(second, stored)
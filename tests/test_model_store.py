@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from core.agent import Agent
+from core.model_store import ModelStore
+from core.predict import BudgetPredictor
+from support import BACKENDS
+
+
+def full_refit(storage) -> pd.DataFrame:
+    """The forecast a fresh BudgetPredictor fits from everything in storage (the reference)."""
+    p = BudgetPredictor()
+    panel = p.build_monthly_panel(storage.load_transactions(columns=['Date', 'Amount', 'Category']), by='Category')
+    frame = p.make_features(panel)
+    p.fit_ridge(frame, feature=['lag_1', 'roll3_mean'], alpha=1.0, val_months=3)
+    return p.predict_next_month(frame)
+
+
+def assert_matches_full_refit(models: ModelStore) -> None:
+    got = models.predict().sort_values('Category').reset_index(drop=True)
+    expected = full_refit(models.storage).sort_values('Category').reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, expected, check_exact=False, rtol=1e-9, check_dtype=False)
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_merges_match_full_refit(backend, make_storage, make_transactions):
+    storage = make_storage(backend)
+    storage.merge_and_save(make_transactions(150, seed=1, start='2023-03-01', days=300))
+    models = ModelStore(storage)
+    assert_matches_full_refit(models)
+    assert models.stats()['full'] == 1
+
+    # Appending later months re-sums the tail only
+    storage.merge_and_save(make_transactions(150, seed=2, start='2024-01-01', days=45))
+    assert_matches_full_refit(models)
+    assert models.stats() == {'cached': 0, 'incremental': 1, 'full': 1}
+    assert_matches_full_refit(models)
+    assert models.stats()['cached'] == 1
+
+    # Inserts into older months, and a key the models have not seen
+    older = make_transactions(40, seed=3, start='2023-06-01', days=60)
+    older.loc[::4, 'Category'] = 'Travel'
+    storage.merge_and_save(older)
+    assert_matches_full_refit(models)
+    assert models.stats()['incremental'] == 2 and models.stats()['full'] == 1
+
+    # History before the first month shifts every row: full refit
+    storage.merge_and_save(make_transactions(40, seed=4, start='2022-11-01', days=60))
+    assert_matches_full_refit(models)
+    assert models.stats()['full'] == 2
+
+
+def test_rewrite_matches_full_refit(make_storage, make_transactions):
+    storage = make_storage()
+    storage.merge_and_save(make_transactions(150, seed=1, start='2023-03-01', days=300))
+    models = ModelStore(storage)
+    models.predict()
+
+    df = storage.load_transactions()
+    storage.save_transactions(df[df['Amount'] > 0])
+    assert_matches_full_refit(models)
+    assert models.stats()['full'] == 2
+
+
+def test_new_store_reloads_persisted_models(make_storage, make_transactions):
+    storage = make_storage()
+    storage.merge_and_save(make_transactions(150, seed=1, start='2023-03-01', days=300))
+    ModelStore(storage).predict()
+
+    # A fresh process: the persisted models match storage, no refit
+    reloaded = ModelStore(storage)
+    assert_matches_full_refit(reloaded)
+    assert reloaded.stats()['full'] == 0 and reloaded.stats()['incremental'] == 0
+
+    # ... and stay incremental across its own writes
+    storage.merge_and_save(make_transactions(150, seed=2, start='2024-01-01', days=45))
+    assert_matches_full_refit(reloaded)
+    assert reloaded.stats() == {'cached': 0, 'incremental': 1, 'full': 0}
+
+    # Written behind its back (another store object): rebuilt from storage
+    other = type(storage)(storage.data_dir, storage.filename)
+    other.merge_and_save(make_transactions(30, seed=5, start='2024-02-15', days=30))
+    assert_matches_full_refit(reloaded)
+
+
+def test_agent_takes_over_persisted_models_on_write(tmp_path, make_transactions):
+    data_dir = str(tmp_path / 'agent')
+    agent = Agent(data_dir)
+    agent.storage.merge_and_save(make_transactions(150, seed=1, start='2023-03-01', days=300))
+    agent.models.predict()
+
+    # A new Agent has not built its models yet; the first write builds them
+    # from the persisted state so they follow the insert incrementally
+    again = Agent(data_dir)
+    assert again._models is None
+    again.storage.merge_and_save(make_transactions(150, seed=2, start='2024-01-01', days=45))
+    assert again._models is not None
+    assert_matches_full_refit(again.models)
+    assert again.models.stats() == {'cached': 0, 'incremental': 1, 'full': 0}
+
+    # Without persisted models, writes leave them unbuilt
+    fresh = Agent(str(tmp_path / 'fresh'))
+    fresh.storage.merge_and_save(make_transactions(150, seed=1, start='2023-03-01', days=300))
+    assert fresh._models is None
+    assert_matches_full_refit(fresh.models)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.predict import BudgetPredictor
+
+MONTHS = pd.period_range('2023-01', periods=12, freq='M')
+
+
+def ar_transactions() -> pd.DataFrame:
+    """Monthly spend that ridge can fit exactly: 'Dining' follows y = 10 + 0.5 * y[-1], 'Rent' is flat.
+
+    Each month is split over two transactions (and a refund for Rent) so the panel has to net them.
+    """
+    y, rows = 100.0, []
+    for month in MONTHS:
+        day = month.to_timestamp()
+        rows += [(day, 'Dining', y - 30.0), (day + pd.Timedelta(days=9), 'Dining', 30.0)]
+        rows += [(day + pd.Timedelta(days=1), 'Rent', 60.0), (day + pd.Timedelta(days=20), 'Rent', -10.0)]
+        y = 10 + 0.5 * y
+    return pd.DataFrame(rows, columns=['Date', 'Category', 'Amount'])
+
+
+def test_build_monthly_panel():
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(['2024-01-03', '2024-01-20', '2024-03-02', '2024-03-31', None]),
+        'Category': ['Dining', None, 'Dining', 'Dining', 'Dining'],
+        'Amount': [12.5, 7.0, 20.0, -5.0, 99.0],
+    })
+    panel = BudgetPredictor().build_monthly_panel(df, by='Category')
+
+    # Every month in range (February had no activity), keys sorted, refunds netted
+    expected = pd.DataFrame(
+        {'Dining': [12.5, 0.0, 15.0], 'Uncategorized': [7.0, 0.0, 0.0]},
+        index=pd.period_range('2024-01', periods=3, freq='M', name='month'),
+    )
+    expected.columns.name = 'Category'
+    pd.testing.assert_frame_equal(panel, expected)
+
+
+def test_fit_and_predict_deterministic_panel():
+    p = BudgetPredictor()
+    panel = p.build_monthly_panel(ar_transactions(), by='Category')
+    frame = p.make_features(panel)
+    validation = p.fit_ridge(frame, feature=['lag_1'], alpha=0.0, val_months=3)
+
+    # Dining's first month has no lag; the held-out months are predicted exactly
+    assert p.n_train_.tolist() == [11, 11]
+    assert validation['n_val'].tolist() == [3, 3]
+    np.testing.assert_allclose(validation['mae'], 0.0, atol=1e-8)
+    np.testing.assert_allclose(p.coef_.loc['Dining', 'lag_1'], 0.5)
+    np.testing.assert_allclose(p.intercept_['Dining'], 10.0)
+    # Rent has no variance to explain: the intercept carries it
+    np.testing.assert_allclose(p.coef_.loc['Rent', 'lag_1'], 0.0, atol=1e-12)
+    np.testing.assert_allclose(p.intercept_['Rent'], 50.0)
+
+    forecast = p.predict_next_month(frame)
+    last_dining = panel['Dining'].iloc[-1]
+    assert forecast['Category'].tolist() == ['Rent', 'Dining']
+    assert forecast['month'].tolist() == ['2024-01', '2024-01']
+    assert forecast['method'].tolist() == ['ridge', 'ridge']
+    np.testing.assert_allclose(forecast['predicted_spend'], [50.0, 10 + 0.5 * last_dining])
+
+
+def test_predict_falls_back_to_last_month():
+    p = BudgetPredictor()
+    df = ar_transactions()
+    panel = p.build_monthly_panel(df[df['Date'] < '2023-02-01'], by='Category')
+    frame = p.make_features(panel)
+    p.fit_ridge(frame, feature=['lag_1', 'roll3_mean'])
+
+    forecast = p.predict_next_month(frame)
+    assert forecast['method'].tolist() == ['last_month', 'last_month']
+    assert forecast.set_index('Category')['predicted_spend'].to_dict() == {'Dining': 100.0, 'Rent': 50.0}
+
+
+def test_fit_ridge_rejects_missing_features_and_negative_alpha():
+    p = BudgetPredictor()
+    frame = p.make_features(p.build_monthly_panel(ar_transactions()))
+    with pytest.raises(ValueError, match='Missing features'):
+        p.fit_ridge(frame, feature=['lag_12'])
+    with pytest.raises(ValueError, match='alpha must be >= 0'):
+        p.fit_ridge(frame, alpha=-1.0)
+
+
+def test_backtest_scores_exact_model():
+    p = BudgetPredictor()
+    panel = p.build_monthly_panel(ar_transactions())
+    results = p.backtest(panel, feature_sets=[['lag_1']], alphas=[0.0], n_cutoffs=4, min_train_months=6, workers=1)
+
+    assert results['folds'].tolist() == [4, 4]
+    np.testing.assert_allclose(results['mae'], 0.0, atol=1e-8)
+    np.testing.assert_allclose(results['mape'], 0.0, atol=1e-8)
+
+
+def test_backtest_workers_agree(make_transactions):
+    p = BudgetPredictor()
+    panel = p.build_monthly_panel(make_transactions(2000, seed=7, start='2022-01-01', days=900), by='Category')
+    grid = dict(feature_sets=[['lag_1'], ['lag_1', 'roll3_mean']], alphas=[0.1, 1.0, 10.0], n_cutoffs=12)
+
+    serial = p.backtest(panel, workers=1, **grid)
+    # workers > 1 shares the panel with the pool through shared memory
+    pooled = p.backtest(panel, workers=2, **grid)
+
+    assert len(serial) == len(panel.columns) * 2 * 3 and (serial['folds'] == 12).all()
+    pd.testing.assert_frame_equal(pooled, serial, check_exact=False, rtol=1e-12)
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from core.report import FinanceReport
+
+
+def test_query_results_are_not_shared_with_the_cache(make_storage):
+    report = FinanceReport(make_storage(rows=50))
+    args = (['Category'], ['spend', 'count'])
+
+    first = report.query(*args, granularity='month')
+    expected = first.copy(deep=True)
+    # Mutating the result the miss stored must not reach the cache
+    first.loc[0, 'spend'] = -1.0
+    first['count'] = 0
+
+    second = report.query(*args, granularity='month')
+    assert report.query_cache.stats()['hits'] == 1
+    pd.testing.assert_frame_equal(second, expected)
+
+    second.drop(columns='spend', inplace=True)
+    third = report.query(*args, granularity='month')
+    assert third is not second
+    pd.testing.assert_frame_equal(third, expected)
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.schema import decode_tx_ids, encode_tx_ids, to_canonical, to_compact
+
+HEX_IDS = ['0123456789abcdef0123456789abcdef01234567', 'f' * 40]
+
+
+def test_hex_ids_round_trip_as_binary():
+    encoded = encode_tx_ids(pd.Series(HEX_IDS))
+    assert isinstance(encoded.dtype, pd.ArrowDtype)
+    assert decode_tx_ids(encoded).tolist() == HEX_IDS
+
+
+@pytest.mark.parametrize('ids', [
+    HEX_IDS + ['manual-1'],
+    HEX_IDS + [np.nan],
+    HEX_IDS + [HEX_IDS[0].upper()],
+    [7, 8],
+])
+def test_other_ids_fall_back_to_objects(ids):
+    encoded = encode_tx_ids(pd.Series(ids))
+    assert encoded.dtype == object
+    pd.testing.assert_series_equal(decode_tx_ids(encoded), pd.Series(ids, dtype=object))
+
+
+def test_load_compact_with_a_manual_id(make_storage, make_transactions):
+    storage = make_storage()
+    storage.merge_and_save(make_transactions(tx_ids=[HEX_IDS[0], 'manual-1']))
+    compact = storage.load_compact()
+    assert sorted(compact['tx_id']) == sorted([HEX_IDS[0], 'manual-1'])
+    assert sorted(to_canonical(compact)['tx_id']) == sorted([HEX_IDS[0], 'manual-1'])
+    # Re-merging the compact frame finds both ids already stored
+    assert storage.merge_and_save(to_compact(storage.load_transactions()))['inserted'] == 0
@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.report import FinanceReport
+
+
+@pytest.fixture
+def storage(make_storage, make_transactions):
+    df = make_transactions(300, days=90)
+    df.loc[::37, 'Amount'] = np.nan
+    storage = make_storage('sqlite')
+    storage.merge_and_save(df)
+    return storage
+
+
+@pytest.mark.parametrize('dimensions, filters', [
+    (['Category'], None),
+    (['Source', 'weekday'], {'Category': [None, 'Dining']}),
+    (['Merchant', 'Month'], None),
+])
+def test_pushed_down_query_matches_in_memory_aggregation(storage, dimensions, filters):
+    report = FinanceReport(storage, use_cube=False)
+    kwargs = dict(
+        dimensions=dimensions, measures=['spend', 'refunds', 'net', 'count'], filters=filters,
+        date_range=('2024-01-15', '2024-03-10'), granularity='week',
+    )
+    pushed = report.query(**kwargs)
+    loaded = report.query(**kwargs, df=storage.load_transactions())
+    pd.testing.assert_frame_equal(pushed, loaded, check_exact=False, rtol=1e-9, check_dtype=False)
+    assert len(pushed) > 0
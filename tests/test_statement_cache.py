@@ -0,0 +1,72 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from core.ingestion import Ingestion
+from core.statement_cache import StatementCache
+from support import write_discover_csv
+
+BODY = [
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/02/2024', 'STARBUCKS #1', '4.50', 'Restaurants'),
+    ('01/05/2024', 'AMAZON.COM', '19.99', 'Merchandise'),
+]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StatementCache(str(tmp_path / 'statement_cache'))
+
+
+def test_identical_content_hits(cache, make_storage, tmp_path):
+    ingestion = Ingestion(make_storage(), statement_cache=cache)
+    first = write_discover_csv(tmp_path / 'jan.csv', BODY)
+    # Same bytes under another name (a re-upload)
+    again = shutil.copy(first, tmp_path / 'jan (1).csv')
+
+    parsed, hit = ingestion.ingest_cached(first, 'DISCOVER')
+    assert hit is False
+    cached, hit = ingestion.ingest_cached(again, ' discover ')
+    assert hit is True
+    pd.testing.assert_frame_equal(cached, parsed, check_dtype=False)
+    assert cache.stats()['hits'] == 1 and cache.stats()['entries'] == 1
+
+    # Different content or firm: a different entry
+    changed = write_discover_csv(tmp_path / 'feb.csv', BODY[:2])
+    assert cache.key(changed, 'DISCOVER') != cache.key(first, 'DISCOVER')
+    assert cache.key(first, 'AMEX') != cache.key(first, 'DISCOVER')
+
+
+def test_lru_eviction_beyond_max_bytes(cache, make_transactions):
+    frames = {f'k{i}': make_transactions(200, seed=i) for i in range(4)}
+    cache.put('k0', frames['k0'])
+    size = cache.stats()['bytes']
+    cache.max_bytes = int(size * 2.5)
+
+    cache.put('k1', frames['k1'])
+    # Touch k0 so k1 is now the least recently used
+    os.utime(cache._path('k1'), (1, 1))
+    assert cache.get('k0') is not None
+    cache.put('k2', frames['k2'])
+    assert cache.get('k1') is None
+    assert cache.get('k0') is not None and cache.get('k2') is not None
+    assert cache.stats()['bytes'] <= cache.max_bytes
+
+    # A single entry larger than the budget is still kept
+    cache.max_bytes = 1
+    cache.put('k3', frames['k3'])
+    assert cache.stats()['entries'] == 1
+    pd.testing.assert_frame_equal(cache.get('k3'), frames['k3'], check_dtype=False)
+
+
+def test_parser_version_change_invalidates(cache, make_storage, tmp_path, monkeypatch):
+    ingestion = Ingestion(make_storage(), statement_cache=cache)
+    path = write_discover_csv(tmp_path / 'jan.csv', BODY)
+    assert ingestion.ingest_cached(path, 'DISCOVER')[1] is False
+    assert ingestion.ingest_cached(path, 'DISCOVER')[1] is True
+
+    monkeypatch.setattr(StatementCache, 'PARSER_VERSION', StatementCache.PARSER_VERSION + 1)
+    assert ingestion.ingest_cached(path, 'DISCOVER')[1] is False
+    assert ingestion.ingest_cached(path, 'DISCOVER')[1] is True
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.ingestion import Ingestion
+from support import legacy_assign_tx_id, statement_frame
+
+
+@pytest.fixture
+def ingestion(make_storage):
+    return Ingestion(make_storage())
+
+
+def edge_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.to_datetime([
+            '2023-01-05', '2023-01-05', '2023-01-05', '2023-01-05', '2023-01-06',
+            '2023-01-06', '2023-01-06', None, '2023-01-07', '2023-01-07',
+        ]),
+        'Description': [
+            'STARBUCKS  #1234   SEATTLE', 'starbucks #1234 seattle', ' STARBUCKS\t#1234\nSEATTLE ',
+            'Refund', 'Refund', None, 'Café  Ünïcode', 'No date', 'Zero', 'Zero',
+        ],
+        'Amount': [4.5, 4.5, 4.5, -0.0, 0.0, np.nan, 12.345, 3.0, 0.0, -0.0],
+        'Category': 'Dining',
+        'Source': [' amex ', 'AMEX', 'AMEX', 'AMEX', 'AMEX', 'DISCOVER', 'DISCOVER', None, 'AMEX', 'AMEX'],
+    })
+
+
+def assert_same_ids(ingestion, df):
+    got = ingestion.assign_tx_id(df)
+    expected = legacy_assign_tx_id(df)
+    assert got['tx_id'].tolist() == expected['tx_id'].tolist()
+    pd.testing.assert_frame_equal(got.drop(columns='tx_id'), expected.drop(columns='tx_id'))
+
+
+def test_edge_cases_match_row_wise_keys(ingestion):
+    # -0.0 keys as '-0.00', whitespace runs collapse, NaN amounts/dates/text key as ''
+    assert_same_ids(ingestion, edge_frame())
+
+
+def test_string_and_object_columns_match(ingestion):
+    df = edge_frame()
+    df['Date'] = df['Date'].dt.strftime('%m/%d/%Y')
+    df['Amount'] = df['Amount'].astype(object)
+    assert_same_ids(ingestion, df)
+
+
+def test_amounts_as_text_match(ingestion):
+    df = edge_frame()
+    df['Amount'] = ['4.50', '4.5', ' 4.5', '-0.00', '0', None, '12.345', 'n/a', '0.0', '-0']
+    assert_same_ids(ingestion, df)
+
+
+def test_synthetic_frame_matches(ingestion):
+    assert_same_ids(ingestion, statement_frame(5_000, seed=7))
+
+
+def test_dup_offsets_continue_ranks_across_chunks(ingestion):
+    df = edge_frame()
+    whole = ingestion.assign_tx_id(df)['tx_id']
+    offsets = {}
+    chunks = [ingestion.assign_tx_id(df.iloc[i:i + 3], dup_offsets=offsets)['tx_id'] for i in range(0, len(df), 3)]
+    assert sorted(pd.concat(chunks)) == sorted(whole)
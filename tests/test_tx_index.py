@@ -0,0 +1,52 @@
+import hashlib
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from support import transactions
+
+HEX_ID = hashlib.sha1(b'row').hexdigest()
+
+
+def rows(tx_ids: list[str], day: int = 1) -> pd.DataFrame:
+    return transactions(tx_ids=tx_ids, seed=day, start=f'2024-01-{day:02d}', days=1)
+
+
+@pytest.fixture(params=['csv', 'parquet'])
+def storage(request, make_storage):
+    # SQLite dedups with its own unique index
+    return make_storage(request.param)
+
+
+def test_hex_id_matches_across_mixed_batches(storage):
+    # A hand-edited id in the first batch must not change how the hex id is keyed
+    assert storage.merge_and_save(rows(['manual-1', HEX_ID]))['inserted'] == 2
+    assert storage.merge_and_save(rows([HEX_ID], day=2))['inserted'] == 0
+    assert storage.merge_and_save(rows(['manual-1'], day=3))['inserted'] == 0
+    ids = storage.load_transactions(columns=['tx_id'])['tx_id']
+    assert sorted(ids) == sorted(['manual-1', HEX_ID])
+
+
+def test_keys_do_not_depend_on_batch(storage):
+    mixed = storage._tx_keys(pd.Series(['manual-1', HEX_ID, HEX_ID.upper()]))
+    alone = storage._tx_keys(pd.Series([HEX_ID]))
+    assert mixed[1] == alone[0] == bytes.fromhex(HEX_ID)
+    assert mixed[0] == hashlib.sha1(b'manual-1').digest()
+    # Not the canonical lowercase form: digested like any other hand-edited id
+    assert mixed[2] != mixed[1]
+
+
+def test_index_from_older_format_is_rebuilt(storage):
+    storage.merge_and_save(rows(['manual-1', HEX_ID]))
+    meta_path = os.path.join(storage.index_dir, 'meta.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    del meta['version']
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    assert storage.merge_and_save(rows([HEX_ID], day=2))['inserted'] == 0
+    with open(meta_path) as f:
+        assert json.load(f)['version'] == storage.index_version
@@ -0,0 +1,97 @@
+import datetime as dt
+import re
+import zipfile
+
+import pandas as pd
+import pytest
+
+from core.ingestion import Ingestion
+from support import AMEX_HEADER, write_amex_xlsx
+
+
+def read_excel_baseline(path) -> pd.DataFrame:
+    """The loader before core.xlsx: pd.read_excel(header=None), then slice below the 'date' row."""
+    raw = pd.read_excel(path, header=None)
+    header = raw.index[raw.iloc[:, 0].astype(str).str.strip().str.lower().eq('date')][0]
+    df = raw.loc[header + 1:].copy()
+    df.columns = raw.loc[header].tolist()
+    return df[Ingestion.amex_columns].reset_index(drop=True)
+
+
+def with_cached_values(path, values: list) -> None:
+    """Give the sheet's formulas cached results, as Excel would (openpyxl writes none)."""
+    with zipfile.ZipFile(path) as zf:
+        files = {name: zf.read(name) for name in zf.namelist()}
+    sheet = files['xl/worksheets/sheet1.xml'].decode()
+    cached = iter(values)
+    sheet = re.sub(r'<f>(.*?)</f>(<v\s*/>|<v></v>)?', lambda m: f'<f>{m.group(1)}</f><v>{next(cached)}</v>', sheet)
+    files['xl/worksheets/sheet1.xml'] = sheet.encode()
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in files.items():
+            zf.writestr(name, data)
+
+
+@pytest.fixture
+def ingestion(make_storage):
+    return Ingestion(make_storage())
+
+
+def assert_matches_read_excel(ingestion, path):
+    got = ingestion.read_amex_xlsx(str(path))
+    expected = read_excel_baseline(path)
+    pd.testing.assert_frame_equal(got.astype(object), expected.astype(object), check_dtype=False)
+
+
+def test_cell_types_match_read_excel(ingestion, tmp_path):
+    path = tmp_path / 'amex.xlsx'
+    write_amex_xlsx(path, [
+        ['01/02/2024', 'STARBUCKS', 4.5, 'x', 'Restaurant-Bar & Café'],
+        [dt.datetime(2024, 1, 3), 12345, 10, 'numeric description', 'Merchandise & Supplies-Groceries'],
+        [dt.datetime(2024, 1, 4, 13, 30), 'FORMULA AMOUNT', '=2*10.25', None, 'Travel-Airline'],
+        [dt.date(2024, 1, 5), '#N/A', '#N/A', None, '#N/A'],
+        [],
+        ['01/06/2024', True, -20.0, None, None],
+        ['01/07/2024', 'TRAILING CELLS', 7.25, 'ignored', 'Fees & Adjustments-Fees & Adjustments', 'extra', 99],
+        [None, None, None, 'only an ignored column'],
+        [],
+        [],
+    ])
+    with_cached_values(path, [20.5])
+    assert_matches_read_excel(ingestion, path)
+    df = ingestion.read_amex_xlsx(str(path))
+    assert df.loc[2, 'Amount'] == 20.5
+    assert df.loc[1, 'Description'] == 12345
+    assert isinstance(df.loc[1, 'Date'], dt.datetime)
+
+
+def test_header_below_preamble_and_reordered_columns(ingestion, tmp_path):
+    path = tmp_path / 'amex.xlsx'
+    preamble = [['Transaction Details'], [], ['Prepared for', 'JANE DOE'], ['Date range', dt.datetime(2024, 1, 1)], [], []]
+    header = ['Date', 'Reference', 'Category', 'Amount', 'Description', 'Address']
+    write_amex_xlsx(path, [
+        [dt.datetime(2024, 2, 1), 'r1', 'Travel-Airline', 300.0, 'DELTA', 'ATL'],
+        ['02/02/2024', 'r2', 'Restaurant-Restaurant', 12, 'CHIPOTLE', None],
+        [],
+        ['02/03/2024', 'r3', None, -5.5, 'REFUND', 'x'],
+    ], preamble=preamble, header=header)
+    assert_matches_read_excel(ingestion, path)
+    assert len(ingestion.read_amex_xlsx(str(path))) == 4
+
+
+def test_statement_body_matches_read_excel(ingestion, tmp_path):
+    path = tmp_path / 'amex.xlsx'
+    body = [
+        [f'01/{d % 28 + 1:02d}/2024', f'MERCHANT {d % 7}', round(d * 1.37 - 20, 2), f'detail {d}', AMEX_HEADER[d % 2]]
+        for d in range(300)
+    ]
+    write_amex_xlsx(path, body)
+    assert_matches_read_excel(ingestion, path)
+
+
+def test_missing_header_or_columns(ingestion, tmp_path):
+    no_header = write_amex_xlsx(tmp_path / 'a.xlsx', [['01/02/2024', 'X', 1.0]], header=None)
+    with pytest.raises(ValueError, match='Could not find AMEX header row'):
+        ingestion.read_amex_xlsx(no_header)
+    no_category = write_amex_xlsx(tmp_path / 'b.xlsx', [['01/02/2024', 'X', 1.0]], header=['Date', 'Description', 'Amount'])
+    with pytest.raises(ValueError, match="missing required columns: \\['Category'\\]"):
+        ingestion.read_amex_xlsx(no_category)